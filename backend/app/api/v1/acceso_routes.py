@@ -3,11 +3,13 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 from app.db.database import get_session
+from app.core.pagination import Paginacion
 from app.models import (
     NFC, NFCCreate, Estudiante, 
     Acceso, AccesoCreate, AccesoRead, NfcPayload,
     CicloEscolar
 )
+from app.services import nfc_cache, ciclo_activo as ciclo_activo_provider
 
 router = APIRouter(
     tags=["Acceso y NFC"]
@@ -47,6 +49,7 @@ def vincular_nfc(nfc_in: NFCCreate, session: Session = Depends(get_session)):
     session.add(db_nfc)
     session.commit()
     session.refresh(db_nfc)
+    nfc_cache.invalidar_uid(db_nfc.nfc_uid)
     return db_nfc
 
 @router.post("/acceso/registrar", response_model=AccesoRead, status_code=status.HTTP_201_CREATED)
@@ -91,10 +94,8 @@ def registrar_acceso(payload: NfcPayload, session: Session = Depends(get_session
             detail="Tarjeta NFC no reconocida o no vinculada."
         )
     
-    # Obtener el ciclo escolar activo
-    ciclo_activo = session.exec(
-        select(CicloEscolar).where(CicloEscolar.activo == True)
-    ).first()
+    # Obtener el ciclo escolar activo (en caché)
+    ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(session)
     
     if not ciclo_activo:
         raise HTTPException(
@@ -108,7 +109,7 @@ def registrar_acceso(payload: NfcPayload, session: Session = Depends(get_session
         .where(
             Acceso.nfc_uid == nfc.nfc_uid,
             Acceso.id_ciclo == ciclo_activo.id,
-            func.date(Acceso.hora_registro) == hoy
+            Acceso.fecha == hoy
         )
     ).first()
     
@@ -126,7 +127,8 @@ def registrar_acceso(payload: NfcPayload, session: Session = Depends(get_session
     nuevo_acceso = Acceso(
         nfc_uid=nfc.nfc_uid,
         id_ciclo=ciclo_activo.id,
-        hora_registro=hora_registro
+        hora_registro=hora_registro,
+        fecha=hoy
     )
     session.add(nuevo_acceso)
     session.commit()
@@ -158,9 +160,14 @@ def obtener_historial_por_matricula(matricula: str, session: Session = Depends(g
     return registros
 
 @router.get("/acceso/ciclo/{id_ciclo}", response_model=List[AccesoRead])
-def obtener_accesos_por_ciclo(id_ciclo: int, session: Session = Depends(get_session)):
+def obtener_accesos_por_ciclo(
+    id_ciclo: int,
+    session: Session = Depends(get_session),
+    pagina: Paginacion = Depends()
+):
     """
-    Obtiene todos los accesos de un ciclo escolar específico
+    Obtiene todos los accesos de un ciclo escolar específico.
+    Paginación opcional con `limit` y `after` (cursor en X-Next-Cursor).
     """
     ciclo = session.get(CicloEscolar, id_ciclo)
     if not ciclo:
@@ -169,11 +176,9 @@ def obtener_accesos_por_ciclo(id_ciclo: int, session: Session = Depends(get_sess
             detail=f"Ciclo escolar con ID {id_ciclo} no encontrado."
         )
     
-    statement = (
-        select(Acceso)
-        .where(Acceso.id_ciclo == id_ciclo)
-        .order_by(Acceso.hora_registro.desc())
+    statement = pagina.aplicar(
+        select(Acceso).where(Acceso.id_ciclo == id_ciclo),
+        Acceso.hora_registro, Acceso.id,
+        descendente=True
     )
-    
-    registros = session.exec(statement).all()
-    return registros
\ No newline at end of file
+    return pagina.recortar(session.exec(statement).all(), lambda a: (a.hora_registro, a.id))
\ No newline at end of file
@@ -3,21 +3,23 @@
 Rutas para el registro de asistencia por matrícula.
 Sistema de entrada/salida con validación de rango 1-8 horas.
 """
-from typing import List
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlmodel import Session, select
-from sqlalchemy import func
 import pytz
 
 from app.db.database import get_session
+from app.core.pagination import Paginacion
 from app.models import (
     Estudiante,
     Asistencia, AsistenciaCreate, AsistenciaRead,
     Usuario,
-    NFC, NfcPayload,
-    CicloEscolar
+    NfcPayload, NfcBatchPayload
 )
+from app.services import nfc_cache, cola_asistencia, antirrebote, exportacion
+from app.services.asistencia_service import AsistenciaService
 
 router = APIRouter(
     prefix="/asistencia",
@@ -27,10 +29,6 @@ router = APIRouter(
 # Zona horaria de México
 MEXICO_TZ = pytz.timezone('America/Mexico_City')
 
-# Constantes de validación
-MINUTOS_MINIMOS = 5  # Mínimo 5 minutos entre entrada y salida
-HORAS_MAXIMAS = 10  # Máximo 10 horas entre entrada y salida
-
 @router.post("/registrar", response_model=dict, status_code=status.HTTP_201_CREATED)
 def registrar_asistencia(
     matricula: str,
@@ -38,174 +36,16 @@ def registrar_asistencia(
 ):
     """
     Registra entrada o salida de un estudiante por matrícula.
-    
-    Lógica con validación de tiempo y día diferente:
-    - Si no hay entrada del mismo día: registra ENTRADA (es_valida=None)
-    - Si hay entrada del mismo día: ERROR "Ya registraste entrada hoy"
-    - Si hay entrada de día anterior sin salida válida:
-        * Valida tiempo transcurrido
-        * Si < 5 minutos: ERROR "Debes permanecer al menos 5 minutos"
-        * Si > 10 horas: ERROR "Tiempo máximo excedido (10 horas)"
-        * Si 5min-10h: registra SALIDA (es_valida=True) y actualiza entrada
-    
-    Returns:
-        dict con información del registro: tipo, estudiante, timestamp, es_valida
+    La decisión (entrada, salida, muy pronto, expirada) y la escritura
+    se resuelven en una sola sentencia SQL.
+    Las repeticiones dentro de la ventana de antirrebote se contestan desde memoria.
     """
-    try:
-        # 1. Verificar que el estudiante existe
-        estudiante = session.get(Estudiante, matricula)
-        if not estudiante:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Estudiante con matrícula {matricula} no encontrado."
-            )
-        
-        # 2. Obtener el ciclo activo
-        ciclo_activo = session.exec(
-            select(CicloEscolar).where(CicloEscolar.activo == True)
-        ).first()
-        
-        if not ciclo_activo:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No hay un ciclo escolar activo. Por favor activa un ciclo."
-            )
-        
-        # 3. Obtener la hora actual en zona horaria de México
-        ahora = datetime.now(MEXICO_TZ)
-        hoy = ahora.date()
-        
-        # Convertir a naive para comparación con la base de datos
-        ahora_naive = ahora.replace(tzinfo=None)
-        
-        # 4. Buscar entrada del día de hoy EN EL CICLO ACTIVO
-        entrada_hoy = session.exec(
-            select(Asistencia)
-            .where(
-                Asistencia.matricula_estudiante == matricula,
-                Asistencia.id_ciclo == ciclo_activo.id,
-                Asistencia.tipo == "entrada",
-                func.date(Asistencia.timestamp) == hoy
-            )
-        ).first()
-        
-        # Si hay entrada de hoy, no permitir otra entrada ni salida del mismo día
-        if entrada_hoy:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Ya registraste tu entrada hoy. La salida debe ser en un día diferente."
-            )
-        
-        # 5. Buscar la última entrada pendiente (sin salida válida) de días anteriores EN EL CICLO ACTIVO
-        ultima_entrada = session.exec(
-            select(Asistencia)
-            .where(
-                Asistencia.matricula_estudiante == matricula,
-                Asistencia.id_ciclo == ciclo_activo.id,
-                Asistencia.tipo == "entrada",
-                Asistencia.es_valida == None,  # Entrada sin salida válida
-                func.date(Asistencia.timestamp) < hoy  # De un día anterior
-            )
-            .order_by(Asistencia.timestamp.desc())
-        ).first()
-        
-        # 5. Determinar si es entrada o salida
-        if not ultima_entrada:
-            # No hay entrada pendiente de día anterior -> NUEVA ENTRADA
-            tipo_registro = "entrada"
-            es_valida = None  # Pendiente de salida
-            entrada_relacionada_id = None
-            mensaje = f"Entrada registrada exitosamente. Recuerda registrar tu salida mañana (entre 5 minutos y 10 horas)."
-            
-            nueva_asistencia = Asistencia(
-                matricula_estudiante=matricula,
-                id_ciclo=ciclo_activo.id,
-                tipo=tipo_registro,
-                timestamp=ahora_naive,
-                es_valida=es_valida,
-                entrada_relacionada_id=entrada_relacionada_id
-            )
-            
-            session.add(nueva_asistencia)
-            session.commit()
-            session.refresh(nueva_asistencia)
-            
-        else:
-            # Hay entrada pendiente de día anterior -> Intentar registrar SALIDA
-            # Calcular tiempo transcurrido (ambos son naive)
-            tiempo_transcurrido = ahora_naive - ultima_entrada.timestamp
-            minutos_transcurridos = tiempo_transcurrido.total_seconds() / 60
-            horas_transcurridas = tiempo_transcurrido.total_seconds() / 3600
-            
-            # Validar rango de tiempo
-            if minutos_transcurridos < MINUTOS_MINIMOS:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Debes permanecer al menos {MINUTOS_MINIMOS} minutos antes de registrar tu salida. "
-                           f"Tiempo transcurrido: {int(minutos_transcurridos)} minutos."
-                )
-            
-            if horas_transcurridas > HORAS_MAXIMAS:
-                # Marcar entrada como inválida y permitir nueva entrada
-                ultima_entrada.es_valida = False
-                session.add(ultima_entrada)
-                session.commit()
-                
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Tiempo máximo excedido ({HORAS_MAXIMAS} horas). "
-                           f"Tu entrada anterior ha sido marcada como inválida. "
-                           f"Por favor registra una nueva entrada."
-                )
-            
-            # Rango válido (5min-10h) -> Registrar SALIDA
-            tipo_registro = "salida"
-            es_valida = True
-            entrada_relacionada_id = ultima_entrada.id
-            
-            # Calcular tiempo de permanencia legible
-            horas = int(horas_transcurridas)
-            minutos = int((horas_transcurridas % 1) * 60)
-            mensaje = f"Salida registrada exitosamente. Tiempo de permanencia: {horas} horas y {minutos} minutos."
-            
-            # Crear salida
-            nueva_asistencia = Asistencia(
-                matricula_estudiante=matricula,
-                id_ciclo=ciclo_activo.id,
-                tipo=tipo_registro,
-                timestamp=ahora_naive,
-                es_valida=es_valida,
-                entrada_relacionada_id=entrada_relacionada_id
-            )
-            
-            # Actualizar entrada como válida
-            ultima_entrada.es_valida = True
-            
-            session.add(nueva_asistencia)
-            session.add(ultima_entrada)
-            session.commit()
-            session.refresh(nueva_asistencia)
-        
-        # 6. Preparar respuesta con información completa
-        return {
-            "id": nueva_asistencia.id,
-            "tipo": tipo_registro,
-            "timestamp": nueva_asistencia.timestamp.isoformat(),
-            "es_valida": nueva_asistencia.es_valida,
-            "entrada_relacionada_id": nueva_asistencia.entrada_relacionada_id,
-            "estudiante": {
-                "matricula": estudiante.matricula,
-                "nombre": estudiante.nombre,
-                "apellido": estudiante.apellido,
-                "grupo": estudiante.grupo.nombre if estudiante.grupo else None
-            },
-            "mensaje": mensaje
-        }
-    except Exception as e:
-        print(f"ERROR en registrar_asistencia: {e}")
-        import traceback
-        traceback.print_exc()
-        raise e
+    claves = [antirrebote.clave_matricula(matricula)]
+    repetida = antirrebote.buscar(*claves)
+    if repetida:
+        return repetida.como_respuesta()
+
+    return antirrebote.ejecutar(claves, lambda: AsistenciaService(session).registrar(matricula))
 
 
 @router.post("/registrar-nfc", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -215,28 +55,116 @@ def registrar_asistencia_nfc(
 ):
     """
     Registra asistencia mediante tarjeta NFC.
-    Busca la matrícula asociada al NFC y llama a la lógica de registro.
+    Resuelve la tarjeta desde la caché en memoria y llama a la lógica de registro.
+
+    En modo asíncrono (ASISTENCIA_MODO_ASINCRONO) la lectura se encola y se
+    responde 202 con un resultado provisional; el resultado final se consulta
+    en /asistencia/escaneos/{scan_id}.
+
+    Las repeticiones de la misma tarjeta o del mismo estudiante dentro de la
+    ventana de antirrebote se contestan con la respuesta original, desde memoria.
     """
-    # 1. Buscar la tarjeta NFC
-    nfc = session.get(NFC, payload.nfc_uid)
-    if not nfc:
+    # 1. Repetición de la misma tarjeta: responder sin consultar nada
+    clave_uid = antirrebote.clave_uid(payload.nfc_uid)
+    repetida = antirrebote.buscar(clave_uid)
+    if repetida:
+        return repetida.como_respuesta()
+
+    # 2. Resolver la tarjeta NFC (sin consultas si ya está en caché)
+    tarjeta = nfc_cache.resolver_tarjeta(session, payload.nfc_uid)
+    if not tarjeta:
+        detalle = "Tarjeta NFC no reconocida o no vinculada."
+        antirrebote.guardar([clave_uid], status.HTTP_404_NOT_FOUND, {"detail": detalle})
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tarjeta NFC no reconocida o no vinculada."
+            detail=detalle
         )
-    
-    # 2. Llamar a la función de registro por matrícula
-    # Reutilizamos la lógica existente pasando la matrícula encontrada
-    return registrar_asistencia(matricula=nfc.matricula_estudiante, session=session)
+
+    # 3. Repetición del mismo estudiante (p.ej. desde otro lector)
+    claves = [clave_uid, antirrebote.clave_matricula(tarjeta.matricula)]
+    repetida = antirrebote.buscar(claves[1])
+    if repetida:
+        return repetida.como_respuesta()
+
+    def registrar():
+        # Modo asíncrono: encolar y responder sin esperar a la base de datos
+        if cola_asistencia.habilitado():
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=cola_asistencia.encolar(tarjeta)
+            )
+
+        # Registrar con los datos del estudiante ya resueltos
+        return AsistenciaService(session).registrar(tarjeta.matricula, tarjeta.estudiante_dict())
+
+    # 4. Registrar y guardar la respuesta para las repeticiones
+    return antirrebote.ejecutar(claves, registrar)
+
+
+@router.post("/registrar-nfc/batch", response_model=dict)
+def registrar_asistencia_nfc_lote(
+    payload: NfcBatchPayload,
+    session: Session = Depends(get_session)
+):
+    """
+    Registra un lote de lecturas NFC con la hora de cada dispositivo.
+    Las reglas de entrada/salida se aplican en orden de timestamp por estudiante
+    y todo el lote se escribe en una sola transacción.
+    Retorna un resultado por lectura (status 201/400/404) en el orden recibido.
+    """
+    return AsistenciaService(session).registrar_lote(payload.escaneos)
+
+
+@router.get("/escaneos/{scan_id}", response_model=dict)
+def obtener_estado_escaneo(
+    scan_id: str,
+    session: Session = Depends(get_session)
+):
+    """
+    Consulta el resultado final de una lectura registrada en modo asíncrono,
+    sin importar qué worker la recibió.
+    """
+    estado = cola_asistencia.consultar(session, scan_id)
+    if not estado:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Lectura {scan_id} no encontrada."
+        )
+    return estado
+
+
+@router.get("/metricas", response_model=dict)
+def obtener_metricas_registro():
+    """
+    Métricas del registro de asistencia: cola asíncrona (profundidad, retraso),
+    antirrebote de lecturas repetidas y caché de tarjetas NFC.
+    """
+    return {
+        "cola": cola_asistencia.metricas(),
+        "antirrebote": antirrebote.stats(),
+        "nfc_cache": nfc_cache.stats()
+    }
+
+
+@router.get("/presentes", response_model=dict)
+def obtener_presentes(session: Session = Depends(get_session)):
+    """
+    Conteo en vivo de estudiantes en el plantel (entrada sin salida dentro de
+    la ventana máxima), por grupo y turno. Se calcula sobre asistencia_abierta,
+    sin recorrer el historial.
+    """
+    return AsistenciaService(session).obtener_presentes()
 
 
 @router.get("/estudiante/{matricula}", response_model=List[AsistenciaRead])
 def obtener_historial_estudiante(
     matricula: str,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    pagina: Paginacion = Depends()
 ):
     """
     Obtiene el historial completo de asistencias de un estudiante.
+    Paginación opcional con `limit` y `after` (cursor en X-Next-Cursor).
     """
     # Verificar que el estudiante existe
     estudiante = session.get(Estudiante, matricula)
@@ -246,14 +174,13 @@ def obtener_historial_estudiante(
             detail=f"Estudiante con matrícula {matricula} no encontrado."
         )
     
-    # Obtener todas las asistencias del estudiante
-    asistencias = session.exec(
-        select(Asistencia)
-        .where(Asistencia.matricula_estudiante == matricula)
-        .order_by(Asistencia.timestamp.desc())
-    ).all()
-    
-    return asistencias
+    # Asistencias del estudiante, más recientes primero
+    statement = pagina.aplicar(
+        select(Asistencia).where(Asistencia.matricula_estudiante == matricula),
+        Asistencia.timestamp, Asistencia.id,
+        descendente=True
+    )
+    return pagina.recortar(session.exec(statement).all(), lambda a: (a.timestamp, a.id))
 
 
 @router.get("/hoy", response_model=List[dict])
@@ -265,156 +192,67 @@ def obtener_asistencias_hoy(session: Session = Depends(get_session)):
     # Obtener fecha de hoy en zona horaria de México
     hoy = datetime.now(MEXICO_TZ).date()
     
-    # Buscar todas las asistencias de hoy
-    asistencias = session.exec(
-        select(Asistencia)
-        .where(func.date(Asistencia.timestamp) == hoy)
-        .order_by(Asistencia.timestamp.desc())
-    ).all()
-    
-    # Enriquecer con información del estudiante
-    resultado = []
-    for asistencia in asistencias:
-        estudiante = session.get(Estudiante, asistencia.matricula_estudiante)
-        if estudiante:
-            resultado.append({
-                "id": asistencia.id,
-                "tipo": asistencia.tipo,
-                "timestamp": asistencia.timestamp.isoformat(),
-                "es_valida": asistencia.es_valida,
-                "entrada_relacionada_id": asistencia.entrada_relacionada_id,
-                "estudiante": {
-                    "matricula": estudiante.matricula,
-                    "nombre": estudiante.nombre,
-                    "apellido": estudiante.apellido,
-                    "grupo": estudiante.grupo.nombre if estudiante.grupo else None
-                }
-            })
-    
-    return resultado
+    # Una sola consulta con estudiante y grupo
+    return AsistenciaService(session).listar_registros(hoy, hoy)
 
 
 @router.get("/entradas", response_model=List[dict])
 def obtener_todas_entradas(
     fecha_inicio: str = None,
     fecha_fin: str = None,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    pagina: Paginacion = Depends()
 ):
     """
     Obtiene TODOS los registros de asistencias (entradas y salidas).
     Opcionalmente filtradas por rango de fechas.
     Incluye información del estudiante.
+    Paginación opcional con `limit` y `after` (cursor en X-Next-Cursor).
     """
-    # Construir query base - ahora incluye tanto entradas como salidas
-    query = select(Asistencia)
-    
-    # Aplicar filtros de fecha si se proporcionan
+    # Aplicar filtros de fecha si se proporcionan (fechas inválidas se ignoran)
+    fecha_inicio_dt = None
     if fecha_inicio:
         try:
             fecha_inicio_dt = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
-            query = query.where(func.date(Asistencia.timestamp) >= fecha_inicio_dt)
         except ValueError:
             pass
     
+    fecha_fin_dt = None
     if fecha_fin:
         try:
             fecha_fin_dt = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
-            query = query.where(func.date(Asistencia.timestamp) <= fecha_fin_dt)
         except ValueError:
             pass
     
-    # Ordenar por timestamp descendente
-    query = query.order_by(Asistencia.timestamp.desc())
-    
-    # Ejecutar query
-    registros = session.exec(query).all()
-    
-    # Enriquecer con información del estudiante
-    resultado = []
-    for registro in registros:
-        estudiante = session.get(Estudiante, registro.matricula_estudiante)
-        if estudiante:
-            resultado.append({
-                "id": registro.id,
-                "tipo": registro.tipo,
-                "timestamp": registro.timestamp.isoformat(),
-                "es_valida": registro.es_valida,
-                "entrada_relacionada_id": registro.entrada_relacionada_id,
-                "estudiante": {
-                    "matricula": estudiante.matricula,
-                    "nombre": estudiante.nombre,
-                    "apellido": estudiante.apellido,
-                    "grupo": estudiante.grupo.nombre if estudiante.grupo else None
-                }
-            })
-    
-    return resultado
+    # Una sola consulta con estudiante y grupo, sin importar cuántos registros haya
+    return AsistenciaService(session).listar_registros(fecha_inicio_dt, fecha_fin_dt, pagina)
+
 
+@router.get("/export")
+def exportar_asistencias(
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    fecha_inicio: Optional[date] = Query(None),
+    fecha_fin: Optional[date] = Query(None),
+    id_grupo: Optional[int] = Query(None),
+    id_ciclo: Optional[int] = Query(None)
+):
+    """
+    Exporta el historial de asistencias (entradas y salidas) como CSV o NDJSON.
+    Las filas se envían conforme se leen, sin cargar todo el resultado en memoria.
+    """
+    statement = exportacion.query_asistencias(fecha_inicio, fecha_fin, id_grupo, id_ciclo)
+    return exportacion.respuesta(statement, formato, "asistencias")
 
 
 @router.get("/estadisticas/hoy", response_model=dict)
 def obtener_estadisticas_hoy(session: Session = Depends(get_session)):
     """
     Obtiene estadísticas de asistencia del día actual.
-    Incluye asistencias válidas, inválidas y pendientes.
+    Incluye asistencias válidas, inválidas y pendientes, en total y
+    desglosadas por grupo y por turno (una sola consulta agregada).
     """
     hoy = datetime.now(MEXICO_TZ).date()
-    
-    # Contar entradas y salidas de hoy
-    total_entradas = session.exec(
-        select(func.count(Asistencia.id))
-        .where(
-            func.date(Asistencia.timestamp) == hoy,
-            Asistencia.tipo == "entrada"
-        )
-    ).one()
-    
-    total_salidas = session.exec(
-        select(func.count(Asistencia.id))
-        .where(
-            func.date(Asistencia.timestamp) == hoy,
-            Asistencia.tipo == "salida"
-        )
-    ).one()
-    
-    # Contar asistencias válidas (entrada + salida en rango 1-8h)
-    asistencias_validas = session.exec(
-        select(func.count(Asistencia.id))
-        .where(
-            func.date(Asistencia.timestamp) == hoy,
-            Asistencia.tipo == "salida",
-            Asistencia.es_valida == True
-        )
-    ).one()
-    
-    # Contar asistencias inválidas
-    asistencias_invalidas = session.exec(
-        select(func.count(Asistencia.id))
-        .where(
-            func.date(Asistencia.timestamp) == hoy,
-            Asistencia.es_valida == False
-        )
-    ).one()
-    
-    # Contar estudiantes con entrada sin salida (pendientes)
-    entradas_pendientes = session.exec(
-        select(func.count(Asistencia.id))
-        .where(
-            func.date(Asistencia.timestamp) == hoy,
-            Asistencia.tipo == "entrada",
-            Asistencia.es_valida == None
-        )
-    ).one()
-    
-    return {
-        "fecha": hoy.isoformat(),
-        "total_entradas": total_entradas,
-        "total_salidas": total_salidas,
-        "asistencias_validas": asistencias_validas,
-        "asistencias_invalidas": asistencias_invalidas,
-        "entradas_pendientes": entradas_pendientes,
-        "estudiantes_presentes": total_entradas - total_salidas
-    }
+    return AsistenciaService(session).obtener_estadisticas_dia(hoy)
 
 
 @router.get("/validas", response_model=List[dict])
@@ -430,47 +268,23 @@ def obtener_asistencias_validas(
     - fecha_inicio: Fecha de inicio en formato YYYY-MM-DD
     - fecha_fin: Fecha de fin en formato YYYY-MM-DD
     """
-    query = select(Asistencia).where(
-        Asistencia.tipo == "salida",
-        Asistencia.es_valida == True
-    )
-    
     # Filtrar por rango de fechas si se proporciona
-    if fecha_inicio:
-        fecha_inicio_dt = datetime.fromisoformat(fecha_inicio).date()
-        query = query.where(func.date(Asistencia.timestamp) >= fecha_inicio_dt)
+    fecha_inicio_dt = datetime.fromisoformat(fecha_inicio).date() if fecha_inicio else None
+    fecha_fin_dt = datetime.fromisoformat(fecha_fin).date() if fecha_fin else None
     
-    if fecha_fin:
-        fecha_fin_dt = datetime.fromisoformat(fecha_fin).date()
-        query = query.where(func.date(Asistencia.timestamp) <= fecha_fin_dt)
-    
-    asistencias_validas = session.exec(query.order_by(Asistencia.timestamp.desc())).all()
-    
-    # Enriquecer con información del estudiante y entrada relacionada
-    resultado = []
-    for asistencia in asistencias_validas:
-        estudiante = session.get(Estudiante, asistencia.matricula_estudiante)
-        entrada = session.get(Asistencia, asistencia.entrada_relacionada_id) if asistencia.entrada_relacionada_id else None
-        
-        if estudiante:
-            tiempo_permanencia = None
-            if entrada:
-                tiempo_transcurrido = asistencia.timestamp - entrada.timestamp
-                horas = tiempo_transcurrido.total_seconds() / 3600
-                tiempo_permanencia = f"{int(horas)}h {int((horas % 1) * 60)}min"
-            
-            resultado.append({
-                "id": asistencia.id,
-                "fecha": asistencia.timestamp.date().isoformat(),
-                "hora_entrada": entrada.timestamp.time().isoformat() if entrada else None,
-                "hora_salida": asistencia.timestamp.time().isoformat(),
-                "tiempo_permanencia": tiempo_permanencia,
-                "estudiante": {
-                    "matricula": estudiante.matricula,
-                    "nombre": estudiante.nombre,
-                    "apellido": estudiante.apellido,
-                    "grupo": estudiante.grupo.nombre if estudiante.grupo else None
-                }
-            })
-    
-    return resultado
+    # Una sola consulta: salida ⋈ estudiante ⋈ grupo ⋈ entrada relacionada
+    return AsistenciaService(session).listar_validas(fecha_inicio_dt, fecha_fin_dt)
+
+
+@router.get("/permanencia", response_model=dict)
+def obtener_promedios_permanencia(
+    fecha_inicio: Optional[date] = Query(None),
+    fecha_fin: Optional[date] = Query(None),
+    id_ciclo: Optional[int] = Query(None),
+    session: Session = Depends(get_session)
+):
+    """
+    Permanencia promedio (en minutos) por grupo y por día de la semana.
+    Por defecto usa el ciclo activo.
+    """
+    return AsistenciaService(session).obtener_promedios_permanencia(fecha_inicio, fecha_fin, id_ciclo)
@@ -1,6 +1,7 @@
 # app/api/v1/ciclos.py
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import Session, select
 
 from app.db.database import get_session
@@ -8,10 +9,14 @@ from app.models import (
     CicloEscolar, 
     CicloEscolarCreate, 
     CicloEscolarRead, 
-    CicloEscolarUpdate
+    CicloEscolarUpdate,
+    DiaNoLaborableCreate,
+    DiaNoLaborableRead
 )
 from app.core.permissions import get_current_user
 from app.repositories.ciclo_repo import CicloRepository
+from app.repositories.dia_no_laborable_repo import DiaNoLaborableRepository
+from app.services import ciclo_activo as ciclo_activo_provider, calendario_escolar, dashboard_cache
 
 router = APIRouter(
     prefix="/ciclos",
@@ -45,6 +50,8 @@ def create_ciclo_escolar(
         )
     
     db_ciclo = repo.create(ciclo)
+    ciclo_activo_provider.invalidar()
+    dashboard_cache.invalidar()
     
     # Si el ciclo se creó como activo, actualizar todos los estudiantes
     if db_ciclo.activo:
@@ -55,6 +62,7 @@ def create_ciclo_escolar(
             session.add(estudiante)
         session.commit()
         session.refresh(db_ciclo)
+        dashboard_cache.invalidar()
     
     return db_ciclo
 
@@ -71,7 +79,7 @@ def get_todos_los_ciclos(
     repo = CicloRepository(session)
     
     if activo_solo:
-        ciclo = repo.get_activo()
+        ciclo = ciclo_activo_provider.obtener_ciclo_activo(session)
         return [ciclo] if ciclo else []
     
     return repo.get_all()
@@ -84,8 +92,7 @@ def get_ciclo_activo(
     """
     Obtiene el ciclo escolar activo.
     """
-    repo = CicloRepository(session)
-    ciclo_activo = repo.get_activo()
+    ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(session)
     
     if not ciclo_activo:
         raise HTTPException(
@@ -160,7 +167,11 @@ def update_ciclo_escolar(
             estudiante.id_ciclo = id_ciclo
             session.add(estudiante)
     
-    return repo.update(id_ciclo, ciclo_update)
+    db_ciclo = repo.update(id_ciclo, ciclo_update)
+    ciclo_activo_provider.invalidar()
+    dashboard_cache.invalidar()
+    calendario_escolar.invalidar(id_ciclo)
+    return db_ciclo
 
 @router.delete("/{id_ciclo}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_ciclo_escolar(
@@ -192,6 +203,9 @@ def delete_ciclo_escolar(
         )
     
     repo.delete(id_ciclo)
+    ciclo_activo_provider.invalidar()
+    dashboard_cache.invalidar()
+    calendario_escolar.invalidar(id_ciclo)
     return None
 
 @router.post("/{id_ciclo}/activar", response_model=CicloEscolarRead)
@@ -212,6 +226,7 @@ def activar_ciclo_escolar(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Ciclo escolar con ID {id_ciclo} no encontrado."
         )
+    ciclo_activo_provider.invalidar()
     
     # Actualizar todos los estudiantes al nuevo ciclo activo
     from app.models import Estudiante
@@ -222,5 +237,119 @@ def activar_ciclo_escolar(
     
     session.commit()
     session.refresh(db_ciclo)
+    dashboard_cache.invalidar()
+    
+    return db_ciclo
+
+# --- CALENDARIO ESCOLAR ---
+
+def _get_ciclo_or_404(session: Session, id_ciclo: int) -> CicloEscolar:
+    db_ciclo = CicloRepository(session).get_by_id(id_ciclo)
+    if not db_ciclo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ciclo escolar con ID {id_ciclo} no encontrado."
+        )
+    return db_ciclo
+
+@router.get("/{id_ciclo}/dias-no-laborables", response_model=List[DiaNoLaborableRead])
+def get_dias_no_laborables(
+    *,
+    session: Session = Depends(get_session),
+    id_ciclo: int
+):
+    """
+    Obtiene los días sin clases (festivos, vacaciones) de un ciclo escolar.
+    """
+    _get_ciclo_or_404(session, id_ciclo)
+    return DiaNoLaborableRepository(session).get_by_ciclo(id_ciclo)
+
+@router.post("/{id_ciclo}/dias-no-laborables", response_model=List[DiaNoLaborableRead], status_code=status.HTTP_201_CREATED)
+def create_dias_no_laborables(
+    *,
+    session: Session = Depends(get_session),
+    id_ciclo: int,
+    dia: DiaNoLaborableCreate
+):
+    """
+    Registra un día sin clases, o un periodo completo si se envía fecha_fin.
+    Las fechas ya registradas se omiten. Retorna los días no laborables del ciclo.
+    """
+    db_ciclo = _get_ciclo_or_404(session, id_ciclo)
+    fecha_fin = dia.fecha_fin or dia.fecha
+    
+    if fecha_fin < dia.fecha:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha de inicio debe ser anterior a la fecha de fin."
+        )
+    
+    if dia.fecha < db_ciclo.fecha_inicio or fecha_fin > db_ciclo.fecha_fin:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Las fechas deben estar dentro del ciclo escolar."
+        )
+    
+    fechas = [dia.fecha + timedelta(days=i) for i in range((fecha_fin - dia.fecha).days + 1)]
+    repo = DiaNoLaborableRepository(session)
+    repo.create_many(id_ciclo, fechas, dia.descripcion)
+    calendario_escolar.invalidar(id_ciclo)
+    dashboard_cache.invalidar()
+    
+    return repo.get_by_ciclo(id_ciclo)
+
+@router.delete("/{id_ciclo}/dias-no-laborables/{id_dia}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_dia_no_laborable(
+    *,
+    session: Session = Depends(get_session),
+    id_ciclo: int,
+    id_dia: int
+):
+    """
+    Elimina un día sin clases del ciclo escolar.
+    """
+    repo = DiaNoLaborableRepository(session)
+    db_dia = repo.get_by_id(id_dia)
+    
+    if not db_dia or db_dia.id_ciclo != id_ciclo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Día no laborable con ID {id_dia} no encontrado en el ciclo {id_ciclo}."
+        )
+    
+    repo.delete(id_dia)
+    calendario_escolar.invalidar(id_ciclo)
+    dashboard_cache.invalidar()
+    return None
+
+@router.get("/{id_ciclo}/calendario", response_model=dict)
+def get_calendario_ciclo(
+    *,
+    session: Session = Depends(get_session),
+    id_ciclo: int,
+    fecha_inicio: Optional[date] = Query(None, description="Fecha de inicio (por defecto, inicio del ciclo)"),
+    fecha_fin: Optional[date] = Query(None, description="Fecha de fin (por defecto, fin del ciclo)")
+):
+    """
+    Obtiene los días hábiles del ciclo en un rango: Lunes a Viernes
+    dentro del ciclo, sin días no laborables.
+    """
+    calendario = calendario_escolar.obtener_calendario(session, id_ciclo)
+    if not calendario:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ciclo escolar con ID {id_ciclo} no encontrado."
+        )
+    
+    inicio = fecha_inicio or calendario.fecha_inicio
+    fin = fecha_fin or calendario.fecha_fin
+    dias_habiles = calendario.dias_habiles(inicio, fin)
     
-    return db_ciclo
\ No newline at end of file
+    return {
+        "id_ciclo": id_ciclo,
+        "fecha_inicio": inicio.isoformat(),
+        "fecha_fin": fin.isoformat(),
+        "total_dias_habiles": len(dias_habiles),
+        "dias_no_laborables": sorted(f.isoformat() for f in calendario.no_laborables if inicio <= f <= fin),
+        "dias_habiles": [d.isoformat() for d in dias_habiles]
+    }
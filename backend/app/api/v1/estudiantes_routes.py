@@ -9,6 +9,7 @@ from sqlalchemy.orm import selectinload
 
 from app.db.database import get_session
 from app.core.permissions import get_current_user
+from app.core.pagination import Paginacion
 from app.models import ( 
     Estudiante, 
     EstudianteCreate, 
@@ -21,6 +22,7 @@ from app.models import (
     EstudianteBulkMoveGrupo
 )
 from app.repositories.estudiante_repo import EstudianteRepository
+from app.services import nfc_cache, dashboard_cache
 
 router = APIRouter(
     prefix="/estudiantes",
@@ -64,18 +66,27 @@ def create_estudiante(
                 detail=f"El ciclo escolar con ID {estudiante.id_ciclo} no existe."
             )
     
-    return repo.create(estudiante)
+    db_estudiante = repo.create(estudiante)
+    dashboard_cache.invalidar()
+    return db_estudiante
 
 @router.get("", response_model=List[EstudianteReadComplete])
 def get_todos_los_estudiantes(
     *,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    pagina: Paginacion = Depends()
 ):
     """
     Obtiene todos los estudiantes con sus relaciones (grupo, ciclo, nfc).
+    Paginación opcional por matrícula con `limit` y `after` (cursor en X-Next-Cursor).
     """
     repo = EstudianteRepository(session)
-    return repo.get_all_complete()
+    cursor = pagina.cursor(str)
+    estudiantes = repo.get_all_complete(
+        limite=pagina.limite_consulta,
+        despues_de_matricula=cursor[0] if cursor else None
+    )
+    return pagina.recortar(estudiantes, lambda e: (e.matricula,))
 
 @router.get("/grupo/{id_grupo}", response_model=List[EstudianteReadComplete])
 def get_estudiantes_por_grupo(
@@ -173,7 +184,10 @@ def update_estudiante(
                 detail=f"El ciclo escolar con ID {estudiante_update.id_ciclo} no existe."
             )
     
-    return repo.update(matricula, estudiante_update)
+    db_estudiante = repo.update(matricula, estudiante_update)
+    nfc_cache.invalidar_matricula(matricula)
+    dashboard_cache.invalidar()
+    return db_estudiante
 
 @router.post("/upload-csv", summary="Cargar estudiantes desde un CSV")
 async def upload_estudiantes_csv(
@@ -258,6 +272,7 @@ async def upload_estudiantes_csv(
     try:
         session.add_all(estudiantes_a_crear)
         session.commit()
+        dashboard_cache.invalidar()
     except Exception as e:
         session.rollback()
         raise HTTPException(
@@ -297,6 +312,9 @@ def move_estudiantes_de_grupo(
     repo = EstudianteRepository(session)
     try:
         rowcount = repo.bulk_move_grupo(payload.matriculas, payload.nuevo_id_grupo)
+        for matricula in payload.matriculas:
+            nfc_cache.invalidar_matricula(matricula)
+        dashboard_cache.invalidar()
         
         return {
             "mensaje": "Estudiantes movidos exitosamente.",
@@ -326,5 +344,7 @@ def delete_estudiante(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Estudiante con matrícula '{matricula}' no encontrado."
         )
+    nfc_cache.invalidar_matricula(matricula)
+    dashboard_cache.invalidar()
     
     return None
\ No newline at end of file
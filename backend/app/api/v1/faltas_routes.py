@@ -11,9 +11,13 @@ from app.models import (
     FaltaRead, 
     FaltaUpdate,
     Estudiante,
-    CicloEscolar
+    CicloEscolar,
+    CorteFaltasJobRead,
+    CorteFaltasCicloRead
 )
 from app.core.security import get_current_user
+from app.core.pagination import Paginacion
+from app.services import ciclo_activo as ciclo_activo_provider, calendario_escolar, corte_incremental, cortes_faltas, exportacion
 
 router = APIRouter(
     prefix="/faltas",
@@ -85,10 +89,12 @@ def get_faltas(
     matricula_estudiante: Optional[str] = Query(None),
     id_ciclo: Optional[int] = Query(None),
     fecha: Optional[date] = Query(None),
-    estado: Optional[str] = Query(None)
+    estado: Optional[str] = Query(None),
+    pagina: Paginacion = Depends()
 ):
     """
     Obtiene faltas con filtros opcionales.
+    Paginación opcional con `limit` y `after` (cursor en X-Next-Cursor).
     """
     statement = select(Falta)
     
@@ -104,9 +110,8 @@ def get_faltas(
     if estado:
         statement = statement.where(Falta.estado == estado)
     
-    statement = statement.order_by(Falta.fecha.desc())
-    faltas = session.exec(statement).all()
-    return faltas
+    statement = pagina.aplicar(statement, Falta.fecha, Falta.id, descendente=True)
+    return pagina.recortar(session.exec(statement).all(), lambda f: (f.fecha, f.id))
 
 @router.get("/estudiante/{matricula}", response_model=List[FaltaRead])
 def get_faltas_por_estudiante(
@@ -172,9 +177,7 @@ def get_estudiantes_con_faltas(
     
     # Si no se especifica ciclo_id, obtener el ciclo activo
     if not ciclo_id:
-        ciclo_activo = session.exec(
-            select(CicloEscolar).where(CicloEscolar.activo == True)
-        ).first()
+        ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(session)
         
         if not ciclo_activo:
             raise HTTPException(
@@ -255,6 +258,22 @@ def get_estudiantes_con_faltas(
     return resultado
 
 
+@router.get("/export")
+def exportar_faltas(
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    fecha_inicio: Optional[date] = Query(None),
+    fecha_fin: Optional[date] = Query(None),
+    id_grupo: Optional[int] = Query(None),
+    id_ciclo: Optional[int] = Query(None)
+):
+    """
+    Exporta el historial de faltas como CSV o NDJSON.
+    Las filas se envían conforme se leen, sin cargar todo el resultado en memoria.
+    """
+    statement = exportacion.query_faltas(fecha_inicio, fecha_fin, id_grupo, id_ciclo)
+    return exportacion.respuesta(statement, formato, "faltas")
+
+
 @router.get("/{id_falta}", response_model=FaltaRead)
 def get_falta_por_id(
     *,
@@ -380,22 +399,115 @@ def procesar_corte_faltas(
     return resultado
 
 
+@router.post("/corte/jobs", response_model=CorteFaltasJobRead, status_code=status.HTTP_202_ACCEPTED)
+def enviar_corte_faltas(
+    *,
+    session: Session = Depends(get_session),
+    usuario: str = Depends(get_current_user),
+    fecha_inicio: date = Query(..., description="Fecha de inicio del corte"),
+    fecha_fin: date = Query(..., description="Fecha de fin del corte"),
+    ciclo_id: int = Query(..., description="ID del ciclo escolar"),
+    matricula_estudiante: Optional[str] = Query(None, description="Matrícula específica (opcional)")
+):
+    """
+    Encola el corte de faltas para procesarlo en segundo plano por lotes de estudiantes.
+    
+    Cada lote se confirma con su punto de control: el corte se puede consultar
+    en /faltas/corte/{job_id}, cancelar y reanudar (también tras un reinicio).
+    """
+    return cortes_faltas.enviar(
+        session,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        ciclo_id=ciclo_id,
+        matricula_estudiante=matricula_estudiante,
+        usuario=usuario
+    )
+
+
+@router.get("/corte/jobs", response_model=List[CorteFaltasJobRead])
+def listar_cortes_faltas(
+    *,
+    session: Session = Depends(get_session),
+    limite: int = Query(50, ge=1, le=500, description="Número de cortes a listar")
+):
+    """Lista los cortes en segundo plano más recientes"""
+    return cortes_faltas.listar(session, limite)
+
+
+@router.post("/corte/incremental", response_model=dict)
+def procesar_corte_incremental(
+    *,
+    session: Session = Depends(get_session),
+    ciclo_id: Optional[int] = Query(None, description="ID del ciclo escolar (por defecto el activo)"),
+    hasta: Optional[date] = Query(None, description="Último día a cortar (por defecto ayer)")
+):
+    """
+    Corta solo los días hábiles posteriores a la marca del ciclo y la avanza.
+    Pensado para ejecutarse cada noche (ver scripts/corte_faltas_incremental.py).
+    """
+    return corte_incremental.procesar(session, ciclo_id, hasta)
+
+
+@router.get("/corte/incremental", response_model=CorteFaltasCicloRead)
+def obtener_marca_corte(
+    *,
+    session: Session = Depends(get_session),
+    ciclo_id: Optional[int] = Query(None, description="ID del ciclo escolar (por defecto el activo)")
+):
+    """Hasta qué día está cortado el ciclo: las faltas hasta esa fecha son finales"""
+    return corte_incremental.obtener_marca(session, ciclo_id)
+
+
+@router.get("/corte/{job_id}", response_model=CorteFaltasJobRead)
+def consultar_corte_faltas(
+    *,
+    session: Session = Depends(get_session),
+    job_id: int,
+    incluir_detalles: bool = Query(False, description="Incluir faltas nuevas por estudiante")
+):
+    """Avance del corte: estado, progreso, tiempo restante estimado y faltas creadas hasta ahora"""
+    return cortes_faltas.a_lectura(cortes_faltas.obtener(session, job_id), incluir_detalles)
+
+
+@router.post("/corte/{job_id}/cancelar", response_model=CorteFaltasJobRead)
+def cancelar_corte_faltas(
+    *,
+    session: Session = Depends(get_session),
+    job_id: int
+):
+    """Cancela el corte; los lotes ya confirmados se conservan"""
+    return cortes_faltas.cancelar(session, job_id)
+
+
+@router.post("/corte/{job_id}/reanudar", response_model=CorteFaltasJobRead)
+def reanudar_corte_faltas(
+    *,
+    session: Session = Depends(get_session),
+    job_id: int
+):
+    """Reanuda un corte cancelado o con error desde su último lote confirmado"""
+    return cortes_faltas.reanudar(session, job_id)
+
+
 @router.get("/reporte-asistencias", response_model=List[dict])
 def obtener_reporte_asistencias(
     *,
     session: Session = Depends(get_session),
     fecha_inicio: date = Query(..., description="Fecha de inicio del reporte"),
     fecha_fin: date = Query(..., description="Fecha de fin del reporte"),
+    ciclo_id: Optional[int] = Query(None, description="ID del ciclo escolar (por defecto el activo)"),
     matricula_estudiante: Optional[str] = Query(None, description="Matrícula específica (opcional)")
 ):
     """
-    Genera reporte de asistencias para un periodo antes de hacer el corte.
-    
-    Muestra:
-    - Días hábiles del periodo
-    - Asistencias válidas (>= 10% permanencia)
-    - Asistencias menores al 10% (no cuentan)
-    - Faltas pendientes de registrar
+    Genera reporte de asistencias para un periodo antes de hacer el corte
+    (vista previa: no registra nada).
+    
+    Muestra por estudiante del ciclo:
+    - Días hábiles del periodo (calendario del ciclo)
+    - Asistencias válidas en días hábiles
+    - Faltas pendientes (días hábiles sin entrada válida), ya registradas y nuevas
+    - Fechas exactas de las faltas que crearía el corte
     - Porcentaje de asistencia
     """
     from app.services.falta_service import FaltaService
@@ -404,7 +516,8 @@ def obtener_reporte_asistencias(
     reporte = falta_service.obtener_reporte_asistencias_periodo(
         fecha_inicio=fecha_inicio,
         fecha_fin=fecha_fin,
-        matricula_estudiante=matricula_estudiante
+        matricula_estudiante=matricula_estudiante,
+        ciclo_id=ciclo_id
     )
     
     return reporte
@@ -413,16 +526,17 @@ def obtener_reporte_asistencias(
 @router.get("/dias-habiles", response_model=dict)
 def obtener_dias_habiles(
     *,
+    session: Session = Depends(get_session),
     fecha_inicio: date = Query(..., description="Fecha de inicio"),
-    fecha_fin: date = Query(..., description="Fecha de fin")
+    fecha_fin: date = Query(..., description="Fecha de fin"),
+    ciclo_id: Optional[int] = Query(None, description="ID del ciclo escolar (por defecto el activo)")
 ):
     """
-    Obtiene la lista de días hábiles (Lunes a Viernes) en un rango de fechas.
+    Obtiene la lista de días hábiles en un rango de fechas según el calendario
+    del ciclo: Lunes a Viernes dentro del ciclo, sin días no laborables.
     Útil para planificar cortes.
     """
-    from app.services.falta_service import FaltaService
-    
-    dias_habiles = FaltaService.obtener_dias_habiles_rango(fecha_inicio, fecha_fin)
+    dias_habiles = calendario_escolar.dias_habiles(session, fecha_inicio, fecha_fin, ciclo_id)
     
     return {
         "fecha_inicio": fecha_inicio.isoformat(),
@@ -430,5 +544,3 @@ def obtener_dias_habiles(
         "total_dias_habiles": len(dias_habiles),
         "dias_habiles": [dia.isoformat() for dia in dias_habiles]
     }
-
-
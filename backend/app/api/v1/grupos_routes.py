@@ -15,6 +15,7 @@ from app.models import (
 )
 from app.core.permissions import get_current_user
 from app.repositories.grupo_repo import GrupoRepository
+from app.services import nfc_cache, dashboard_cache
 
 # --- Router ---
 
@@ -44,7 +45,9 @@ def create_grupo(
         )
     
     try:
-        return repo.create(grupo)
+        db_grupo = repo.create(grupo)
+        dashboard_cache.invalidar()
+        return db_grupo
     except IntegrityError:
         session.rollback()
         raise HTTPException(
@@ -108,7 +111,11 @@ def update_grupo(
             )
 
     try:
-        return repo.update(id_grupo, grupo_update)
+        db_grupo = repo.update(id_grupo, grupo_update)
+        # El nombre del grupo viaja en la caché de tarjetas
+        nfc_cache.invalidar_todo()
+        dashboard_cache.invalidar()
+        return db_grupo
     except IntegrityError:
         session.rollback()
         raise HTTPException(
@@ -152,6 +159,7 @@ def delete_grupo(
     
     try:
         repo.delete(id_grupo)
+        dashboard_cache.invalidar()
     except Exception as e:
         session.rollback()
         raise HTTPException(
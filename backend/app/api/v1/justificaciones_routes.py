@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
 
 from app.db.database import get_session
+from app.core.pagination import Paginacion
 from app.models.justificacion import Justificacion, JustificacionCreate, JustificacionRead
 from app.repositories.justificacion_repo import JustificacionRepository
 from app.services.justificacion_service import JustificacionService
@@ -43,12 +44,14 @@ def crear_justificacion(
 @router.get("/", response_model=List[JustificacionRead])
 def obtener_todas_justificaciones(
     *,
-    service: JustificacionService = Depends(get_justificacion_service)
+    service: JustificacionService = Depends(get_justificacion_service),
+    pagina: Paginacion = Depends()
 ):
     """
     Obtiene todas las justificaciones del sistema.
+    Paginación opcional con `limit` y `after` (cursor en X-Next-Cursor).
     """
-    return service.obtener_todas_justificaciones()
+    return service.obtener_todas_justificaciones(pagina)
 
 
 @router.get("/{id_justificacion}", response_model=JustificacionRead)
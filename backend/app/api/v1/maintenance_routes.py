@@ -15,6 +15,7 @@ from app.core.config import settings
 from app.db.database import engine
 from sqlalchemy import text
 from app.core import timezone_manager
+from app.services import ciclo_activo, nfc_cache, dashboard_cache
 
 logger = logging.getLogger("siae.maintenance")
 
@@ -270,6 +271,12 @@ async def restore_backup(filename: str):
         )
         
         logger.info(f"Backup restored successfully: {filename}")
+        
+        # The restored data may differ from what this process has cached
+        ciclo_activo.invalidar()
+        nfc_cache.invalidar_todo()
+        dashboard_cache.invalidar()
+        
         return {"message": f"Database restored from {filename} successfully"}
         
     except subprocess.CalledProcessError as e:
@@ -11,6 +11,8 @@ from app.models import (
     Estudiante
 )
 from app.core.security import get_current_user
+from app.core.pagination import Paginacion
+from app.services import nfc_cache, antirrebote
 
 router = APIRouter(
     prefix="/nfc",
@@ -60,20 +62,24 @@ def create_nfc(
     session.add(db_nfc)
     session.commit()
     session.refresh(db_nfc)
+    nfc_cache.invalidar_uid(db_nfc.nfc_uid)
+    # Las lecturas previas de la tarjeta respondieron 404: no repetirlo desde el antirrebote
+    antirrebote.olvidar(antirrebote.clave_uid(db_nfc.nfc_uid))
     
     return db_nfc
 
 @router.get("", response_model=List[NFCRead])
 def get_all_nfc(
     *,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    pagina: Paginacion = Depends()
 ):
     """
     Obtiene todas las tarjetas NFC registradas.
+    Paginación opcional por matrícula con `limit` y `after` (cursor en X-Next-Cursor).
     """
-    statement = select(NFC).order_by(NFC.matricula_estudiante)
-    nfcs = session.exec(statement).all()
-    return nfcs
+    statement = pagina.aplicar(select(NFC), NFC.matricula_estudiante)
+    return pagina.recortar(session.exec(statement).all(), lambda n: (n.matricula_estudiante,))
 
 @router.get("/{nfc_uid}", response_model=NFCRead)
 def get_nfc_by_uid(
@@ -140,6 +146,7 @@ def delete_nfc(
     
     session.delete(db_nfc)
     session.commit()
+    nfc_cache.invalidar_uid(db_nfc.nfc_uid)
     
     return None
 
@@ -172,5 +179,6 @@ def delete_nfc_by_student(
     
     session.delete(db_nfc)
     session.commit()
+    nfc_cache.invalidar_uid(db_nfc.nfc_uid)
     
     return None
\ No newline at end of file
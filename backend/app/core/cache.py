@@ -0,0 +1,97 @@
+"""
+Caché en memoria acotada (LRU + TTL) para datos calientes del proceso.
+Cada worker de la API mantiene su propia copia; el TTL limita cuánto
+puede desfasarse un worker que no recibió la invalidación.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Mapa acotado con expiración por entrada y desalojo LRU.
+    Seguro para uso concurrente desde el threadpool de FastAPI.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_segundos: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_segundos = ttl_segundos
+        self._datos: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, clave: Hashable, default: Any = None) -> Any:
+        """Obtiene un valor si existe y no ha expirado"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return default
+
+            expira, valor = entrada
+            if expira and expira < time.monotonic():
+                del self._datos[clave]
+                self.misses += 1
+                return default
+
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    def set(self, clave: Hashable, valor: Any, ttl_segundos: Optional[float] = None) -> None:
+        """Guarda un valor, desalojando el menos usado si se excede el límite"""
+        ttl = ttl_segundos if ttl_segundos is not None else self.ttl_segundos
+        expira = time.monotonic() + ttl if ttl else 0.0
+
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entries:
+                self._datos.popitem(last=False)
+
+    def get_or_load(self, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        """Obtiene un valor o lo carga con `cargar` si no está (None no se guarda)"""
+        faltante = object()
+        valor = self.get(clave, faltante)
+        if valor is not faltante:
+            return valor
+
+        valor = cargar()
+        if valor is not None:
+            self.set(clave, valor)
+        return valor
+
+    def delete(self, clave: Hashable) -> None:
+        """Elimina una entrada si existe"""
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def delete_where(self, predicado: Callable[[Hashable, Any], bool]) -> int:
+        """Elimina las entradas que cumplen el predicado. Retorna cuántas se eliminaron"""
+        with self._lock:
+            claves = [c for c, (_, v) in self._datos.items() if predicado(c, v)]
+            for clave in claves:
+                del self._datos[clave]
+            return len(claves)
+
+    def clear(self) -> None:
+        """Vacía la caché"""
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def stats(self) -> dict:
+        """Estadísticas de uso de la caché"""
+        total = self.hits + self.misses
+        return {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -43,7 +43,62 @@ class Settings(BaseSettings):
     
     # Timezone
     TIMEZONE: str = "America/Mexico_City"
-    
+
+    # Caché de tarjetas NFC (por proceso)
+    NFC_CACHE_MAX_ENTRADAS: int = 10000
+    NFC_CACHE_TTL_SEGUNDOS: int = 300
+
+    # Caché del ciclo escolar activo (por proceso)
+    CICLO_ACTIVO_TTL_SEGUNDOS: int = 60
+
+    # Calendario escolar precalculado por ciclo (días hábiles y no laborables)
+    CALENDARIO_CACHE_MAX_CICLOS: int = 16
+    CALENDARIO_TTL_SEGUNDOS: int = 3600
+
+    # Caché de respuestas del dashboard (por proceso)
+    DASHBOARD_CACHE_MAX_ENTRADAS: int = 512
+    DASHBOARD_CACHE_TTL_SEGUNDOS: int = 30
+    DASHBOARD_CACHE_EDAD_MINIMA_SEGUNDOS: int = 5
+
+    # Dashboard en vivo (SSE sobre Postgres LISTEN/NOTIFY)
+    DASHBOARD_STREAM_CANAL: str = "siae_dashboard"
+    DASHBOARD_STREAM_LATIDO_SEGUNDOS: int = 15
+    DASHBOARD_STREAM_COLA_MAX: int = 1000
+    DASHBOARD_STREAM_RECONEXION_SEGUNDOS: int = 5
+
+    # Registro de asistencia por lotes (lectores NFC sin conexión)
+    ASISTENCIA_LOTE_MAX_ESCANEOS: int = 5000
+    ASISTENCIA_LOTE_TOLERANCIA_RELOJ_SEGUNDOS: int = 120  # Desfase aceptado hacia el futuro
+
+    # Modo asíncrono de registro NFC (cola en proceso + diario en disco)
+    ASISTENCIA_MODO_ASINCRONO: bool = False
+    ASISTENCIA_COLA_DIARIO: str = "data/cola_asistencia.jsonl"  # Un diario <nombre>.<pid>.jsonl por proceso
+    ASISTENCIA_COLA_DIARIO_MAX_BYTES: int = 5 * 1024 * 1024
+    ASISTENCIA_COLA_LOTE_MAX: int = 500
+    ASISTENCIA_COLA_ESPERA_SEGUNDOS: float = 0.5
+    ASISTENCIA_COLA_MAX_INTENTOS: int = 3  # Por lectura aislada antes de descartarla
+    ASISTENCIA_COLA_RESULTADOS_MAX: int = 50000
+    ASISTENCIA_COLA_RESULTADOS_TTL_SEGUNDOS: int = 3600
+    ASISTENCIA_ESCANEOS_RETENCION_DIAS: int = 30  # Resultados por scan_id (escaneo_procesado)
+
+    # Corte de faltas en segundo plano (estudiantes por lote con punto de control)
+    CORTE_LOTE_ESTUDIANTES: int = 200
+    CORTE_ESPERA_SEGUNDOS: float = 1.0
+    # Hilos (y conexiones) del corte de un ciclo completo; 1 lo procesa en serie.
+    # Debe ser menor que el pool de conexiones del engine (5 + 10 de desborde)
+    CORTE_PARALELISMO: int = 4
+
+    # Antirrebote de lecturas repetidas (0 lo desactiva)
+    ANTIRREBOTE_VENTANA_SEGUNDOS: int = 10
+    ANTIRREBOTE_MAX_ENTRADAS: int = 5000
+
+    # Paginación por cursor de listados (opcional: ?limit=&after=)
+    PAGINACION_LIMITE_DEFECTO: int = 100
+    PAGINACION_LIMITE_MAX: int = 1000
+
+    # Exportación en streaming (filas por bloque del cursor del servidor)
+    EXPORTACION_FILAS_POR_BLOQUE: int = 2000
+
     # CORS
     ALLOWED_ORIGINS: list[str] = [
         "http://localhost",
@@ -0,0 +1,155 @@
+"""
+Paginación por cursor (keyset) para listados grandes.
+
+Es opcional: sin `limit` ni `after` el listado se devuelve completo, como
+siempre. Con ellos se devuelve una página ordenada por una clave estable
+(p.ej. timestamp + id) y la siguiente se pide con `after`, que es el cursor
+recibido en la cabecera `X-Next-Cursor`. La página se obtiene con una
+comparación de fila `(clave) < (cursor)` que el índice resuelve directamente,
+así que su costo no crece con la profundidad (a diferencia de OFFSET).
+
+`Paginacion` es la dependencia de las rutas (lee la petición y escribe la
+cabecera). Los repositorios solo reciben valores simples (límite y valores
+del cursor ya decodificados) y arman la consulta con `paginar_consulta`.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, List, Optional
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import literal, tuple_
+
+from app.core.config import settings
+
+
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(valores: Iterable[Any]) -> str:
+    """Cursor opaco (base64 url-safe de una lista JSON) con los valores de la clave"""
+    datos = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores]
+    crudo = json.dumps(datos, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def _tipo_python(columna) -> type:
+    """Tipo Python de la columna; los TypeDecorator (UTCDateTime, AutoString) se resuelven por su tipo base"""
+    tipo = columna.type
+    tipo = getattr(tipo, "impl_instance", None) or getattr(tipo, "impl", tipo)
+    return tipo.python_type
+
+
+def decodificar_cursor(cursor: str, tipos: List[type]) -> List[Any]:
+    """Valores de la clave contenidos en el cursor, convertidos a los tipos Python de la clave"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(datos, list) or len(datos) != len(tipos):
+            raise ValueError("Número de valores incorrecto")
+
+        valores = []
+        for valor, tipo in zip(datos, tipos):
+            if tipo is datetime:
+                valores.append(datetime.fromisoformat(valor))
+            elif tipo is date:
+                valores.append(date.fromisoformat(valor))
+            else:
+                valores.append(tipo(valor))
+        return valores
+    except (ValueError, TypeError, NotImplementedError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido."
+        )
+
+
+def paginar_consulta(
+    statement,
+    columnas: List[Any],
+    despues_de: Optional[List[Any]] = None,
+    limite: Optional[int] = None,
+    descendente: bool = False
+):
+    """
+    Ordena por la clave `columnas`, continúa después de los valores
+    `despues_de` (comparación de fila) y limita a `limite` filas.
+    """
+    orden = [c.desc() if descendente else c.asc() for c in columnas]
+    statement = statement.order_by(*orden)
+    if despues_de is not None:
+        clave = tuple_(*columnas)
+        cursor = tuple_(*[literal(v, c.type) for v, c in zip(despues_de, columnas)])
+        statement = statement.where(clave < cursor if descendente else clave > cursor)
+    if limite is not None:
+        statement = statement.limit(limite)
+    return statement
+
+
+class Paginacion:
+    """
+    Parámetros de paginación de un listado. Se usa como dependencia:
+    `pagina: Paginacion = Depends()`; al recortar la página escribe el
+    cursor siguiente en la cabecera de la respuesta.
+    """
+
+    def __init__(
+        self,
+        response: Response,
+        limit: Optional[int] = Query(
+            None, ge=1, le=settings.PAGINACION_LIMITE_MAX,
+            description="Tamaño de página. Sin limit ni after se devuelve el listado completo."
+        ),
+        after: Optional[str] = Query(
+            None, description="Cursor de la página anterior (cabecera X-Next-Cursor)."
+        )
+    ):
+        self.response = response
+        self.limit = limit
+        self.after = after
+        self.siguiente: Optional[str] = None
+
+    @property
+    def activa(self) -> bool:
+        return self.limit is not None or self.after is not None
+
+    @property
+    def tamano(self) -> int:
+        return self.limit or settings.PAGINACION_LIMITE_DEFECTO
+
+    @property
+    def limite_consulta(self) -> Optional[int]:
+        """Filas a consultar: la página y una de más para saber si hay otra (None sin paginar)"""
+        return self.tamano + 1 if self.activa else None
+
+    def cursor(self, *tipos: type) -> Optional[List[Any]]:
+        """Valores de la clave en el cursor `after`, convertidos a `tipos` (None si no hay cursor)"""
+        return decodificar_cursor(self.after, list(tipos)) if self.after else None
+
+    def aplicar(self, statement, *columnas, descendente: bool = False):
+        """
+        Ordena por la clave y, si la paginación está activa, busca a partir
+        del cursor y pide una fila de más para saber si hay otra página.
+        """
+        return paginar_consulta(
+            statement,
+            list(columnas),
+            self.cursor(*[_tipo_python(c) for c in columnas]),
+            self.limite_consulta,
+            descendente
+        )
+
+    def recortar(self, filas: Iterable[Any], clave: Callable[[Any], Iterable[Any]]) -> List[Any]:
+        """
+        Deja solo la página pedida y publica el cursor de la siguiente.
+        `clave` extrae de una fila los mismos valores usados en `aplicar`.
+        """
+        filas = list(filas)
+        if not self.activa or len(filas) <= self.tamano:
+            return filas
+
+        filas = filas[:self.tamano]
+        self.siguiente = codificar_cursor(clave(filas[-1]))
+        if self.response is not None:
+            self.response.headers[CABECERA_CURSOR] = self.siguiente
+        return filas
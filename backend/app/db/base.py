@@ -7,24 +7,36 @@ from sqlmodel import SQLModel
 
 # Importar todos los modelos para registrarlos en SQLModel.metadata
 from app.models.ciclo_escolar import CicloEscolar
+from app.models.dia_no_laborable import DiaNoLaborable
 from app.models.grupo import Grupo
 from app.models.usuario import Usuario
 from app.models.estudiante import Estudiante
 from app.models.nfc import NFC
 from app.models.asistencia import Asistencia
+from app.models.asistencia_abierta import AsistenciaAbierta
+from app.models.asistencia_diaria import AsistenciaDiaria
+from app.models.escaneo_procesado import EscaneoProcesado
 from app.models.alerta import Alerta
 from app.models.falta import Falta
+from app.models.corte_faltas_job import CorteFaltasJob
+from app.models.corte_faltas_ciclo import CorteFaltasCiclo
 from app.models.acceso import Acceso
 
 # Esta variable no se usa directamente, pero asegura que todos los modelos estén importados
 __all__ = [
     "CicloEscolar",
+    "DiaNoLaborable",
     "Grupo",
     "Usuario",
     "Estudiante",
     "NFC",
     "Asistencia",
+    "AsistenciaAbierta",
+    "AsistenciaDiaria",
+    "EscaneoProcesado",
     "Alerta",
     "Falta",
+    "CorteFaltasJob",
+    "CorteFaltasCiclo",
     "Acceso",
 ]
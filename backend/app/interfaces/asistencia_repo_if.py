@@ -0,0 +1,127 @@
+# app/interfaces/asistencia_repo_if.py
+"""
+Interface para el repositorio de Asistencias.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import date, datetime
+from app.models import Asistencia
+
+
+class IAsistenciaRepository(ABC):
+    """Contrato para operaciones de Asistencia"""
+
+    @abstractmethod
+    def registrar_marca(
+        self,
+        matricula: str,
+        id_ciclo: int,
+        ahora: datetime,
+        hoy: date,
+        limite_min: datetime,
+        limite_max: datetime
+    ) -> Any:
+        """
+        Decide y escribe una marca (entrada/salida) en una sola sentencia.
+        Retorna la fila con la decisión tomada y el registro creado.
+        """
+        pass
+
+    @abstractmethod
+    def reclamar_escaneos(self, claves: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Registra las lecturas (scan_id, nfc_uid) del lote y retorna las que eran nuevas"""
+        pass
+
+    @abstractmethod
+    def get_resultados_escaneos(self, claves: List[Tuple[str, str]]) -> Dict[Tuple[str, str], dict]:
+        """Resultado guardado de cada lectura (scan_id, nfc_uid) ya registrada"""
+        pass
+
+    @abstractmethod
+    def get_resultado_escaneo(self, scan_id: str) -> Optional[dict]:
+        """Resultado guardado de una lectura por su scan_id"""
+        pass
+
+    @abstractmethod
+    def guardar_resultados_escaneos(self, resultados: Dict[Tuple[str, str], dict]) -> None:
+        """Guarda el resultado de cada lectura (scan_id, nfc_uid) en la transacción actual"""
+        pass
+
+    @abstractmethod
+    def purgar_escaneos(self, antes: datetime) -> int:
+        """Elimina los resultados de lecturas procesadas antes de `antes`"""
+        pass
+
+    @abstractmethod
+    def get_abiertas_para_lote(self, matriculas: List[str], id_ciclo: int) -> List[Any]:
+        """
+        Obtiene (bloqueando, igual que el registro individual) la sesión
+        abierta de cada estudiante del lote.
+        """
+        pass
+
+    @abstractmethod
+    def get_fechas_con_entrada(self, matriculas: List[str], id_ciclo: int, fecha_min: date) -> List[Any]:
+        """Pares (matricula_estudiante, fecha) con entrada desde `fecha_min`"""
+        pass
+
+    @abstractmethod
+    def get_ultimas_marcas(self, matriculas: List[str], id_ciclo: int) -> List[Any]:
+        """Pares (matricula_estudiante, timestamp) con la marca más reciente de cada estudiante en el ciclo"""
+        pass
+
+    @abstractmethod
+    def marcar_entradas(self, ids: List[int], es_valida: bool) -> None:
+        """Marca varias entradas como válidas o inválidas"""
+        pass
+
+    @abstractmethod
+    def crear_lote(self, asistencias: List[Asistencia]) -> None:
+        """Inserta varias asistencias en la transacción actual (sin commit)"""
+        pass
+
+    @abstractmethod
+    def sincronizar_abiertas(self, id_ciclo: int, abiertas: Dict[str, Optional[Tuple[int, datetime, date]]]) -> None:
+        """Actualiza asistencia_abierta con la entrada pendiente (o None) de cada matrícula"""
+        pass
+
+    @abstractmethod
+    def sincronizar_diaria(self, id_ciclo: int, dias: Dict[Tuple[str, date], Tuple[bool, Optional[int]]]) -> None:
+        """Escribe el resumen asistencia_diaria de cada (matrícula, fecha): (asistio, minutos)"""
+        pass
+
+    @abstractmethod
+    def contar_abiertas_por_grupo(self, id_ciclo: int, desde: datetime) -> List[Any]:
+        """Cuenta las sesiones abiertas desde `desde` agrupadas por grupo"""
+        pass
+
+    @abstractmethod
+    def contar_del_dia_por_grupo(self, fecha: date) -> List[Any]:
+        """Conteos de marcas del día (entradas, salidas, válidas, inválidas, pendientes) por grupo"""
+        pass
+
+    @abstractmethod
+    def get_con_estudiante(
+        self,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None,
+        limite: Optional[int] = None,
+        despues_de: Optional[Tuple[datetime, int]] = None
+    ) -> List[Any]:
+        """Registros (entradas y salidas) con datos del estudiante en una sola consulta, por (timestamp, id) descendente"""
+        pass
+
+    @abstractmethod
+    def get_validas_con_entrada(self, fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None) -> List[Any]:
+        """Salidas válidas con datos del estudiante y de su entrada en una sola consulta"""
+        pass
+
+    @abstractmethod
+    def promedios_permanencia_por_grupo(self, id_ciclo: int, fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None) -> List[Any]:
+        """Permanencia promedio (minutos) de las salidas válidas por grupo"""
+        pass
+
+    @abstractmethod
+    def promedios_permanencia_por_dia(self, id_ciclo: int, fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None) -> List[Any]:
+        """Permanencia promedio (minutos) de las salidas válidas por día de la semana (ISO, 1=lunes)"""
+        pass
@@ -0,0 +1,37 @@
+# app/interfaces/dia_no_laborable_repo_if.py
+"""
+Interface para repositorio de días no laborables.
+"""
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import List, Optional
+from app.models.dia_no_laborable import DiaNoLaborable
+
+
+class IDiaNoLaborableRepository(ABC):
+    """Contrato para operaciones de días sin clases por ciclo escolar"""
+
+    @abstractmethod
+    def get_by_ciclo(self, id_ciclo: int) -> List[DiaNoLaborable]:
+        """Obtiene los días no laborables de un ciclo, ordenados por fecha"""
+        pass
+
+    @abstractmethod
+    def get_fechas_by_ciclo(self, id_ciclo: int) -> List[date]:
+        """Obtiene solo las fechas no laborables de un ciclo"""
+        pass
+
+    @abstractmethod
+    def get_by_id(self, id_dia: int) -> Optional[DiaNoLaborable]:
+        """Obtiene un día no laborable por ID"""
+        pass
+
+    @abstractmethod
+    def create_many(self, id_ciclo: int, fechas: List[date], descripcion: str) -> int:
+        """Registra varias fechas; omite las ya registradas. Retorna cuántas se insertaron"""
+        pass
+
+    @abstractmethod
+    def delete(self, id_dia: int) -> bool:
+        """Elimina un día no laborable. Retorna True si fue eliminado"""
+        pass
@@ -15,8 +15,12 @@ class IEstudianteRepository(ABC):
         pass
     
     @abstractmethod
-    def get_all_complete(self) -> List[Estudiante]:
-        """Obtiene todos los estudiantes con relaciones (grupo, ciclo, nfc)"""
+    def get_all_complete(
+        self,
+        limite: Optional[int] = None,
+        despues_de_matricula: Optional[str] = None
+    ) -> List[Estudiante]:
+        """Obtiene todos los estudiantes con relaciones (grupo, ciclo, nfc), por matrícula"""
         pass
     
     @abstractmethod
@@ -3,7 +3,7 @@
 Interface para el repositorio de Faltas.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import date
 from app.models import Falta, FaltaCreate, FaltaUpdate
 
@@ -66,3 +66,13 @@ class IFaltaRepository(ABC):
     def delete(self, id_falta: int) -> bool:
         """Elimina una falta. Retorna True si existía"""
         pass
+    
+    @abstractmethod
+    def crear_faltas_de_corte(
+        self,
+        id_ciclo: int,
+        dias_habiles: List[date],
+        matriculas: Optional[List[str]] = None
+    ) -> List[Any]:
+        """Inserta en bloque las faltas de los días hábiles sin entrada válida"""
+        pass
@@ -3,7 +3,8 @@
 Interfaz para el repositorio de Justificaciones.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from app.models.justificacion import Justificacion, JustificacionCreate
 
 
@@ -11,8 +12,12 @@ class IJustificacionRepository(ABC):
     """Interfaz para operaciones CRUD de justificaciones"""
     
     @abstractmethod
-    def get_all(self) -> List[Justificacion]:
-        """Obtiene todas las justificaciones"""
+    def get_all(
+        self,
+        limite: Optional[int] = None,
+        despues_de: Optional[Tuple[datetime, int]] = None
+    ) -> List[Justificacion]:
+        """Obtiene todas las justificaciones (más recientes primero)"""
         pass
     
     @abstractmethod
@@ -110,8 +110,53 @@ async def lifespan(app: FastAPI):
                 
     except Exception as e:
         api_logger.error(f"Error al inicializar datos: {e}")
-        
+
+    # Calentar la caché de tarjetas NFC para la primera ola de lecturas
+    from app.services import nfc_cache
+    try:
+        with Session(engine) as session:
+            total_tarjetas = nfc_cache.precargar(session)
+            api_logger.info(f"Caché NFC precargada con {total_tarjetas} tarjetas")
+    except Exception as e:
+        api_logger.error(f"Error al precargar caché NFC: {e}")
+
+    # Resultados de lecturas por scan_id: conservar solo los recientes
+    from app.services.asistencia_service import AsistenciaService
+    try:
+        with Session(engine) as session:
+            purgados = AsistenciaService(session).purgar_resultados_escaneos()
+            if purgados:
+                api_logger.info(f"Resultados de lecturas purgados: {purgados}")
+    except Exception as e:
+        api_logger.error(f"Error al purgar resultados de lecturas: {e}")
+
+    # Modo asíncrono de asistencia: reprocesar el diario y arrancar el worker
+    from app.services import cola_asistencia
+    if cola_asistencia.habilitado():
+        recuperadas = cola_asistencia.iniciar()
+        api_logger.info(f"Cola de asistencia iniciada ({recuperadas} lecturas recuperadas del diario)")
+
+    # Cortes de faltas en segundo plano: reanudar los interrumpidos
+    from app.services import cortes_faltas
+    try:
+        reanudados = cortes_faltas.iniciar()
+        if reanudados:
+            api_logger.info(f"Cortes de faltas reanudados: {reanudados}")
+    except Exception as e:
+        api_logger.error(f"No se pudieron reanudar los cortes de faltas: {e}")
+
     yield
+
+    if cola_asistencia.habilitado():
+        cola_asistencia.detener()
+
+    cortes_faltas.detener()
+
+    from app.services import corte_paralelo
+    corte_paralelo.detener()
+
+    from app.services import eventos_dashboard
+    eventos_dashboard.detener()
     api_logger.info("=== Apagando SIAE API ===")
 
 
@@ -131,6 +176,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # --- Middleware de Logging ---
@@ -3,13 +3,19 @@
 Módulo de modelos de base de datos y DTOs.
 """
 from app.models.ciclo_escolar import CicloEscolar, CicloEscolarCreate, CicloEscolarRead, CicloEscolarUpdate
+from app.models.dia_no_laborable import DiaNoLaborable, DiaNoLaborableCreate, DiaNoLaborableRead
 from app.models.grupo import Grupo, GrupoCreate, GrupoRead, GrupoUpdate
 from app.models.usuario import Usuario
 from app.models.estudiante import Estudiante, EstudianteCreate, EstudianteRead, EstudianteUpdate, EstudianteBulkMoveGrupo
-from app.models.nfc import NFC, NFCCreate, NFCRead, NfcPayload
+from app.models.nfc import NFC, NFCCreate, NFCRead, NfcPayload, NfcScan, NfcBatchPayload
 from app.models.asistencia import Asistencia, AsistenciaCreate, AsistenciaRead
+from app.models.asistencia_abierta import AsistenciaAbierta
+from app.models.asistencia_diaria import AsistenciaDiaria
+from app.models.escaneo_procesado import EscaneoProcesado
 from app.models.alerta import Alerta, AlertaCreate, AlertaRead, AlertaUpdate, AlertaHistorial, AlertaHistorialRead
 from app.models.falta import Falta, FaltaCreate, FaltaRead, FaltaUpdate
+from app.models.corte_faltas_job import CorteFaltasJob, CorteFaltasJobRead
+from app.models.corte_faltas_ciclo import CorteFaltasCiclo, CorteFaltasCicloRead
 from app.models.justificacion import Justificacion, JustificacionCreate, JustificacionRead
 from app.models.auth import Token, TokenData, UserRead, UserReadWithPermissions, AdminUserCreate, UserPermissionsUpdate, UserUpdate, UserPermissionData
 from app.models.dashboard import StatsData, TurnoDataResponse, GrupoAsistenciaResponse
@@ -19,18 +25,27 @@ from app.models.estudiante_complete import EstudianteReadComplete
 __all__ = [
     # Modelos de tablas
     "CicloEscolar",
+    "DiaNoLaborable",
     "Grupo",
     "Usuario",
     "Estudiante",
     "NFC",
     "Asistencia",
+    "AsistenciaAbierta",
+    "AsistenciaDiaria",
+    "EscaneoProcesado",
     "Alerta",
     "Falta",
+    "CorteFaltasJob",
+    "CorteFaltasCiclo",
     "Justificacion",
     # DTOs Ciclo
     "CicloEscolarCreate",
     "CicloEscolarRead",
     "CicloEscolarUpdate",
+    # DTOs DiaNoLaborable
+    "DiaNoLaborableCreate",
+    "DiaNoLaborableRead",
     # DTOs Grupo
     "GrupoCreate",
     "GrupoRead",
@@ -45,6 +60,8 @@ __all__ = [
     "NFCCreate",
     "NFCRead",
     "NfcPayload",
+    "NfcScan",
+    "NfcBatchPayload",
     # DTOs Asistencia
     "AsistenciaCreate",
     "AsistenciaRead",
@@ -58,6 +75,8 @@ __all__ = [
     "FaltaCreate",
     "FaltaRead",
     "FaltaUpdate",
+    "CorteFaltasJobRead",
+    "CorteFaltasCicloRead",
     # DTOs Justificacion
     "JustificacionCreate",
     "JustificacionRead",
@@ -3,18 +3,27 @@
 Modelo de Acceso: registro de accesos mediante tarjetas NFC.
 """
 from typing import Optional
-from datetime import datetime
-from sqlmodel import Field, SQLModel, Relationship
-from app.models.utils import get_mexico_time
+from datetime import datetime, date
+from sqlmodel import Field, SQLModel, Relationship, Index
+from app.models.utils import get_mexico_time, get_mexico_date
 
 class Acceso(SQLModel, table=True):
     """Tabla de registros de acceso"""
     __tablename__ = "accesos"
     
+    # Índices sobre la fecha local persistida (evitan func.date(hora_registro) en los filtros)
+    __table_args__ = (
+        Index("ix_accesos_nfc_ciclo_fecha", "nfc_uid", "id_ciclo", "fecha"),
+        Index("ix_accesos_ciclo_fecha", "id_ciclo", "fecha"),
+        # Clave de la paginación por cursor de /acceso/ciclo/{id_ciclo}
+        Index("ix_accesos_ciclo_hora_id", "id_ciclo", "hora_registro", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     nfc_uid: str = Field(foreign_key="nfc.nfc_uid")
     id_ciclo: int = Field(foreign_key="ciclo_escolar.id")
     hora_registro: datetime = Field(default_factory=get_mexico_time)
+    fecha: date = Field(default_factory=get_mexico_date)  # Fecha local de hora_registro
     
     # Relaciones
     nfc: "NFC" = Relationship(back_populates="accesos")  # noqa: F821
@@ -3,23 +3,34 @@
 Modelo de Asistencia: registro de entradas y salidas con validación.
 """
 from typing import Optional
-from datetime import datetime
-from sqlmodel import Field, SQLModel, Relationship
-from app.models.utils import get_mexico_time
+from datetime import datetime, date
+from sqlmodel import Field, SQLModel, Relationship, Index
+from app.models.utils import get_mexico_time, get_mexico_date
 
 class Asistencia(SQLModel, table=True):
     """Tabla de asistencias (entrada/salida) con validación de rango 1-8 horas"""
     __tablename__ = "asistencias"
+    
+    # Índices sobre la fecha local persistida (evitan func.date(timestamp) en los filtros)
+    __table_args__ = (
+        Index("ix_asistencias_estudiante_ciclo_tipo_fecha", "matricula_estudiante", "id_ciclo", "tipo", "fecha"),
+        Index("ix_asistencias_fecha_tipo", "fecha", "tipo"),
+        # Claves de la paginación por cursor (timestamp, id)
+        Index("ix_asistencias_timestamp_id", "timestamp", "id"),
+        Index("ix_asistencias_estudiante_timestamp_id", "matricula_estudiante", "timestamp", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     matricula_estudiante: str = Field(foreign_key="estudiante.matricula")
     id_ciclo: int = Field(foreign_key="ciclo_escolar.id")  # Ciclo escolar al que pertenece
     tipo: str = Field(max_length=10)  # 'entrada' o 'salida'
     timestamp: datetime = Field(default_factory=get_mexico_time)
+    fecha: date = Field(default_factory=get_mexico_date)  # Fecha local del timestamp
     
     # Campos de validación
     es_valida: Optional[bool] = Field(default=None)  # True si cumple rango 1-8h, False si no, None si pendiente
     entrada_relacionada_id: Optional[int] = Field(default=None)  # ID de la entrada asociada (solo para salidas)
+    duracion_minutos: Optional[int] = Field(default=None)  # Minutos desde la entrada relacionada (solo para salidas)
 
     estudiante: "Estudiante" = Relationship(back_populates="asistencias")  # noqa: F821
     ciclo: "CicloEscolar" = Relationship()  # noqa: F821
@@ -38,3 +49,4 @@ class AsistenciaRead(SQLModel):
     timestamp: datetime
     es_valida: Optional[bool] = None
     entrada_relacionada_id: Optional[int] = None
+    duracion_minutos: Optional[int] = None
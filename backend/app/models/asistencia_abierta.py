@@ -0,0 +1,23 @@
+# app/models/asistencia_abierta.py
+"""
+Modelo de AsistenciaAbierta: entrada pendiente de salida por estudiante y ciclo.
+"""
+from datetime import datetime, date
+from sqlmodel import Field, SQLModel
+
+
+class AsistenciaAbierta(SQLModel, table=True):
+    """
+    Estado de sesión abierta: a lo más una fila por estudiante y ciclo con la
+    entrada que aún no tiene salida. La mantiene el registro de asistencia, así
+    decidir entre entrada y salida es una búsqueda por llave primaria.
+    """
+    __tablename__ = "asistencia_abierta"
+
+    matricula_estudiante: str = Field(
+        foreign_key="estudiante.matricula", primary_key=True, ondelete="CASCADE"
+    )
+    id_ciclo: int = Field(foreign_key="ciclo_escolar.id", primary_key=True, ondelete="CASCADE")
+    id_entrada: int = Field(foreign_key="asistencias.id", ondelete="CASCADE")
+    timestamp: datetime  # Hora de la entrada pendiente
+    fecha: date = Field(index=True)  # Fecha local de la entrada pendiente
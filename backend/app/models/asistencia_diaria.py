@@ -0,0 +1,29 @@
+# app/models/asistencia_diaria.py
+"""
+Modelo de AsistenciaDiaria: resumen de asistencia por estudiante, ciclo y día.
+"""
+from typing import Optional
+from datetime import date
+from sqlmodel import Field, SQLModel, Index
+
+
+class AsistenciaDiaria(SQLModel, table=True):
+    """
+    Una fila por estudiante, ciclo y día con entrada. La mantiene el registro
+    de asistencia al escribir cada marca, así los porcentajes por semana, mes
+    o ciclo son un conteo indexado en lugar de recorrer las marcas crudas.
+    Se reconstruye desde asistencias con scripts/crear_asistencia_diaria.py.
+    """
+    __tablename__ = "asistencia_diaria"
+
+    __table_args__ = (
+        Index("ix_asistencia_diaria_ciclo_fecha", "id_ciclo", "fecha"),
+    )
+
+    matricula_estudiante: str = Field(
+        foreign_key="estudiante.matricula", primary_key=True, ondelete="CASCADE"
+    )
+    id_ciclo: int = Field(foreign_key="ciclo_escolar.id", primary_key=True, ondelete="CASCADE")
+    fecha: date = Field(primary_key=True)  # Fecha local de la entrada
+    asistio: bool = Field(default=True)  # False si la entrada expiró sin salida válida
+    minutos: Optional[int] = Field(default=None)  # Permanencia, al registrar la salida
@@ -0,0 +1,30 @@
+# app/models/corte_faltas_ciclo.py
+"""
+Modelo de CorteFaltasCiclo: hasta qué día está cortado cada ciclo escolar.
+"""
+from typing import Optional
+from datetime import datetime, date
+from sqlmodel import Field, SQLModel
+from app.models.utils import get_mexico_time
+
+
+class CorteFaltasCiclo(SQLModel, table=True):
+    """
+    Marca del corte incremental por ciclo: los días hábiles hasta `corte_hasta`
+    (inclusive) ya tienen sus faltas registradas y se consideran finales.
+    """
+    __tablename__ = "corte_faltas_ciclo"
+
+    id_ciclo: int = Field(primary_key=True, foreign_key="ciclo_escolar.id", ondelete="CASCADE")
+    corte_hasta: Optional[date] = Field(default=None)
+    actualizado: datetime = Field(default_factory=get_mexico_time)
+
+
+# --- DTOs ---
+
+class CorteFaltasCicloRead(SQLModel):
+    """DTO para leer la marca del corte de un ciclo"""
+    id_ciclo: int
+    corte_hasta: Optional[date] = None
+    actualizado: Optional[datetime] = None
+    dias_finales: int  # Días hábiles del ciclo ya cortados
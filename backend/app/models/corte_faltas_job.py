@@ -0,0 +1,73 @@
+# app/models/corte_faltas_job.py
+"""
+Modelo de CorteFaltasJob: corte de faltas ejecutado en segundo plano por lotes.
+"""
+from typing import Optional, List, Dict, Any
+from datetime import datetime, date
+from sqlmodel import Field, SQLModel, Column, JSON, Index
+from app.models.utils import get_mexico_time
+
+
+ESTADOS_CORTE_JOB = ("pendiente", "en_proceso", "completado", "cancelado", "error")
+
+
+class CorteFaltasJob(SQLModel, table=True):
+    """
+    Tabla de trabajos de corte de faltas.
+    `ultima_matricula` es el punto de control: el lote siguiente empieza
+    después de esa matrícula, así un trabajo interrumpido se reanuda sin repetir lotes.
+    """
+    __tablename__ = "corte_faltas_job"
+
+    __table_args__ = (Index("ix_corte_faltas_job_estado", "estado"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    id_ciclo: int = Field(foreign_key="ciclo_escolar.id", ondelete="CASCADE")
+    fecha_inicio: date
+    fecha_fin: date
+    matricula_estudiante: Optional[str] = Field(default=None)  # Solo ese estudiante
+    estado: str = Field(default="pendiente", max_length=20)  # Ver ESTADOS_CORTE_JOB
+    usuario: Optional[str] = Field(default=None, max_length=50)
+
+    # Progreso
+    dias_habiles: int = Field(default=0)
+    total_estudiantes: int = Field(default=0)
+    total_lotes: int = Field(default=0)
+    lotes_completados: int = Field(default=0)
+    estudiantes_procesados: int = Field(default=0)
+    faltas_nuevas: int = Field(default=0)
+    ultima_matricula: Optional[str] = Field(default=None)
+    detalles: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSON))
+    error: Optional[str] = Field(default=None)
+
+    creado: datetime = Field(default_factory=get_mexico_time)
+    iniciado: Optional[datetime] = Field(default=None)
+    actualizado: Optional[datetime] = Field(default=None)
+    finalizado: Optional[datetime] = Field(default=None)
+
+
+# --- DTOs ---
+
+class CorteFaltasJobRead(SQLModel):
+    """DTO para consultar el avance de un corte en segundo plano"""
+    id: int
+    id_ciclo: int
+    fecha_inicio: date
+    fecha_fin: date
+    matricula_estudiante: Optional[str] = None
+    estado: str
+    usuario: Optional[str] = None
+    dias_habiles: int
+    total_estudiantes: int
+    total_lotes: int
+    lotes_completados: int
+    estudiantes_procesados: int
+    faltas_nuevas: int
+    progreso: float  # Porcentaje 0-100
+    eta_segundos: Optional[float] = None
+    error: Optional[str] = None
+    creado: datetime
+    iniciado: Optional[datetime] = None
+    actualizado: Optional[datetime] = None
+    finalizado: Optional[datetime] = None
+    detalles: Optional[List[Dict[str, Any]]] = None
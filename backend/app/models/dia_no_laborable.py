@@ -0,0 +1,39 @@
+# app/models/dia_no_laborable.py
+"""
+Modelo de DiaNoLaborable: días festivos y periodos sin clases de un ciclo escolar.
+"""
+from typing import Optional
+from datetime import date
+from sqlmodel import Field, SQLModel, UniqueConstraint
+
+
+class DiaNoLaborable(SQLModel, table=True):
+    """Tabla de días sin clases (festivos, vacaciones) por ciclo escolar"""
+    __tablename__ = "dia_no_laborable"
+
+    __table_args__ = (UniqueConstraint("id_ciclo", "fecha", name="unique_ciclo_fecha_no_laborable"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    id_ciclo: int = Field(foreign_key="ciclo_escolar.id", ondelete="CASCADE")
+    fecha: date
+    descripcion: str = Field(max_length=200)  # p.ej. "Día de la Independencia", "Vacaciones de invierno"
+
+
+# --- DTOs ---
+
+class DiaNoLaborableCreate(SQLModel):
+    """
+    DTO para registrar días sin clases.
+    Con fecha_fin se registra el periodo completo (p.ej. vacaciones).
+    """
+    fecha: date
+    fecha_fin: Optional[date] = None
+    descripcion: str
+
+
+class DiaNoLaborableRead(SQLModel):
+    """DTO para leer un día sin clases"""
+    id: int
+    id_ciclo: int
+    fecha: date
+    descripcion: str
@@ -0,0 +1,24 @@
+# app/models/escaneo_procesado.py
+"""
+Modelo de EscaneoProcesado: resultado de cada lectura NFC con identificador.
+"""
+from typing import Optional, Dict, Any
+from datetime import datetime
+from sqlmodel import Field, SQLModel, Column, JSON
+from app.models.utils import get_mexico_time
+
+
+class EscaneoProcesado(SQLModel, table=True):
+    """
+    Una fila por lectura con scan_id registrada por el motor de lotes. Se
+    escribe en la misma transacción que las marcas, así una lectura repetida
+    (reproceso del diario de la cola o reenvío de un lector) devuelve el
+    resultado guardado en lugar de volver a aplicarse.
+    La llave incluye la tarjeta porque el scan_id lo asigna cada lector.
+    """
+    __tablename__ = "escaneo_procesado"
+
+    scan_id: str = Field(primary_key=True)
+    nfc_uid: str = Field(primary_key=True)
+    resultado: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    procesado: datetime = Field(default_factory=get_mexico_time, index=True)
@@ -4,13 +4,16 @@ Modelo de Falta: registro de ausencias de estudiantes.
 """
 from typing import Optional, List
 from datetime import date
-from sqlmodel import Field, SQLModel, Relationship, UniqueConstraint
+from sqlmodel import Field, SQLModel, Relationship, UniqueConstraint, Index
 
 class Falta(SQLModel, table=True):
     """Tabla de faltas de estudiantes"""
     __tablename__ = "faltas"
     
-    __table_args__ = (UniqueConstraint("matricula_estudiante", "fecha", name="unique_student_date"),)
+    __table_args__ = (
+        UniqueConstraint("matricula_estudiante", "fecha", name="unique_student_date"),
+        Index("ix_faltas_fecha_id", "fecha", "id"),  # Clave de la paginación por cursor
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     matricula_estudiante: str = Field(foreign_key="estudiante.matricula")
@@ -4,7 +4,7 @@ Modelo de Justificación: registro simple de justificaciones de faltas.
 """
 from typing import Optional
 from datetime import datetime, timezone, timedelta
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, SQLModel, Relationship, Index
 
 
 def mexico_now():
@@ -18,6 +18,10 @@ class Justificacion(SQLModel, table=True):
     """Tabla de justificaciones - Registro simple de quién justificó y cuándo"""
     __tablename__ = "justificaciones"
     
+    __table_args__ = (
+        Index("ix_justificaciones_fecha_creacion_id", "fecha_creacion", "id"),  # Clave de la paginación por cursor
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     justificacion: str  # Texto de la justificación
     usuario_registro: Optional[str] = None  # Usuario que registró la justificación
@@ -3,6 +3,7 @@
 Modelo de NFC: vinculación de tarjetas NFC con estudiantes.
 """
 from typing import Optional, List
+from datetime import datetime
 from sqlmodel import Field, SQLModel, Relationship
 
 class NFC(SQLModel, table=True):
@@ -38,3 +39,15 @@ class NfcPayload(SQLModel):
     """DTO para el endpoint de registro de acceso"""
     nfc_uid: str
     fecha_registro: Optional[str] = None  # Para modo de prueba, formato YYYY-MM-DD
+
+
+class NfcScan(SQLModel):
+    """Lectura individual dentro de un lote enviado por un lector NFC"""
+    nfc_uid: str
+    timestamp: Optional[datetime] = None  # Hora del dispositivo; si falta se usa la del servidor
+    scan_id: Optional[str] = None  # Identificador asignado por el lector (para conciliar resultados)
+
+
+class NfcBatchPayload(SQLModel):
+    """DTO para el registro por lotes de lecturas NFC"""
+    escaneos: List[NfcScan]
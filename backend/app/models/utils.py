@@ -8,3 +8,7 @@ from app.core.config import MEXICO_TZ
 def get_mexico_time():
     """Retorna la hora actual en la zona horaria de México sin timezone info"""
     return datetime.now(MEXICO_TZ).replace(tzinfo=None)
+
+def get_mexico_date():
+    """Retorna la fecha actual (local) en la zona horaria de México"""
+    return datetime.now(MEXICO_TZ).date()
@@ -41,7 +41,7 @@ class AccesoRepository(IAccesoRepository):
     
     def get_by_fecha(self, fecha: date, id_ciclo: Optional[int] = None) -> List[Acceso]:
         """Obtiene accesos de una fecha específica"""
-        statement = select(Acceso).where(func.date(Acceso.hora_registro) == fecha)
+        statement = select(Acceso).where(Acceso.fecha == fecha)
         
         if id_ciclo:
             statement = statement.where(Acceso.id_ciclo == id_ciclo)
@@ -56,7 +56,7 @@ class AccesoRepository(IAccesoRepository):
             .where(
                 Acceso.nfc_uid == nfc_uid,
                 Acceso.id_ciclo == id_ciclo,
-                func.date(Acceso.hora_registro) == fecha
+                Acceso.fecha == fecha
             )
         )
         return self.session.exec(statement).first() is not None
@@ -66,7 +66,8 @@ class AccesoRepository(IAccesoRepository):
         nuevo_acceso = Acceso(
             nfc_uid=nfc_uid,
             id_ciclo=id_ciclo,
-            hora_registro=hora_registro
+            hora_registro=hora_registro,
+            fecha=hora_registro.date()
         )
         self.session.add(nuevo_acceso)
         self.session.commit()
@@ -78,8 +79,8 @@ class AccesoRepository(IAccesoRepository):
         statement = (
             select(func.count(Acceso.id))
             .where(
-                func.date(Acceso.hora_registro) >= start_date,
-                func.date(Acceso.hora_registro) <= end_date,
+                Acceso.fecha >= start_date,
+                Acceso.fecha <= end_date,
                 Acceso.id_ciclo == id_ciclo
             )
         )
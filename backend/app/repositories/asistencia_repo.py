@@ -0,0 +1,545 @@
+# app/repositories/asistencia_repo.py
+"""
+Implementación del repositorio de Asistencias.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import date, datetime
+from sqlmodel import Session, select, update, delete, func, text
+from sqlalchemy import extract, tuple_
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core.config import settings
+from app.core.pagination import paginar_consulta
+from app.models import Asistencia, AsistenciaAbierta, AsistenciaDiaria, EscaneoProcesado, Estudiante, Grupo
+from app.models.utils import get_mexico_time
+from app.interfaces.asistencia_repo_if import IAsistenciaRepository
+
+
+# Decisión y escritura de una marca en un solo viaje a la base de datos.
+# El estado se lee de asistencia_abierta por llave primaria y se bloquea
+# (FOR UPDATE) para que dos lecturas simultáneas no cierren la misma entrada.
+# Antes se bloquea el estudiante (FOR NO KEY UPDATE): sin sesión abierta no
+# hay fila que bloquear y dos lecturas podrían decidir "entrada" a la vez.
+# El registro por lotes toma los mismos candados (get_abiertas_para_lote).
+# Una entrada solo puede cerrarse en un día posterior, así que "ya hay entrada
+# hoy" equivale a tener la sesión abierta con fecha de hoy.
+# En la misma sentencia se actualiza el resumen asistencia_diaria: la entrada
+# marca el día como asistido y la salida (o la expiración) lo cierra.
+# También se publica el NOTIFY del dashboard en vivo (mismo formato que
+# eventos_dashboard.publicar_marcas, con el id de la transacción en `xid`);
+# Postgres lo entrega solo si la transacción se confirma. `notificar` se une
+# en el SELECT final para que se evalúe.
+#
+# Valores de `accion`:
+#   no_estudiante - la matrícula no existe
+#   duplicada     - ya hay entrada hoy en el ciclo
+#   entrada       - se insertó una nueva entrada (y se abrió la sesión)
+#   muy_pronto    - la entrada pendiente tiene menos del mínimo de minutos
+#   expirada      - la entrada pendiente superó el máximo de horas (se marca inválida)
+#   salida        - se insertó la salida (con su duración) y se validó la entrada
+SQL_REGISTRAR_MARCA = text("""
+    WITH est AS (
+        SELECT e.matricula, e.nombre, e.apellido, g.nombre AS grupo
+        FROM estudiante e
+        LEFT JOIN grupo g ON g.id = e.id_grupo
+        WHERE e.matricula = :matricula
+        FOR NO KEY UPDATE OF e
+    ),
+    abierta AS (
+        SELECT id_entrada, "timestamp", fecha FROM asistencia_abierta
+        WHERE matricula_estudiante = :matricula
+          AND id_ciclo = :id_ciclo
+        FOR UPDATE
+    ),
+    pendiente AS (
+        SELECT id_entrada AS id, "timestamp", fecha FROM abierta
+        WHERE fecha < :hoy
+    ),
+    decision AS (
+        SELECT CASE
+            WHEN NOT EXISTS (SELECT 1 FROM est) THEN 'no_estudiante'
+            WHEN EXISTS (SELECT 1 FROM abierta WHERE fecha = :hoy) THEN 'duplicada'
+            WHEN NOT EXISTS (SELECT 1 FROM pendiente) THEN 'entrada'
+            WHEN (SELECT "timestamp" FROM pendiente) > :limite_min THEN 'muy_pronto'
+            WHEN (SELECT "timestamp" FROM pendiente) < :limite_max THEN 'expirada'
+            ELSE 'salida'
+        END AS accion
+    ),
+    cerrar AS (
+        UPDATE asistencias a
+        SET es_valida = (d.accion = 'salida')
+        FROM pendiente p, decision d
+        WHERE a.id = p.id AND d.accion IN ('salida', 'expirada')
+        RETURNING a.id
+    ),
+    liberar AS (
+        DELETE FROM asistencia_abierta
+        WHERE matricula_estudiante = :matricula
+          AND id_ciclo = :id_ciclo
+          AND EXISTS (SELECT 1 FROM decision WHERE accion IN ('salida', 'expirada'))
+    ),
+    nueva AS (
+        INSERT INTO asistencias
+            (matricula_estudiante, id_ciclo, tipo, "timestamp", fecha, es_valida, entrada_relacionada_id,
+             duracion_minutos)
+        SELECT :matricula, :id_ciclo, d.accion, :ahora, :hoy,
+               CASE WHEN d.accion = 'salida' THEN TRUE END,
+               CASE WHEN d.accion = 'salida' THEN (SELECT id FROM pendiente) END,
+               CASE WHEN d.accion = 'salida' THEN
+                   FLOOR(EXTRACT(EPOCH FROM (CAST(:ahora AS timestamp) - (SELECT "timestamp" FROM pendiente))) / 60)::int
+               END
+        FROM decision d
+        WHERE d.accion IN ('entrada', 'salida')
+        RETURNING id, tipo, "timestamp", es_valida, entrada_relacionada_id, duracion_minutos
+    ),
+    abrir AS (
+        INSERT INTO asistencia_abierta (matricula_estudiante, id_ciclo, id_entrada, "timestamp", fecha)
+        SELECT :matricula, :id_ciclo, n.id, n."timestamp", :hoy
+        FROM nueva n
+        WHERE n.tipo = 'entrada'
+        ON CONFLICT (matricula_estudiante, id_ciclo) DO UPDATE
+        SET id_entrada = EXCLUDED.id_entrada,
+            "timestamp" = EXCLUDED."timestamp",
+            fecha = EXCLUDED.fecha
+    ),
+    diaria AS (
+        INSERT INTO asistencia_diaria (matricula_estudiante, id_ciclo, fecha, asistio, minutos)
+        SELECT :matricula, :id_ciclo, :hoy, TRUE, NULL
+        FROM nueva n
+        WHERE n.tipo = 'entrada'
+        UNION ALL
+        SELECT :matricula, :id_ciclo, p.fecha, d.accion = 'salida', n.duracion_minutos
+        FROM pendiente p
+        CROSS JOIN decision d
+        LEFT JOIN nueva n ON TRUE
+        WHERE d.accion IN ('salida', 'expirada')
+        ON CONFLICT (matricula_estudiante, id_ciclo, fecha) DO UPDATE
+        SET asistio = EXCLUDED.asistio,
+            minutos = EXCLUDED.minutos
+    ),
+    notificar AS (
+        SELECT pg_notify(:canal, json_build_object(
+            'entradas', (d.accion = 'entrada')::int,
+            'salidas', (d.accion = 'salida')::int,
+            'expiradas', (d.accion = 'expirada')::int,
+            'presentes', CASE WHEN d.accion = 'entrada' THEN 1 ELSE -1 END,
+            'grupos', json_build_object(
+                COALESCE(est.grupo, 'Sin grupo'),
+                CASE WHEN d.accion = 'entrada' THEN 1 ELSE -1 END
+            ),
+            'xid', pg_current_xact_id()::text::bigint
+        )::text) AS enviado
+        FROM decision d
+        CROSS JOIN est
+        WHERE d.accion IN ('entrada', 'salida', 'expirada')
+    )
+    SELECT d.accion,
+           n.id, n."timestamp", n.es_valida, n.entrada_relacionada_id, n.duracion_minutos,
+           (SELECT "timestamp" FROM pendiente) AS entrada_timestamp,
+           est.nombre, est.apellido, est.grupo
+    FROM decision d
+    LEFT JOIN nueva n ON TRUE
+    LEFT JOIN est ON TRUE
+    LEFT JOIN notificar ON TRUE
+""")
+
+
+class AsistenciaRepository(IAsistenciaRepository):
+    """Repositorio para gestionar asistencias"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def registrar_marca(
+        self,
+        matricula: str,
+        id_ciclo: int,
+        ahora: datetime,
+        hoy: date,
+        limite_min: datetime,
+        limite_max: datetime
+    ) -> Any:
+        """
+        Decide y escribe una marca (entrada/salida) en una sola sentencia,
+        incluido el evento del dashboard en vivo.
+        No hace commit: la transacción la cierra el servicio.
+        """
+        return self.session.execute(SQL_REGISTRAR_MARCA, {
+            "matricula": matricula,
+            "id_ciclo": id_ciclo,
+            "ahora": ahora,
+            "hoy": hoy,
+            "limite_min": limite_min,
+            "limite_max": limite_max,
+            "canal": settings.DASHBOARD_STREAM_CANAL
+        }).one()
+
+    def reclamar_escaneos(self, claves: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """
+        Inserta las lecturas (scan_id, nfc_uid) en escaneo_procesado y retorna
+        las que no estaban. Si otra transacción está registrando la misma
+        lectura, se espera a que termine y la lectura se reporta como existente.
+        """
+        if not claves:
+            return set()
+        procesado = get_mexico_time()
+        statement = (
+            pg_insert(EscaneoProcesado)
+            # Siempre en el mismo orden para que dos lotes no se bloqueen mutuamente
+            .values([
+                {"scan_id": scan_id, "nfc_uid": nfc_uid, "procesado": procesado}
+                for scan_id, nfc_uid in sorted(claves)
+            ])
+            .on_conflict_do_nothing(index_elements=["scan_id", "nfc_uid"])
+            .returning(EscaneoProcesado.scan_id, EscaneoProcesado.nfc_uid)
+        )
+        return {(fila.scan_id, fila.nfc_uid) for fila in self.session.execute(statement)}
+
+    def get_resultados_escaneos(self, claves: List[Tuple[str, str]]) -> Dict[Tuple[str, str], dict]:
+        """Resultado guardado de cada lectura (scan_id, nfc_uid) ya registrada"""
+        if not claves:
+            return {}
+        statement = select(EscaneoProcesado).where(
+            tuple_(EscaneoProcesado.scan_id, EscaneoProcesado.nfc_uid).in_(claves)
+        )
+        return {
+            (escaneo.scan_id, escaneo.nfc_uid): escaneo.resultado
+            for escaneo in self.session.exec(statement).all()
+        }
+
+    def get_resultado_escaneo(self, scan_id: str) -> Optional[dict]:
+        """Resultado guardado de una lectura por su scan_id (None si no se ha registrado)"""
+        statement = select(EscaneoProcesado.resultado).where(
+            EscaneoProcesado.scan_id == scan_id,
+            EscaneoProcesado.resultado.is_not(None)
+        )
+        return self.session.exec(statement).first()
+
+    def guardar_resultados_escaneos(self, resultados: Dict[Tuple[str, str], dict]) -> None:
+        """Guarda (o reemplaza) el resultado de cada lectura (scan_id, nfc_uid), sin commit"""
+        if not resultados:
+            return
+        procesado = get_mexico_time()
+        statement = pg_insert(EscaneoProcesado).values([
+            {"scan_id": scan_id, "nfc_uid": nfc_uid, "resultado": resultado, "procesado": procesado}
+            for (scan_id, nfc_uid), resultado in sorted(resultados.items())
+        ])
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["scan_id", "nfc_uid"],
+                set_={"resultado": statement.excluded.resultado, "procesado": statement.excluded.procesado}
+            )
+        )
+
+    def purgar_escaneos(self, antes: datetime) -> int:
+        """Elimina los resultados de lecturas procesadas antes de `antes`. Retorna cuántos"""
+        resultado = self.session.execute(
+            delete(EscaneoProcesado).where(EscaneoProcesado.procesado < antes)
+        )
+        return resultado.rowcount
+
+    def get_abiertas_para_lote(self, matriculas: List[str], id_ciclo: int) -> List[AsistenciaAbierta]:
+        """
+        Obtiene (bloqueando) la sesión abierta de cada estudiante del lote.
+        Toma los mismos candados que SQL_REGISTRAR_MARCA: primero el estudiante
+        (FOR NO KEY UPDATE, en orden de matrícula) y después su fila de
+        asistencia_abierta, así un lote y una lectura individual del mismo
+        estudiante nunca deciden a la vez.
+        """
+        self.session.exec(
+            select(Estudiante.matricula)
+            .where(Estudiante.matricula.in_(matriculas))
+            .order_by(Estudiante.matricula)
+            .with_for_update(key_share=True)
+        ).all()
+        statement = (
+            select(AsistenciaAbierta)
+            .where(
+                AsistenciaAbierta.matricula_estudiante.in_(matriculas),
+                AsistenciaAbierta.id_ciclo == id_ciclo
+            )
+            .with_for_update()
+        )
+        return list(self.session.exec(statement).all())
+
+    def get_fechas_con_entrada(self, matriculas: List[str], id_ciclo: int, fecha_min: date) -> List[Any]:
+        """Pares (matricula_estudiante, fecha) con entrada desde `fecha_min`"""
+        statement = (
+            select(Asistencia.matricula_estudiante, Asistencia.fecha)
+            .where(
+                Asistencia.matricula_estudiante.in_(matriculas),
+                Asistencia.id_ciclo == id_ciclo,
+                Asistencia.tipo == "entrada",
+                Asistencia.fecha >= fecha_min
+            )
+            .distinct()
+        )
+        return list(self.session.exec(statement).all())
+
+    def get_ultimas_marcas(self, matriculas: List[str], id_ciclo: int) -> List[Any]:
+        """Pares (matricula_estudiante, timestamp) con la marca más reciente de cada estudiante en el ciclo"""
+        statement = (
+            select(Asistencia.matricula_estudiante, func.max(Asistencia.timestamp))
+            .where(
+                Asistencia.matricula_estudiante.in_(matriculas),
+                Asistencia.id_ciclo == id_ciclo
+            )
+            .group_by(Asistencia.matricula_estudiante)
+        )
+        return list(self.session.exec(statement).all())
+
+    def marcar_entradas(self, ids: List[int], es_valida: bool) -> None:
+        """Marca varias entradas como válidas o inválidas"""
+        if not ids:
+            return
+        self.session.execute(
+            update(Asistencia)
+            .where(Asistencia.id.in_(ids))
+            .values(es_valida=es_valida)
+        )
+
+    def crear_lote(self, asistencias: List[Asistencia]) -> None:
+        """Inserta varias asistencias en la transacción actual (sin commit)"""
+        if not asistencias:
+            return
+        self.session.add_all(asistencias)
+        self.session.flush()
+
+    def sincronizar_abiertas(self, id_ciclo: int, abiertas: Dict[str, Optional[Tuple[int, datetime, date]]]) -> None:
+        """
+        Deja asistencia_abierta igual al estado calculado para cada matrícula:
+        (id_entrada, timestamp, fecha) de la entrada pendiente, o None si no hay.
+        """
+        cerradas = [matricula for matricula, entrada in abiertas.items() if entrada is None]
+        if cerradas:
+            self.session.execute(
+                delete(AsistenciaAbierta).where(
+                    AsistenciaAbierta.id_ciclo == id_ciclo,
+                    AsistenciaAbierta.matricula_estudiante.in_(cerradas)
+                )
+            )
+
+        filas = [
+            {
+                "matricula_estudiante": matricula,
+                "id_ciclo": id_ciclo,
+                "id_entrada": entrada[0],
+                "timestamp": entrada[1],
+                "fecha": entrada[2]
+            }
+            for matricula, entrada in abiertas.items() if entrada is not None
+        ]
+        if filas:
+            statement = pg_insert(AsistenciaAbierta).values(filas)
+            self.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["matricula_estudiante", "id_ciclo"],
+                    set_={
+                        "id_entrada": statement.excluded.id_entrada,
+                        "timestamp": statement.excluded.timestamp,
+                        "fecha": statement.excluded.fecha
+                    }
+                )
+            )
+
+    def sincronizar_diaria(self, id_ciclo: int, dias: Dict[Tuple[str, date], Tuple[bool, Optional[int]]]) -> None:
+        """
+        Escribe en asistencia_diaria el estado calculado de cada (matrícula, fecha):
+        (asistio, minutos).
+        """
+        if not dias:
+            return
+        filas = [
+            {
+                "matricula_estudiante": matricula,
+                "id_ciclo": id_ciclo,
+                "fecha": fecha,
+                "asistio": asistio,
+                "minutos": minutos
+            }
+            for (matricula, fecha), (asistio, minutos) in dias.items()
+        ]
+        statement = pg_insert(AsistenciaDiaria).values(filas)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["matricula_estudiante", "id_ciclo", "fecha"],
+                set_={
+                    "asistio": statement.excluded.asistio,
+                    "minutos": statement.excluded.minutos
+                }
+            )
+        )
+
+    def contar_abiertas_por_grupo(self, id_ciclo: int, desde: datetime) -> List[Any]:
+        """
+        Cuenta las sesiones abiertas desde `desde` agrupadas por grupo.
+        Retorna filas (id_grupo, grupo, turno, presentes).
+        """
+        statement = (
+            select(
+                Grupo.id.label("id_grupo"),
+                Grupo.nombre.label("grupo"),
+                Grupo.turno.label("turno"),
+                func.count().label("presentes")
+            )
+            .select_from(AsistenciaAbierta)
+            .join(Estudiante, Estudiante.matricula == AsistenciaAbierta.matricula_estudiante)
+            .outerjoin(Grupo, Grupo.id == Estudiante.id_grupo)
+            .where(
+                AsistenciaAbierta.id_ciclo == id_ciclo,
+                AsistenciaAbierta.timestamp >= desde
+            )
+            .group_by(Grupo.id, Grupo.nombre, Grupo.turno)
+            .order_by(Grupo.nombre)
+        )
+        return list(self.session.exec(statement).all())
+
+    def contar_del_dia_por_grupo(self, fecha: date) -> List[Any]:
+        """
+        Conteos de marcas del día agrupados por grupo, en un solo recorrido
+        (índice por fecha). Retorna filas (id_grupo, grupo, turno, entradas,
+        salidas, validas, invalidas, pendientes).
+        """
+        es_entrada = Asistencia.tipo == "entrada"
+        es_salida = Asistencia.tipo == "salida"
+        statement = (
+            select(
+                Grupo.id.label("id_grupo"),
+                Grupo.nombre.label("grupo"),
+                Grupo.turno.label("turno"),
+                func.count().filter(es_entrada).label("entradas"),
+                func.count().filter(es_salida).label("salidas"),
+                func.count().filter(es_salida, Asistencia.es_valida == True).label("validas"),  # noqa: E712
+                func.count().filter(Asistencia.es_valida == False).label("invalidas"),  # noqa: E712
+                func.count().filter(es_entrada, Asistencia.es_valida.is_(None)).label("pendientes")
+            )
+            .select_from(Asistencia)
+            .join(Estudiante, Estudiante.matricula == Asistencia.matricula_estudiante)
+            .outerjoin(Grupo, Grupo.id == Estudiante.id_grupo)
+            .where(Asistencia.fecha == fecha)
+            .group_by(Grupo.id, Grupo.nombre, Grupo.turno)
+            .order_by(Grupo.nombre)
+        )
+        return list(self.session.exec(statement).all())
+
+    def _select_con_estudiante(self, *columnas_extra):
+        """Asistencia ⋈ estudiante ⋈ grupo proyectando solo las columnas de la respuesta"""
+        return (
+            select(
+                Asistencia.id,
+                Asistencia.tipo,
+                Asistencia.timestamp,
+                Asistencia.fecha,
+                Asistencia.es_valida,
+                Asistencia.entrada_relacionada_id,
+                Asistencia.duracion_minutos,
+                Estudiante.matricula,
+                Estudiante.nombre,
+                Estudiante.apellido,
+                Grupo.nombre.label("grupo"),
+                *columnas_extra
+            )
+            .join(Estudiante, Estudiante.matricula == Asistencia.matricula_estudiante)
+            .outerjoin(Grupo, Grupo.id == Estudiante.id_grupo)
+        )
+
+    def get_con_estudiante(
+        self,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None,
+        limite: Optional[int] = None,
+        despues_de: Optional[Tuple[datetime, int]] = None
+    ) -> List[Any]:
+        """
+        Registros (entradas y salidas) con datos del estudiante, más recientes
+        primero (timestamp, id). `despues_de` continúa después de esa clave.
+        """
+        statement = self._select_con_estudiante()
+        if fecha_inicio:
+            statement = statement.where(Asistencia.fecha >= fecha_inicio)
+        if fecha_fin:
+            statement = statement.where(Asistencia.fecha <= fecha_fin)
+        statement = paginar_consulta(
+            statement, [Asistencia.timestamp, Asistencia.id], despues_de, limite, descendente=True
+        )
+        return list(self.session.exec(statement).all())
+
+    def get_validas_con_entrada(
+        self,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None
+    ) -> List[Any]:
+        """Salidas válidas con datos del estudiante y la hora de su entrada relacionada"""
+        entrada = aliased(Asistencia)
+        statement = (
+            self._select_con_estudiante(entrada.timestamp.label("entrada_timestamp"))
+            .outerjoin(entrada, entrada.id == Asistencia.entrada_relacionada_id)
+            .where(
+                Asistencia.tipo == "salida",
+                Asistencia.es_valida == True  # noqa: E712
+            )
+        )
+        if fecha_inicio:
+            statement = statement.where(Asistencia.fecha >= fecha_inicio)
+        if fecha_fin:
+            statement = statement.where(Asistencia.fecha <= fecha_fin)
+        statement = statement.order_by(Asistencia.timestamp.desc())
+        return list(self.session.exec(statement).all())
+
+    def _salidas_con_duracion(self, id_ciclo: int, fecha_inicio: Optional[date], fecha_fin: Optional[date]):
+        """Condiciones comunes de los promedios: salidas válidas con duración en el ciclo"""
+        condiciones = [
+            Asistencia.id_ciclo == id_ciclo,
+            Asistencia.tipo == "salida",
+            Asistencia.es_valida == True,  # noqa: E712
+            Asistencia.duracion_minutos.is_not(None)
+        ]
+        if fecha_inicio:
+            condiciones.append(Asistencia.fecha >= fecha_inicio)
+        if fecha_fin:
+            condiciones.append(Asistencia.fecha <= fecha_fin)
+        return condiciones
+
+    def promedios_permanencia_por_grupo(
+        self,
+        id_ciclo: int,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None
+    ) -> List[Any]:
+        """Permanencia promedio (minutos) y número de salidas por grupo, en una sola agregación"""
+        statement = (
+            select(
+                Grupo.id.label("id_grupo"),
+                Grupo.nombre.label("grupo"),
+                func.count().label("salidas"),
+                func.avg(Asistencia.duracion_minutos).label("promedio_minutos")
+            )
+            .select_from(Asistencia)
+            .join(Estudiante, Estudiante.matricula == Asistencia.matricula_estudiante)
+            .outerjoin(Grupo, Grupo.id == Estudiante.id_grupo)
+            .where(*self._salidas_con_duracion(id_ciclo, fecha_inicio, fecha_fin))
+            .group_by(Grupo.id, Grupo.nombre)
+            .order_by(Grupo.nombre)
+        )
+        return list(self.session.exec(statement).all())
+
+    def promedios_permanencia_por_dia(
+        self,
+        id_ciclo: int,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None
+    ) -> List[Any]:
+        """Permanencia promedio (minutos) por día de la semana de la entrada (ISO, 1=lunes)"""
+        # La salida se registra al día siguiente: el día que cuenta es el de la entrada
+        dia = extract("isodow", Asistencia.fecha - 1).label("dia_semana")
+        statement = (
+            select(
+                dia,
+                func.count().label("salidas"),
+                func.avg(Asistencia.duracion_minutos).label("promedio_minutos")
+            )
+            .where(*self._salidas_con_duracion(id_ciclo, fecha_inicio, fecha_fin))
+            .group_by("dia_semana")
+            .order_by("dia_semana")
+        )
+        return list(self.session.exec(statement).all())
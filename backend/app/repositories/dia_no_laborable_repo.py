@@ -0,0 +1,60 @@
+# app/repositories/dia_no_laborable_repo.py
+"""
+Implementación del repositorio de días no laborables.
+"""
+from datetime import date
+from typing import List, Optional
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+from app.interfaces.dia_no_laborable_repo_if import IDiaNoLaborableRepository
+from app.models.dia_no_laborable import DiaNoLaborable
+
+
+class DiaNoLaborableRepository(IDiaNoLaborableRepository):
+    """Repositorio para días sin clases por ciclo escolar"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_by_ciclo(self, id_ciclo: int) -> List[DiaNoLaborable]:
+        """Obtiene los días no laborables de un ciclo, ordenados por fecha"""
+        statement = (
+            select(DiaNoLaborable)
+            .where(DiaNoLaborable.id_ciclo == id_ciclo)
+            .order_by(DiaNoLaborable.fecha)
+        )
+        return list(self.session.exec(statement).all())
+
+    def get_fechas_by_ciclo(self, id_ciclo: int) -> List[date]:
+        """Obtiene solo las fechas no laborables de un ciclo"""
+        statement = select(DiaNoLaborable.fecha).where(DiaNoLaborable.id_ciclo == id_ciclo)
+        return list(self.session.exec(statement).all())
+
+    def get_by_id(self, id_dia: int) -> Optional[DiaNoLaborable]:
+        """Obtiene un día no laborable por ID"""
+        return self.session.get(DiaNoLaborable, id_dia)
+
+    def create_many(self, id_ciclo: int, fechas: List[date], descripcion: str) -> int:
+        """Registra varias fechas en un solo INSERT; omite las ya registradas"""
+        if not fechas:
+            return 0
+        statement = (
+            pg_insert(DiaNoLaborable)
+            .values([
+                {"id_ciclo": id_ciclo, "fecha": fecha, "descripcion": descripcion}
+                for fecha in fechas
+            ])
+            .on_conflict_do_nothing(index_elements=["id_ciclo", "fecha"])
+        )
+        result = self.session.execute(statement)
+        self.session.commit()
+        return result.rowcount
+
+    def delete(self, id_dia: int) -> bool:
+        """Elimina un día no laborable. Retorna True si fue eliminado"""
+        db_dia = self.get_by_id(id_dia)
+        if not db_dia:
+            return False
+        self.session.delete(db_dia)
+        self.session.commit()
+        return True
@@ -5,6 +5,7 @@ Implementación del repositorio de Estudiante.
 from typing import List, Optional
 from sqlmodel import Session, select, update
 from sqlalchemy.orm import selectinload
+from app.core.pagination import paginar_consulta
 from app.interfaces.estudiante_repo_if import IEstudianteRepository
 from app.models.estudiante import Estudiante, EstudianteCreate, EstudianteUpdate
 
@@ -19,13 +20,26 @@ class EstudianteRepository(IEstudianteRepository):
         statement = select(Estudiante)
         return list(self.session.exec(statement).all())
     
-    def get_all_complete(self) -> List[Estudiante]:
-        """Obtiene todos los estudiantes con relaciones (grupo, ciclo, nfc)"""
+    def get_all_complete(
+        self,
+        limite: Optional[int] = None,
+        despues_de_matricula: Optional[str] = None
+    ) -> List[Estudiante]:
+        """
+        Obtiene todos los estudiantes con relaciones (grupo, ciclo, nfc), por matrícula.
+        Con `limite` solo se cargan (y se cargan sus relaciones) esos estudiantes.
+        """
         statement = select(Estudiante).options(
             selectinload(Estudiante.grupo),
             selectinload(Estudiante.ciclo),
             selectinload(Estudiante.nfc)
         )
+        statement = paginar_consulta(
+            statement,
+            [Estudiante.matricula],
+            [despues_de_matricula] if despues_de_matricula is not None else None,
+            limite
+        )
         return list(self.session.exec(statement).all())
     
     def get_by_matricula(self, matricula: str) -> Optional[Estudiante]:
@@ -2,13 +2,49 @@
 """
 Implementación del repositorio de Faltas.
 """
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import date
-from sqlmodel import Session, select
+from sqlmodel import Session, select, text
 from app.models import Falta, FaltaCreate, FaltaUpdate
 from app.interfaces.falta_repo_if import IFaltaRepository
 
 
+# Corte de faltas en una sola sentencia: (estudiantes × días hábiles) menos
+# los días con entrada válida, insertado con ON CONFLICT DO NOTHING (la falta
+# ya registrada se omite). Los días hábiles vienen del calendario escolar
+# (sin festivos), por eso se pasan como arreglo en lugar de generate_series.
+# Retorna las faltas creadas con el nombre del estudiante.
+_SQL_CORTE_FALTAS = """
+    WITH dias AS (
+        SELECT unnest(CAST(:dias AS date[])) AS fecha
+    ),
+    est AS (
+        SELECT matricula FROM estudiante WHERE {filtro}
+    ),
+    nuevas AS (
+        INSERT INTO faltas (matricula_estudiante, id_ciclo, fecha, estado)
+        SELECT est.matricula, :id_ciclo, dias.fecha, 'Sin justificar'
+        FROM est CROSS JOIN dias
+        WHERE NOT EXISTS (
+            SELECT 1 FROM asistencias a
+            WHERE a.matricula_estudiante = est.matricula
+              AND a.id_ciclo = :id_ciclo
+              AND a.fecha = dias.fecha
+              AND a.tipo = 'entrada'
+              AND a.es_valida = TRUE
+        )
+        ON CONFLICT (matricula_estudiante, fecha) DO NOTHING
+        RETURNING id, matricula_estudiante, fecha
+    )
+    SELECT n.id, n.matricula_estudiante AS matricula, n.fecha, e.nombre, e.apellido
+    FROM nuevas n
+    JOIN estudiante e ON e.matricula = n.matricula_estudiante
+    ORDER BY n.matricula_estudiante, n.fecha
+"""
+SQL_CORTE_FALTAS_CICLO = text(_SQL_CORTE_FALTAS.format(filtro="id_ciclo = :id_ciclo"))
+SQL_CORTE_FALTAS_MATRICULAS = text(_SQL_CORTE_FALTAS.format(filtro="matricula = ANY(:matriculas)"))
+
+
 class FaltaRepository(IFaltaRepository):
     """Repositorio para gestionar faltas"""
     
@@ -123,3 +159,24 @@ class FaltaRepository(IFaltaRepository):
         self.session.delete(db_falta)
         self.session.commit()
         return True
+    
+    def crear_faltas_de_corte(
+        self,
+        id_ciclo: int,
+        dias_habiles: List[date],
+        matriculas: Optional[List[str]] = None
+    ) -> List[Any]:
+        """
+        Inserta en una sola sentencia las faltas de los días hábiles sin entrada
+        válida: de todos los estudiantes del ciclo o solo de `matriculas`.
+        No hace commit. Retorna filas (id, matricula, fecha, nombre, apellido).
+        """
+        if not dias_habiles or matriculas == []:
+            return []
+        parametros = {"id_ciclo": id_ciclo, "dias": list(dias_habiles)}
+        if matriculas is None:
+            statement = SQL_CORTE_FALTAS_CICLO
+        else:
+            statement = SQL_CORTE_FALTAS_MATRICULAS
+            parametros["matriculas"] = list(matriculas)
+        return list(self.session.execute(statement, parametros).all())
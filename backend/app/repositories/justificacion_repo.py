@@ -2,8 +2,10 @@
 """
 Implementación del repositorio de Justificaciones.
 """
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from sqlmodel import Session, select
+from app.core.pagination import paginar_consulta
 from app.models.justificacion import Justificacion, JustificacionCreate
 from app.interfaces.justificacion_repo_if import IJustificacionRepository
 
@@ -14,9 +16,19 @@ class JustificacionRepository(IJustificacionRepository):
     def __init__(self, session: Session):
         self.session = session
     
-    def get_all(self) -> List[Justificacion]:
-        """Obtiene todas las justificaciones ordenadas por fecha descendente"""
-        statement = select(Justificacion).order_by(Justificacion.fecha_creacion.desc())
+    def get_all(
+        self,
+        limite: Optional[int] = None,
+        despues_de: Optional[Tuple[datetime, int]] = None
+    ) -> List[Justificacion]:
+        """Obtiene todas las justificaciones ordenadas por fecha descendente (fecha_creacion, id)"""
+        statement = paginar_consulta(
+            select(Justificacion),
+            [Justificacion.fecha_creacion, Justificacion.id],
+            despues_de,
+            limite,
+            descendente=True
+        )
         return list(self.session.exec(statement).all())
     
     def get_by_id(self, id_justificacion: int) -> Optional[Justificacion]:
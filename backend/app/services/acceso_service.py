@@ -11,6 +11,7 @@ import pytz
 from app.models import Acceso, NfcPayload, AccesoRead, NFC, CicloEscolar, Estudiante
 from app.repositories.acceso_repo import AccesoRepository
 from app.repositories.nfc_repo import NFCRepository
+from app.services import ciclo_activo as ciclo_activo_provider
 
 
 class AccesoService:
@@ -56,10 +57,8 @@ class AccesoService:
                 detail="Tarjeta NFC no reconocida o no vinculada."
             )
         
-        # Obtener el ciclo escolar activo
-        ciclo_activo = self.session.exec(
-            select(CicloEscolar).where(CicloEscolar.activo == True)
-        ).first()
+        # Obtener el ciclo escolar activo (en caché)
+        ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(self.session)
         
         if not ciclo_activo:
             raise HTTPException(
@@ -77,7 +76,8 @@ class AccesoService:
             acceso_existente = self.session.exec(
                 select(Acceso).where(
                     Acceso.nfc_uid == nfc.nfc_uid,
-                    Acceso.id_ciclo == ciclo_activo.id
+                    Acceso.id_ciclo == ciclo_activo.id,
+                    Acceso.fecha == hoy
                 )
             ).first()
             
@@ -2,9 +2,10 @@
 """
 Servicio para gestión de alertas con historial.
 """
+from collections import defaultdict
 from datetime import date, datetime
-from typing import List, Optional
-from sqlmodel import Session, select, func
+from typing import Any, Dict, List, Optional
+from sqlmodel import Session, select, func, update
 from app.models import Alerta, AlertaHistorial, Falta, Estudiante
 
 
@@ -253,3 +254,100 @@ class AlertaService:
             session.commit()
             
             return alerta
+
+    @staticmethod
+    def procesar_faltas_de_corte(
+        session: Session,
+        id_ciclo: int,
+        faltas: List[Any],
+        usuario: Optional[str] = None
+    ) -> Dict[int, int]:
+        """
+        Equivalente en bloque de procesar_nueva_falta para las faltas creadas
+        por un corte (filas con id, matricula, fecha, nombre, apellido en orden
+        de fecha por estudiante). Deja alertas, historial y asociaciones igual
+        que si se hubieran procesado una por una, pero con un número fijo de
+        sentencias por estudiante y sin commit (la transacción es del corte).
+
+        Retorna {id_alerta: faltas agregadas}.
+        """
+        por_estudiante: Dict[str, List[Any]] = defaultdict(list)
+        for falta in faltas:
+            por_estudiante[falta.matricula].append(falta)
+        if not por_estudiante:
+            return {}
+
+        activas: Dict[str, Alerta] = {}
+        for alerta in session.exec(
+            select(Alerta)
+            .where(
+                Alerta.matricula_estudiante.in_(list(por_estudiante)),
+                Alerta.id_ciclo == id_ciclo,
+                Alerta.tipo == "Faltas",
+                Alerta.estado == "Activa"
+            )
+            .order_by(Alerta.id)
+        ).all():
+            activas.setdefault(alerta.matricula_estudiante, alerta)
+
+        # Primera falta sin alerta activa: se crea la alerta (un solo INSERT para todas)
+        creadas = {}
+        for matricula, faltas_estudiante in por_estudiante.items():
+            if matricula not in activas:
+                primera = faltas_estudiante[0]
+                alerta = Alerta(
+                    matricula_estudiante=matricula,
+                    id_ciclo=id_ciclo,
+                    tipo="Faltas",
+                    mensaje=f"El estudiante {primera.nombre} {primera.apellido} tiene 1 falta sin justificar",
+                    fecha_creacion=date.today(),
+                    estado="Activa",
+                    cantidad_faltas=1
+                )
+                session.add(alerta)
+                activas[matricula] = creadas[matricula] = alerta
+        session.flush()
+
+        historial: List[AlertaHistorial] = []
+        resultado: Dict[int, int] = {}
+        for matricula, faltas_estudiante in por_estudiante.items():
+            alerta = activas[matricula]
+            pendientes = faltas_estudiante
+            ahora = datetime.now()
+
+            if matricula in creadas:
+                historial.append(AlertaHistorial(
+                    id_alerta=alerta.id,
+                    accion="Creada",
+                    descripcion=f"Alerta creada: {alerta.mensaje}",
+                    cantidad_faltas_momento=1,
+                    fecha=ahora,
+                    usuario=usuario
+                ))
+                pendientes = faltas_estudiante[1:]
+
+            for falta in pendientes:
+                alerta.cantidad_faltas += 1
+                historial.append(AlertaHistorial(
+                    id_alerta=alerta.id,
+                    accion="Falta Agregada",
+                    descripcion=f"Nueva falta registrada el {falta.fecha}",
+                    cantidad_faltas_momento=alerta.cantidad_faltas,
+                    fecha=ahora,
+                    usuario=usuario
+                ))
+            if pendientes:
+                alerta.fecha_modificacion = ahora
+                alerta.mensaje = f"El estudiante tiene {alerta.cantidad_faltas} faltas sin justificar"
+            session.add(alerta)
+
+            session.exec(
+                update(Falta)
+                .where(Falta.id.in_([falta.id for falta in faltas_estudiante]))
+                .values(id_alerta_asociada=alerta.id)
+            )
+            resultado[alerta.id] = len(faltas_estudiante)
+
+        session.add_all(historial)
+        session.flush()
+        return resultado
@@ -0,0 +1,117 @@
+# app/services/antirrebote.py
+"""
+Antirrebote de lecturas repetidas.
+
+Los estudiantes suelen pasar la tarjeta dos o tres veces seguidas. La primera
+lectura se procesa normalmente y su respuesta (código y cuerpo) se guarda por
+tarjeta y por matrícula durante una ventana corta; las repeticiones dentro de
+la ventana se contestan desde memoria sin tocar la base de datos.
+"""
+import json
+import threading
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class RespuestaGuardada(NamedTuple):
+    """Respuesta original de una lectura"""
+    status_code: int
+    contenido: Any
+
+    def como_respuesta(self) -> JSONResponse:
+        return JSONResponse(status_code=self.status_code, content=self.contenido)
+
+
+_cache = TTLCache(
+    max_entries=settings.ANTIRREBOTE_MAX_ENTRADAS,
+    ttl_segundos=settings.ANTIRREBOTE_VENTANA_SEGUNDOS
+)
+_lock = threading.Lock()
+_contadores = {"repeticiones": 0, "lecturas_nuevas": 0}
+
+
+def clave_uid(nfc_uid: str) -> str:
+    return f"uid:{nfc_uid}"
+
+
+def clave_matricula(matricula: str) -> str:
+    return f"matricula:{matricula}"
+
+
+def habilitado() -> bool:
+    """El antirrebote se desactiva con una ventana de 0 segundos"""
+    return settings.ANTIRREBOTE_VENTANA_SEGUNDOS > 0
+
+
+def buscar(*claves: str) -> Optional[RespuestaGuardada]:
+    """Retorna la respuesta guardada para la primera clave que tenga una dentro de la ventana"""
+    if not habilitado():
+        return None
+    for clave in claves:
+        respuesta = _cache.get(clave)
+        if respuesta is not None:
+            with _lock:
+                _contadores["repeticiones"] += 1
+            return respuesta
+    return None
+
+
+def guardar(claves: Iterable[str], status_code: int, contenido: Any) -> None:
+    """Guarda la respuesta de una lectura bajo todas sus claves"""
+    if not habilitado():
+        return
+    respuesta = RespuestaGuardada(status_code, jsonable_encoder(contenido))
+    for clave in claves:
+        _cache.set(clave, respuesta)
+
+
+def olvidar(*claves: str) -> None:
+    """Descarta las respuestas guardadas (p.ej. el 404 de una tarjeta que se acaba de vincular)"""
+    for clave in claves:
+        _cache.delete(clave)
+
+
+def ejecutar(claves: Iterable[str], registrar: Callable[[], Any], status_code: int = status.HTTP_201_CREATED) -> Any:
+    """
+    Ejecuta `registrar` y guarda su resultado (o su error 4xx) bajo `claves`.
+    El resultado o la excepción se propagan sin cambios.
+    """
+    claves = list(claves)
+    with _lock:
+        _contadores["lecturas_nuevas"] += 1
+    try:
+        resultado = registrar()
+    except HTTPException as e:
+        if e.status_code < status.HTTP_500_INTERNAL_SERVER_ERROR:
+            guardar(claves, e.status_code, {"detail": e.detail})
+        raise
+
+    if isinstance(resultado, Response):
+        guardar(claves, resultado.status_code, json.loads(resultado.body))
+    else:
+        guardar(claves, status_code, resultado)
+    return resultado
+
+
+def stats() -> dict:
+    """Contadores del antirrebote"""
+    with _lock:
+        repeticiones = _contadores["repeticiones"]
+        nuevas = _contadores["lecturas_nuevas"]
+    total = repeticiones + nuevas
+    return {
+        "habilitado": habilitado(),
+        "ventana_segundos": settings.ANTIRREBOTE_VENTANA_SEGUNDOS,
+        "entradas": len(_cache),
+        "max_entradas": settings.ANTIRREBOTE_MAX_ENTRADAS,
+        "hits": repeticiones,
+        "misses": nuevas,
+        "hit_rate": round(repeticiones / total, 4) if total else 0.0
+    }
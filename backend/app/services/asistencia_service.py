@@ -0,0 +1,674 @@
+# app/services/asistencia_service.py
+"""
+Servicio de lógica de negocio para Asistencias (entrada/salida).
+"""
+from typing import List, Optional, Set, Tuple
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlmodel import Session
+from fastapi import HTTPException, status
+import pytz
+
+from app.core.config import settings
+from app.core.pagination import Paginacion
+from app.models import Asistencia, Estudiante, NfcScan
+from app.repositories.asistencia_repo import AsistenciaRepository
+from app.services import nfc_cache, dashboard_cache, eventos_dashboard, ciclo_activo as ciclo_activo_provider
+
+
+class AsistenciaService:
+    """Servicio para registrar entradas y salidas"""
+
+    MEXICO_TZ = pytz.timezone('America/Mexico_City')
+
+    # Constantes de validación
+    MINUTOS_MINIMOS = 5  # Mínimo 5 minutos entre entrada y salida
+    HORAS_MAXIMAS = 10  # Máximo 10 horas entre entrada y salida
+
+    # Día de la semana ISO (1=lunes) usado en los reportes
+    DIAS_SEMANA = {1: "Lunes", 2: "Martes", 3: "Miércoles", 4: "Jueves", 5: "Viernes", 6: "Sábado", 7: "Domingo"}
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.asistencia_repo = AsistenciaRepository(session)
+
+    def registrar(self, matricula: str, datos_estudiante: Optional[dict] = None) -> dict:
+        """
+        Registra entrada o salida de un estudiante.
+
+        Lógica con validación de tiempo y día diferente:
+        - Si no hay entrada del mismo día: registra ENTRADA (es_valida=None)
+        - Si hay entrada del mismo día: ERROR "Ya registraste entrada hoy"
+        - Si hay entrada de día anterior sin salida válida:
+            * Valida tiempo transcurrido
+            * Si < 5 minutos: ERROR "Debes permanecer al menos 5 minutos"
+            * Si > 10 horas: ERROR "Tiempo máximo excedido (10 horas)"
+            * Si 5min-10h: registra SALIDA (es_valida=True) y actualiza entrada
+
+        La decisión y la escritura se resuelven en una sola sentencia SQL.
+        Si `datos_estudiante` ya viene resuelto (p.ej. desde la caché NFC) se usa
+        tal cual; si no, se toma de la misma sentencia.
+
+        Returns:
+            dict con información del registro: tipo, estudiante, timestamp, es_valida
+        """
+        # 1. Obtener el ciclo activo (en caché)
+        ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(self.session)
+
+        if not ciclo_activo:
+            # Conservar la precedencia del 404 de estudiante inexistente
+            if datos_estudiante is None and not self.session.get(Estudiante, matricula):
+                raise self._estudiante_no_encontrado(matricula)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No hay un ciclo escolar activo. Por favor activa un ciclo."
+            )
+
+        # 2. Obtener la hora actual en zona horaria de México (naive para la BD)
+        ahora = datetime.now(self.MEXICO_TZ)
+        hoy = ahora.date()
+        ahora_naive = ahora.replace(tzinfo=None)
+
+        # 3. Decidir y escribir en un solo viaje
+        fila = self.asistencia_repo.registrar_marca(
+            matricula=matricula,
+            id_ciclo=ciclo_activo.id,
+            ahora=ahora_naive,
+            hoy=hoy,
+            limite_min=ahora_naive - timedelta(minutes=self.MINUTOS_MINIMOS),
+            limite_max=ahora_naive - timedelta(hours=self.HORAS_MAXIMAS)
+        )
+
+        # 4. Traducir la decisión a la respuesta HTTP
+        if fila.accion == "no_estudiante":
+            self.session.rollback()
+            raise self._estudiante_no_encontrado(matricula)
+
+        if fila.accion in ("duplicada", "muy_pronto"):
+            self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=self._detalle_rechazo(fila.accion, ahora_naive, fila.entrada_timestamp)
+            )
+
+        # La entrada expirada queda marcada como inválida antes de responder
+        # (el evento del dashboard en vivo ya va en la misma sentencia)
+        self.session.commit()
+        dashboard_cache.marcar_asistencia()
+
+        if fila.accion == "expirada":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=self._detalle_rechazo(fila.accion, ahora_naive, fila.entrada_timestamp)
+            )
+
+        mensaje = self._mensaje_registro(fila.accion, ahora_naive, fila.entrada_timestamp)
+
+        if datos_estudiante is None:
+            datos_estudiante = {
+                "matricula": matricula,
+                "nombre": fila.nombre,
+                "apellido": fila.apellido,
+                "grupo": fila.grupo
+            }
+
+        # 5. Preparar respuesta con información completa
+        return {
+            "id": fila.id,
+            "tipo": fila.accion,
+            "timestamp": fila.timestamp.isoformat(),
+            "es_valida": fila.es_valida,
+            "entrada_relacionada_id": fila.entrada_relacionada_id,
+            "duracion_minutos": fila.duracion_minutos,
+            "estudiante": datos_estudiante,
+            "mensaje": mensaje
+        }
+
+    def registrar_lote(self, escaneos: List[NfcScan]) -> dict:
+        """
+        Registra un lote de lecturas NFC (p.ej. las acumuladas por un lector sin red).
+
+        - Resuelve todas las tarjetas y el estado de los estudiantes en bloque
+        - Rechaza (400 por lectura) las horas futuras, salvo un pequeño desfase
+          de reloj, las fechas fuera del ciclo activo y las lecturas que no son
+          posteriores a la última marca registrada del estudiante
+        - Aplica las mismas reglas que `registrar` en orden de timestamp por estudiante,
+          usando la hora del dispositivo de cada lectura
+        - Escribe todo en una sola transacción, junto con el resultado de cada
+          lectura con scan_id: una lectura repetida (reproceso o reenvío del
+          lector) recibe el resultado guardado y no vuelve a aplicarse
+
+        Returns:
+            dict con totales y un resultado por lectura, en el orden recibido
+        """
+        if len(escaneos) > settings.ASISTENCIA_LOTE_MAX_ESCANEOS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El lote excede el máximo de {settings.ASISTENCIA_LOTE_MAX_ESCANEOS} lecturas."
+            )
+
+        ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(self.session)
+        if not ciclo_activo:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No hay un ciclo escolar activo. Por favor activa un ciclo."
+            )
+
+        ahora_naive = datetime.now(self.MEXICO_TZ).replace(tzinfo=None)
+        # Tolerancia al desfase del reloj de los lectores
+        limite_futuro = ahora_naive + timedelta(seconds=settings.ASISTENCIA_LOTE_TOLERANCIA_RELOJ_SEGUNDOS)
+        resultados: List[Optional[dict]] = [None] * len(escaneos)
+
+        # 1. Lecturas ya registradas: se responde con su resultado guardado.
+        #    El scan_id se reclama en esta transacción; una copia en paralelo espera y se omite
+        claves = {indice: (e.scan_id, e.nfc_uid) for indice, e in enumerate(escaneos) if e.scan_id}
+        nuevas = self.asistencia_repo.reclamar_escaneos(list(set(claves.values())))
+        guardados = self.asistencia_repo.get_resultados_escaneos(list(set(claves.values()) - nuevas))
+        primeras = {}  # clave -> índice de su primera aparición en el lote
+        repetidas = {}  # índice -> índice de la primera aparición
+        for indice, clave in claves.items():
+            if clave in guardados:
+                resultados[indice] = {**guardados[clave], "indice": indice}
+            elif clave in primeras:
+                repetidas[indice] = primeras[clave]
+            else:
+                primeras[clave] = indice
+
+        # 2. Resolver todas las tarjetas (caché + una consulta para las faltantes)
+        tarjetas = nfc_cache.resolver_tarjetas(self.session, (e.nfc_uid for e in escaneos))
+
+        marcas_por_estudiante = defaultdict(list)
+        for indice, escaneo in enumerate(escaneos):
+            if resultados[indice] is not None or indice in repetidas:
+                continue
+            tarjeta = tarjetas.get(escaneo.nfc_uid)
+            if not tarjeta:
+                resultados[indice] = self._resultado_lote(
+                    indice, escaneo, status.HTTP_404_NOT_FOUND,
+                    detail="Tarjeta NFC no reconocida o no vinculada."
+                )
+                continue
+            marca = self._hora_local(escaneo.timestamp) or ahora_naive
+            if marca > limite_futuro:
+                resultados[indice] = self._resultado_lote(
+                    indice, escaneo, status.HTTP_400_BAD_REQUEST,
+                    detail="La hora de la lectura es posterior a la hora actual. Revisa el reloj del lector."
+                )
+                continue
+            if not ciclo_activo.fecha_inicio <= marca.date() <= ciclo_activo.fecha_fin:
+                resultados[indice] = self._resultado_lote(
+                    indice, escaneo, status.HTTP_400_BAD_REQUEST,
+                    detail="La fecha de la lectura está fuera del ciclo escolar activo."
+                )
+                continue
+            marcas_por_estudiante[tarjeta.matricula].append((marca, indice, tarjeta))
+
+        if not marcas_por_estudiante:
+            return self._cerrar_lote(resultados, primeras, repetidas)
+
+        # 3. Cargar (bloqueando) las sesiones abiertas y los días con entrada del lote;
+        #    asistencia_abierta es el mismo estado que usa el registro individual
+        matriculas = list(marcas_por_estudiante.keys())
+        fecha_min = min(marca.date() for marcas in marcas_por_estudiante.values() for marca, _, _ in marcas)
+
+        pendientes = defaultdict(list)
+        for abierta in self.asistencia_repo.get_abiertas_para_lote(matriculas, ciclo_activo.id):
+            pendientes[abierta.matricula_estudiante].append(
+                {"id": abierta.id_entrada, "timestamp": abierta.timestamp, "fecha": abierta.fecha, "nueva": None}
+            )
+
+        fechas_con_entrada = defaultdict(set)
+        for matricula, fecha in self.asistencia_repo.get_fechas_con_entrada(matriculas, ciclo_activo.id, fecha_min):
+            fechas_con_entrada[matricula].add(fecha)
+
+        ultimas_marcas = dict(self.asistencia_repo.get_ultimas_marcas(matriculas, ciclo_activo.id))
+
+        # 4. Simular las reglas por estudiante en orden de timestamp
+        ids_validas: List[int] = []
+        ids_invalidas: List[int] = []
+        entradas_nuevas: List[Asistencia] = []
+        salidas_nuevas: List[tuple] = []  # (salida, entrada pendiente que cierra)
+        registrados: List[tuple] = []  # (indice, asistencia, mensaje, estudiante)
+        dias = {}  # (matrícula, fecha de la entrada) -> (asistio, minutos) para asistencia_diaria
+        expiradas: List[Optional[str]] = []  # grupo de cada sesión cerrada por expiración
+
+        def cerrar(pendiente: dict, es_valida: bool) -> None:
+            if pendiente["nueva"] is not None:
+                pendiente["nueva"].es_valida = es_valida
+            elif es_valida:
+                ids_validas.append(pendiente["id"])
+            else:
+                ids_invalidas.append(pendiente["id"])
+
+        for matricula, marcas in marcas_por_estudiante.items():
+            tarjetas_estudiante = {indice: tarjeta for _, indice, tarjeta in marcas}
+            decisiones = self.simular_marcas(
+                [(marca, indice) for marca, indice, _ in marcas],
+                pendientes[matricula],
+                fechas_con_entrada[matricula],
+                ultimas_marcas.get(matricula)
+            )
+
+            for indice, marca, accion, pendiente in decisiones:
+                hoy = marca.date()
+                tarjeta = tarjetas_estudiante[indice]
+                entrada_ts = pendiente["timestamp"] if pendiente and accion != "entrada" else None
+
+                if accion in ("anterior", "duplicada", "muy_pronto", "expirada"):
+                    if accion == "expirada":
+                        cerrar(pendiente, False)
+                        dias[(matricula, pendiente["fecha"])] = (False, None)
+                        expiradas.append(tarjeta.grupo)
+                    resultados[indice] = self._resultado_lote(
+                        indice, escaneos[indice], status.HTTP_400_BAD_REQUEST,
+                        detail=self._detalle_rechazo(accion, marca, entrada_ts)
+                    )
+                    continue
+
+                nueva = Asistencia(
+                    matricula_estudiante=matricula,
+                    id_ciclo=ciclo_activo.id,
+                    tipo=accion,
+                    timestamp=marca,
+                    fecha=hoy,
+                    es_valida=True if accion == "salida" else None,
+                    duracion_minutos=self.calcular_duracion_minutos(entrada_ts, marca) if accion == "salida" else None
+                )
+                if accion == "entrada":
+                    entradas_nuevas.append(nueva)
+                    pendiente["nueva"] = nueva
+                    dias[(matricula, hoy)] = (True, None)
+                else:
+                    salidas_nuevas.append((nueva, pendiente))
+                    cerrar(pendiente, True)
+                    dias[(matricula, pendiente["fecha"])] = (True, nueva.duracion_minutos)
+
+                registrados.append((
+                    indice, nueva,
+                    self._mensaje_registro(accion, marca, entrada_ts),
+                    tarjeta.estudiante_dict()
+                ))
+
+        # 5. Escribir todo en una sola transacción
+        self.asistencia_repo.marcar_entradas(ids_validas, True)
+        self.asistencia_repo.marcar_entradas(ids_invalidas, False)
+        self.asistencia_repo.crear_lote(entradas_nuevas)
+        for salida, pendiente in salidas_nuevas:
+            salida.entrada_relacionada_id = pendiente["id"] or pendiente["nueva"].id
+        self.asistencia_repo.crear_lote([salida for salida, _ in salidas_nuevas])
+
+        # Estado final de sesión abierta de cada estudiante del lote
+        abiertas = {}
+        for matricula in marcas_por_estudiante:
+            restantes = pendientes[matricula]
+            if not restantes:
+                abiertas[matricula] = None
+                continue
+            ultima = max(restantes, key=lambda p: p["timestamp"])
+            id_entrada = ultima["id"] or ultima["nueva"].id
+            abiertas[matricula] = (id_entrada, ultima["timestamp"], ultima["fecha"])
+        self.asistencia_repo.sincronizar_abiertas(ciclo_activo.id, abiertas)
+        self.asistencia_repo.sincronizar_diaria(ciclo_activo.id, dias)
+
+        for indice, nueva, mensaje, estudiante in registrados:
+            resultados[indice] = self._resultado_lote(
+                indice, escaneos[indice], status.HTTP_201_CREATED,
+                id=nueva.id,
+                tipo=nueva.tipo,
+                timestamp=nueva.timestamp.isoformat(),
+                es_valida=True if nueva.tipo == "salida" else None,
+                entrada_relacionada_id=nueva.entrada_relacionada_id,
+                duracion_minutos=nueva.duracion_minutos,
+                estudiante=estudiante,
+                mensaje=mensaje
+            )
+
+        eventos_dashboard.publicar_marcas(self.session, [
+            *((nueva.tipo, estudiante["grupo"]) for _, nueva, _, estudiante in registrados),
+            *(("expirada", grupo) for grupo in expiradas)
+        ])
+        respuesta = self._cerrar_lote(resultados, primeras, repetidas)
+        dashboard_cache.marcar_asistencia()
+        return respuesta
+
+    def _cerrar_lote(self, resultados: List[dict], primeras: dict, repetidas: dict) -> dict:
+        """Completa las lecturas repetidas dentro del lote, guarda los resultados por scan_id y confirma"""
+        for indice, original in repetidas.items():
+            resultados[indice] = {**resultados[original], "indice": indice}
+        self.asistencia_repo.guardar_resultados_escaneos(
+            {clave: resultados[indice] for clave, indice in primeras.items()}
+        )
+        self.session.commit()
+        return self._respuesta_lote(resultados)
+
+    def obtener_resultado_escaneo(self, scan_id: str) -> Optional[dict]:
+        """Resultado final guardado de una lectura (registrada por cualquier worker)"""
+        return self.asistencia_repo.get_resultado_escaneo(scan_id)
+
+    def guardar_resultados_escaneos(self, escaneos: List[NfcScan], resultados: List[dict]) -> None:
+        """Guarda y confirma el resultado de lecturas que no pasaron por el motor de lotes"""
+        self.asistencia_repo.guardar_resultados_escaneos({
+            (escaneo.scan_id, escaneo.nfc_uid): resultado
+            for escaneo, resultado in zip(escaneos, resultados) if escaneo.scan_id
+        })
+        self.session.commit()
+
+    def purgar_resultados_escaneos(self) -> int:
+        """Elimina los resultados por scan_id más antiguos que la retención configurada"""
+        ahora_naive = datetime.now(self.MEXICO_TZ).replace(tzinfo=None)
+        purgados = self.asistencia_repo.purgar_escaneos(
+            ahora_naive - timedelta(days=settings.ASISTENCIA_ESCANEOS_RETENCION_DIAS)
+        )
+        self.session.commit()
+        return purgados
+
+    def obtener_presentes(self) -> dict:
+        """
+        Estudiantes actualmente en el plantel: sesiones abiertas dentro de la
+        ventana máxima de permanencia, por grupo y por turno.
+        """
+        ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(self.session)
+        if not ciclo_activo:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No hay un ciclo escolar activo. Por favor activa un ciclo."
+            )
+
+        ahora_naive = datetime.now(self.MEXICO_TZ).replace(tzinfo=None)
+        filas = self.asistencia_repo.contar_abiertas_por_grupo(
+            ciclo_activo.id, ahora_naive - timedelta(hours=self.HORAS_MAXIMAS)
+        )
+
+        por_turno = defaultdict(int)
+        for fila in filas:
+            por_turno[fila.turno or "sin turno"] += fila.presentes
+
+        return {
+            "ciclo": ciclo_activo.nombre,
+            "timestamp": ahora_naive.isoformat(),
+            "total": sum(fila.presentes for fila in filas),
+            "por_grupo": [
+                {
+                    "id_grupo": fila.id_grupo,
+                    "grupo": fila.grupo,
+                    "turno": fila.turno,
+                    "presentes": fila.presentes
+                }
+                for fila in filas
+            ],
+            "por_turno": [
+                {"turno": turno, "presentes": presentes}
+                for turno, presentes in sorted(por_turno.items())
+            ]
+        }
+
+    CONTADORES_DIA = ("entradas", "salidas", "validas", "invalidas", "pendientes")
+
+    def obtener_estadisticas_dia(self, fecha: date) -> dict:
+        """
+        Estadísticas de marcas de un día con desglose por grupo y por turno.
+        Una sola consulta agregada por grupo; los totales y turnos se suman aquí.
+        """
+        filas = self.asistencia_repo.contar_del_dia_por_grupo(fecha)
+
+        total = dict.fromkeys(self.CONTADORES_DIA, 0)
+        por_turno = defaultdict(lambda: dict.fromkeys(self.CONTADORES_DIA, 0))
+        por_grupo = []
+        for fila in filas:
+            conteos = {clave: getattr(fila, clave) for clave in self.CONTADORES_DIA}
+            turno = por_turno[fila.turno or "sin turno"]
+            for clave, valor in conteos.items():
+                total[clave] += valor
+                turno[clave] += valor
+            por_grupo.append({
+                "id_grupo": fila.id_grupo,
+                "grupo": fila.grupo,
+                "turno": fila.turno,
+                **conteos,
+                "presentes": conteos["entradas"] - conteos["salidas"]
+            })
+
+        return {
+            "fecha": fecha.isoformat(),
+            "total_entradas": total["entradas"],
+            "total_salidas": total["salidas"],
+            "asistencias_validas": total["validas"],
+            "asistencias_invalidas": total["invalidas"],
+            "entradas_pendientes": total["pendientes"],
+            "estudiantes_presentes": total["entradas"] - total["salidas"],
+            "por_grupo": por_grupo,
+            "por_turno": [
+                {"turno": turno, **conteos, "presentes": conteos["entradas"] - conteos["salidas"]}
+                for turno, conteos in sorted(por_turno.items())
+            ]
+        }
+
+    def listar_registros(
+        self,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None,
+        pagina: Optional[Paginacion] = None
+    ) -> List[dict]:
+        """Entradas y salidas con datos del estudiante (una sola consulta)"""
+        if pagina is None:
+            filas = self.asistencia_repo.get_con_estudiante(fecha_inicio, fecha_fin)
+        else:
+            filas = pagina.recortar(
+                self.asistencia_repo.get_con_estudiante(
+                    fecha_inicio, fecha_fin,
+                    limite=pagina.limite_consulta,
+                    despues_de=pagina.cursor(datetime, int)
+                ),
+                lambda fila: (fila.timestamp, fila.id)
+            )
+        return [
+            {
+                "id": fila.id,
+                "tipo": fila.tipo,
+                "timestamp": fila.timestamp.isoformat(),
+                "es_valida": fila.es_valida,
+                "entrada_relacionada_id": fila.entrada_relacionada_id,
+                "estudiante": self._estudiante_de_fila(fila)
+            }
+            for fila in filas
+        ]
+
+    def listar_validas(self, fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None) -> List[dict]:
+        """Asistencias válidas (salida con su entrada) y tiempo de permanencia (una sola consulta)"""
+        resultado = []
+        for fila in self.asistencia_repo.get_validas_con_entrada(fecha_inicio, fecha_fin):
+            duracion = fila.duracion_minutos
+            if duracion is None and fila.entrada_timestamp:
+                # Salida anterior a la columna y aún sin rellenar
+                duracion = self.calcular_duracion_minutos(fila.entrada_timestamp, fila.timestamp)
+            tiempo_permanencia = None
+            if duracion is not None:
+                tiempo_permanencia = f"{duracion // 60}h {duracion % 60}min"
+
+            resultado.append({
+                "id": fila.id,
+                "fecha": fila.timestamp.date().isoformat(),
+                "hora_entrada": fila.entrada_timestamp.time().isoformat() if fila.entrada_timestamp else None,
+                "hora_salida": fila.timestamp.time().isoformat(),
+                "tiempo_permanencia": tiempo_permanencia,
+                "duracion_minutos": duracion,
+                "estudiante": self._estudiante_de_fila(fila)
+            })
+        return resultado
+
+    def obtener_promedios_permanencia(
+        self,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None,
+        id_ciclo: Optional[int] = None
+    ) -> dict:
+        """
+        Permanencia promedio por grupo y por día de la semana (de la entrada).
+        Ambos son agregados SQL sobre duracion_minutos de las salidas válidas.
+        """
+        if id_ciclo is None:
+            ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(self.session)
+            if not ciclo_activo:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No hay un ciclo escolar activo. Por favor activa un ciclo."
+                )
+            id_ciclo = ciclo_activo.id
+
+        por_grupo = self.asistencia_repo.promedios_permanencia_por_grupo(id_ciclo, fecha_inicio, fecha_fin)
+        por_dia = self.asistencia_repo.promedios_permanencia_por_dia(id_ciclo, fecha_inicio, fecha_fin)
+
+        return {
+            "id_ciclo": id_ciclo,
+            "por_grupo": [
+                {
+                    "id_grupo": fila.id_grupo,
+                    "grupo": fila.grupo,
+                    "salidas": fila.salidas,
+                    "promedio_minutos": round(float(fila.promedio_minutos), 1)
+                }
+                for fila in por_grupo
+            ],
+            "por_dia_semana": [
+                {
+                    "dia_semana": int(fila.dia_semana),
+                    "dia": self.DIAS_SEMANA[int(fila.dia_semana)],
+                    "salidas": fila.salidas,
+                    "promedio_minutos": round(float(fila.promedio_minutos), 1)
+                }
+                for fila in por_dia
+            ]
+        }
+
+    @staticmethod
+    def _estudiante_de_fila(fila) -> dict:
+        return {
+            "matricula": fila.matricula,
+            "nombre": fila.nombre,
+            "apellido": fila.apellido,
+            "grupo": fila.grupo
+        }
+
+    @classmethod
+    def decidir_marca(
+        cls,
+        marca: datetime,
+        tiene_entrada_hoy: bool,
+        entrada_pendiente_ts: Optional[datetime]
+    ) -> str:
+        """
+        Reglas de entrada/salida (mismo orden que la sentencia SQL del repositorio).
+        Retorna: duplicada, entrada, muy_pronto, expirada o salida.
+        """
+        if tiene_entrada_hoy:
+            return "duplicada"
+        if entrada_pendiente_ts is None:
+            return "entrada"
+        if entrada_pendiente_ts > marca - timedelta(minutes=cls.MINUTOS_MINIMOS):
+            return "muy_pronto"
+        if entrada_pendiente_ts < marca - timedelta(hours=cls.HORAS_MAXIMAS):
+            return "expirada"
+        return "salida"
+
+    @classmethod
+    def simular_marcas(
+        cls,
+        marcas: List[Tuple[datetime, int]],
+        pendientes: List[dict],
+        fechas_con_entrada: Set[date],
+        ultima_marca: Optional[datetime]
+    ) -> List[Tuple[int, datetime, str, Optional[dict]]]:
+        """
+        Aplica las reglas a las lecturas (marca, índice) de un estudiante en
+        orden de timestamp, sin consultar la base de datos.
+
+        `pendientes` (entradas sin salida, dicts con id, timestamp, fecha y
+        nueva) y `fechas_con_entrada` se actualizan con cada decisión. Una
+        lectura que no es posterior a `ultima_marca` (la marca más reciente del
+        estudiante) se decide como "anterior": no puede intercalarse en una
+        historia ya registrada.
+
+        Returns:
+            (índice, marca, acción, entrada pendiente) por lectura, en el orden
+            aplicado; para una entrada es la entrada pendiente que se agregó
+        """
+        decisiones = []
+        for marca, indice in sorted(marcas):
+            if ultima_marca is not None and marca <= ultima_marca:
+                decisiones.append((indice, marca, "anterior", None))
+                continue
+
+            hoy = marca.date()
+            anteriores = [p for p in pendientes if p["fecha"] < hoy]
+            pendiente = max(anteriores, key=lambda p: p["timestamp"]) if anteriores else None
+            accion = cls.decidir_marca(marca, hoy in fechas_con_entrada, pendiente["timestamp"] if pendiente else None)
+
+            if accion == "entrada":
+                pendiente = {"id": None, "timestamp": marca, "fecha": hoy, "nueva": None}
+                pendientes.append(pendiente)
+                fechas_con_entrada.add(hoy)
+            elif accion in ("salida", "expirada"):
+                pendientes.remove(pendiente)
+            if accion in ("entrada", "salida"):
+                ultima_marca = marca
+
+            decisiones.append((indice, marca, accion, pendiente))
+        return decisiones
+
+    @staticmethod
+    def calcular_duracion_minutos(entrada: datetime, salida: datetime) -> int:
+        """Minutos completos entre la entrada y la salida (lo que se guarda en duracion_minutos)"""
+        return int((salida - entrada).total_seconds() // 60)
+
+    @classmethod
+    def _detalle_rechazo(cls, accion: str, marca: datetime, entrada_ts: Optional[datetime]) -> str:
+        """Mensaje de error para una marca rechazada"""
+        if accion == "anterior":
+            return "La lectura es anterior a la última marca registrada del estudiante."
+        if accion == "duplicada":
+            return "Ya registraste tu entrada hoy. La salida debe ser en un día diferente."
+        if accion == "muy_pronto":
+            minutos_transcurridos = (marca - entrada_ts).total_seconds() / 60
+            return (f"Debes permanecer al menos {cls.MINUTOS_MINIMOS} minutos antes de registrar tu salida. "
+                    f"Tiempo transcurrido: {int(minutos_transcurridos)} minutos.")
+        return (f"Tiempo máximo excedido ({cls.HORAS_MAXIMAS} horas). "
+                f"Tu entrada anterior ha sido marcada como inválida. "
+                f"Por favor registra una nueva entrada.")
+
+    @staticmethod
+    def _mensaje_registro(accion: str, marca: datetime, entrada_ts: Optional[datetime]) -> str:
+        """Mensaje de éxito para una entrada o salida registrada"""
+        if accion == "entrada":
+            return f"Entrada registrada exitosamente. Recuerda registrar tu salida mañana (entre 5 minutos y 10 horas)."
+
+        # Tiempo de permanencia legible (la misma duración que se guarda en la salida)
+        horas, minutos = divmod(AsistenciaService.calcular_duracion_minutos(entrada_ts, marca), 60)
+        return f"Salida registrada exitosamente. Tiempo de permanencia: {horas} horas y {minutos} minutos."
+
+    @classmethod
+    def _hora_local(cls, marca: Optional[datetime]) -> Optional[datetime]:
+        """Convierte la hora del dispositivo a hora de México naive (como se guarda en la BD)"""
+        if marca is None or marca.tzinfo is None:
+            return marca
+        return marca.astimezone(cls.MEXICO_TZ).replace(tzinfo=None)
+
+    @staticmethod
+    def _resultado_lote(indice: int, escaneo: NfcScan, codigo: int, **datos) -> dict:
+        return {"indice": indice, "scan_id": escaneo.scan_id, "nfc_uid": escaneo.nfc_uid, "status": codigo, **datos}
+
+    @staticmethod
+    def _respuesta_lote(resultados: List[dict]) -> dict:
+        registrados = sum(1 for r in resultados if r["status"] == status.HTTP_201_CREATED)
+        return {
+            "total": len(resultados),
+            "registrados": registrados,
+            "rechazados": len(resultados) - registrados,
+            "resultados": resultados
+        }
+
+    @staticmethod
+    def _estudiante_no_encontrado(matricula: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Estudiante con matrícula {matricula} no encontrado."
+        )
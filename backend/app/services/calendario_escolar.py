@@ -0,0 +1,161 @@
+# app/services/calendario_escolar.py
+"""
+Calendario escolar por ciclo con caché en proceso.
+
+Para cada ciclo se precalcula una sola vez la lista de días hábiles
+(lunes a viernes dentro del ciclo, sin los días no laborables) y sus sumas
+acumuladas, así contar los días hábiles de cualquier rango es O(1) y
+listarlos es un corte por búsqueda binaria, sin recorrer fechas por petición.
+Dashboard, corte de faltas y reportes deben usarlo en lugar de contar días.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+from sqlmodel import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import CicloEscolar
+from app.repositories.dia_no_laborable_repo import DiaNoLaborableRepository
+from app.services import ciclo_activo as ciclo_activo_provider
+
+
+_cache = TTLCache(
+    max_entries=settings.CALENDARIO_CACHE_MAX_CICLOS,
+    ttl_segundos=settings.CALENDARIO_TTL_SEGUNDOS
+)
+
+
+class CalendarioCiclo:
+    """
+    Días hábiles precalculados de un ciclo escolar.
+    Las fechas fuera del ciclo no son días de clase.
+    """
+
+    def __init__(
+        self,
+        id_ciclo: int,
+        fecha_inicio: date,
+        fecha_fin: date,
+        no_laborables: Iterable[date] = ()
+    ):
+        self.id_ciclo = id_ciclo
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.no_laborables = frozenset(no_laborables)
+
+        self._total = max((fecha_fin - fecha_inicio).days + 1, 0)
+        # _acumulados[i] = días hábiles en [fecha_inicio, fecha_inicio + i días)
+        self._acumulados = [0] * (self._total + 1)
+        self._habiles: List[date] = []
+
+        fecha = fecha_inicio
+        for i in range(self._total):
+            habil = fecha.weekday() < 5 and fecha not in self.no_laborables
+            if habil:
+                self._habiles.append(fecha)
+            self._acumulados[i + 1] = self._acumulados[i] + habil
+            fecha += timedelta(days=1)
+
+    def _indice(self, fecha: date) -> int:
+        """Posición de `fecha` en el arreglo acumulado, acotada al ciclo"""
+        return min(max((fecha - self.fecha_inicio).days, 0), self._total)
+
+    def contar(self, inicio: date, fin: date) -> int:
+        """Número de días hábiles en [inicio, fin] (ambos inclusive)"""
+        if fin < inicio:
+            return 0
+        return self._acumulados[self._indice(fin + timedelta(days=1))] - self._acumulados[self._indice(inicio)]
+
+    def es_habil(self, fecha: date) -> bool:
+        """Verifica si la fecha es día de clase en este ciclo"""
+        return self.contar(fecha, fecha) == 1
+
+    def dias_habiles(self, inicio: date, fin: date) -> List[date]:
+        """Lista ordenada de días hábiles en [inicio, fin]"""
+        return self._habiles[bisect_left(self._habiles, inicio):bisect_right(self._habiles, fin)]
+
+    @property
+    def total_dias_habiles(self) -> int:
+        return len(self._habiles)
+
+
+def contar_lunes_a_viernes(inicio: date, fin: date) -> int:
+    """Días de lunes a viernes en [inicio, fin], sin recorrer el rango (sin ciclo ni festivos)"""
+    if fin < inicio:
+        return 0
+    semanas, resto = divmod((fin - inicio).days + 1, 7)
+    # weekday() devuelve 0 para lunes y 6 para domingo
+    dia = inicio.weekday()
+    return semanas * 5 + sum(1 for i in range(resto) if (dia + i) % 7 < 5)
+
+
+def obtener_calendario(session: Session, id_ciclo: int) -> Optional[CalendarioCiclo]:
+    """
+    Obtiene el calendario del ciclo desde la caché; solo consulta la BD
+    (ciclo y días no laborables) si no está cargado. None si el ciclo no existe.
+    """
+    def cargar() -> Optional[CalendarioCiclo]:
+        ciclo = session.get(CicloEscolar, id_ciclo)
+        if not ciclo:
+            return None
+        return CalendarioCiclo(
+            ciclo.id,
+            ciclo.fecha_inicio,
+            ciclo.fecha_fin,
+            DiaNoLaborableRepository(session).get_fechas_by_ciclo(ciclo.id)
+        )
+
+    return _cache.get_or_load(id_ciclo, cargar)
+
+
+def obtener_calendario_activo(session: Session) -> Optional[CalendarioCiclo]:
+    """Calendario del ciclo activo (en caché), o None si no hay ciclo activo"""
+    ciclo = ciclo_activo_provider.obtener_ciclo_activo(session)
+    return obtener_calendario(session, ciclo.id) if ciclo else None
+
+
+def _calendario_o_activo(session: Session, id_ciclo: Optional[int]) -> Optional[CalendarioCiclo]:
+    if id_ciclo is None:
+        return obtener_calendario_activo(session)
+    return obtener_calendario(session, id_ciclo)
+
+
+def contar_dias_habiles(
+    session: Session,
+    inicio: date,
+    fin: date,
+    id_ciclo: Optional[int] = None
+) -> int:
+    """
+    Días hábiles del rango según el calendario del ciclo (por defecto el activo).
+    Sin ciclo, cuenta de lunes a viernes.
+    """
+    calendario = _calendario_o_activo(session, id_ciclo)
+    if not calendario:
+        return contar_lunes_a_viernes(inicio, fin)
+    return calendario.contar(inicio, fin)
+
+
+def dias_habiles(
+    session: Session,
+    inicio: date,
+    fin: date,
+    id_ciclo: Optional[int] = None
+) -> List[date]:
+    """
+    Lista de días hábiles del rango según el calendario del ciclo (por defecto el activo).
+    Sin ciclo, retorna los días de lunes a viernes.
+    """
+    calendario = _calendario_o_activo(session, id_ciclo)
+    if not calendario:
+        return CalendarioCiclo(0, inicio, fin).dias_habiles(inicio, fin)
+    return calendario.dias_habiles(inicio, fin)
+
+
+def invalidar(id_ciclo: Optional[int] = None) -> None:
+    """Descarta el calendario de un ciclo (o todos) tras cambiar sus fechas o días no laborables"""
+    if id_ciclo is None:
+        _cache.clear()
+    else:
+        _cache.delete(id_ciclo)
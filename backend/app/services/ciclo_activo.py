@@ -0,0 +1,34 @@
+# app/services/ciclo_activo.py
+"""
+Proveedor del ciclo escolar activo con caché en proceso.
+Rutas y servicios deben usarlo en lugar de consultar `CicloEscolar.activo`.
+"""
+from typing import Optional
+from sqlmodel import Session, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import CicloEscolar, CicloEscolarRead
+
+
+_CLAVE = "ciclo_activo"
+_cache = TTLCache(max_entries=1, ttl_segundos=settings.CICLO_ACTIVO_TTL_SEGUNDOS)
+
+
+def obtener_ciclo_activo(session: Session) -> Optional[CicloEscolarRead]:
+    """
+    Obtiene el ciclo activo desde la caché; solo consulta la BD si no está cargado.
+    Retorna una copia desacoplada de la sesión (CicloEscolarRead) o None.
+    """
+    def cargar() -> Optional[CicloEscolarRead]:
+        ciclo = session.exec(
+            select(CicloEscolar).where(CicloEscolar.activo == True)
+        ).first()
+        return CicloEscolarRead.model_validate(ciclo) if ciclo else None
+
+    return _cache.get_or_load(_CLAVE, cargar)
+
+
+def invalidar() -> None:
+    """Descarta el ciclo en caché (activación, edición o eliminación de ciclos)"""
+    _cache.clear()
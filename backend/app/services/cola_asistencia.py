@@ -0,0 +1,456 @@
+# app/services/cola_asistencia.py
+"""
+Cola de escritura diferida para lecturas NFC (modo asíncrono).
+
+El endpoint valida la tarjeta desde la caché, encola la lectura y responde 202.
+Un hilo de fondo vacía la cola en lotes usando el mismo motor que
+/asistencia/registrar-nfc/batch, así que cada lote es una sola transacción.
+Si un lote falla se divide a la mitad hasta aislar la lectura que lo rompe;
+esa lectura se reintenta en su lugar hasta ASISTENCIA_COLA_MAX_INTENTOS veces
+y después se publica como error. Los reintentos nunca mandan una lectura al
+final de la cola: una lectura posterior del mismo estudiante no puede
+registrarse antes que la que falló.
+
+Durabilidad: cada lectura se agrega (con fsync) al diario JSONL del proceso
+antes de responder. Al arrancar se reprocesan las lecturas que no tienen
+marca de procesadas (también las de diarios de procesos que ya terminaron)
+y el diario se compacta. El motor de lotes guarda el resultado de cada
+scan_id en la misma transacción que las marcas, así una lectura confirmada
+cuya marca de procesada no alcanzó a escribirse no se aplica dos veces.
+
+Resultados: el resultado final de cada lectura queda en escaneo_procesado,
+así cualquier worker lo consulta, también después de un reinicio. Los de
+este proceso se guardan además en una caché en memoria. Una lectura aún sin
+registrar solo está en el diario del worker que la recibió; los demás la
+buscan en los diarios del directorio.
+"""
+import fcntl
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytz
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.logging import api_logger
+from app.db.database import engine
+from app.models import NfcScan
+from app.services.asistencia_service import AsistenciaService
+from app.services.nfc_cache import TarjetaResuelta
+
+
+MEXICO_TZ = pytz.timezone('America/Mexico_City')
+
+_cola: "queue.Queue[NfcScan]" = queue.Queue()
+_resultados = TTLCache(
+    max_entries=settings.ASISTENCIA_COLA_RESULTADOS_MAX,
+    ttl_segundos=settings.ASISTENCIA_COLA_RESULTADOS_TTL_SEGUNDOS
+)
+
+# scan_id -> instante (monotónico) en que se encoló; en orden de llegada
+_pendientes: "OrderedDict[str, float]" = OrderedDict()
+# scan_id -> intentos fallidos de la lectura procesada sola
+_intentos: Dict[str, int] = {}
+_lock = threading.Lock()
+_lock_diario = threading.Lock()
+
+_hilo: Optional[threading.Thread] = None
+_detener = threading.Event()
+
+_metricas = {
+    "encolados": 0,
+    "procesados": 0,
+    "lotes": 0,
+    "errores": 0,
+    "reintentos": 0,
+    "descartados": 0,
+    "ultimo_lote_ms": 0.0,
+    "ultimo_lote_tamano": 0
+}
+
+
+# --- Diario ---
+# Cada proceso (worker de uvicorn) escribe su propio diario, <nombre>.<pid>.jsonl,
+# y mantiene un flock sobre <diario>.lock mientras vive. Al arrancar, un
+# proceso adopta los diarios cuyo candado está libre (su dueño terminó):
+# copia sus lecturas pendientes a su diario y los elimina.
+
+_candado_diario = None  # Archivo de candado propio, abierto durante la vida del proceso
+
+
+def _ruta_base() -> Path:
+    return Path(settings.ASISTENCIA_COLA_DIARIO)
+
+
+def _ruta_diario() -> Path:
+    base = _ruta_base()
+    return base.with_name(f"{base.stem}.{os.getpid()}{base.suffix}")
+
+
+def _ruta_candado(ruta: Path) -> Path:
+    return ruta.with_name(ruta.name + ".lock")
+
+
+def _escribir_diario(registros: List[dict]) -> None:
+    """Agrega registros al diario y fuerza la escritura a disco"""
+    if not registros:
+        return
+    with _lock_diario:
+        with open(_ruta_diario(), "a", encoding="utf-8") as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _leer_pendientes(ruta: Path) -> "OrderedDict[str, dict]":
+    """Lecturas encoladas de un diario que no tienen marca de procesadas"""
+    encoladas: "OrderedDict[str, dict]" = OrderedDict()
+    if not ruta.exists():
+        return encoladas
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                # Última línea truncada por un apagado a mitad de escritura
+                continue
+            if registro.get("evento") == "encolado":
+                encoladas[registro["scan_id"]] = registro
+            elif registro.get("evento") == "procesado":
+                encoladas.pop(registro["scan_id"], None)
+    return encoladas
+
+
+def _diarios_huerfanos() -> List[Path]:
+    """Diarios de otros procesos (y el diario compartido anterior) como candidatos a adoptar"""
+    base = _ruta_base()
+    propio = _ruta_diario()
+    rutas = [base] if base.exists() else []
+    rutas += sorted(
+        ruta for ruta in base.parent.glob(f"{base.stem}.*{base.suffix}") if ruta != propio
+    )
+    return rutas
+
+
+def _recuperar_diario() -> List[NfcScan]:
+    """
+    Toma el candado del diario propio, adopta los diarios huérfanos y
+    reescribe el diario propio solo con las lecturas pendientes.
+    Retorna esas lecturas.
+    """
+    global _candado_diario
+    ruta = _ruta_diario()
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    if _candado_diario is None:
+        _candado_diario = open(_ruta_candado(ruta), "a")
+        fcntl.flock(_candado_diario, fcntl.LOCK_EX)
+
+    # Un pid reutilizado tras un reinicio deja aquí el diario anterior
+    encoladas = _leer_pendientes(ruta)
+
+    adoptados = []
+    for huerfano in _diarios_huerfanos():
+        candado = open(_ruta_candado(huerfano), "a")
+        try:
+            fcntl.flock(candado, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Su proceso sigue vivo
+            candado.close()
+            continue
+        if not huerfano.exists():
+            # Otro proceso lo adoptó mientras tanto
+            candado.close()
+            continue
+        encoladas.update(_leer_pendientes(huerfano))
+        adoptados.append((huerfano, candado))
+
+    # Primero el diario propio queda en disco con todo lo pendiente; después se borran los adoptados
+    with _lock_diario:
+        temporal = ruta.with_suffix(".tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            for registro in encoladas.values():
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+
+    for huerfano, candado in adoptados:
+        huerfano.unlink(missing_ok=True)
+        _ruta_candado(huerfano).unlink(missing_ok=True)
+        candado.close()
+    if adoptados:
+        api_logger.info(f"Diarios de asistencia adoptados: {[str(h) for h, _ in adoptados]}")
+
+    return [
+        NfcScan(
+            nfc_uid=r["nfc_uid"],
+            timestamp=datetime.fromisoformat(r["timestamp"]),
+            scan_id=r["scan_id"]
+        )
+        for r in encoladas.values()
+    ]
+
+
+def _truncar_diario_si_vacio() -> None:
+    """Vacía el diario propio cuando crece y este proceso no tiene lecturas pendientes"""
+    with _lock_diario:
+        ruta = _ruta_diario()
+        if not ruta.exists() or ruta.stat().st_size < settings.ASISTENCIA_COLA_DIARIO_MAX_BYTES:
+            return
+        with _lock:
+            if _pendientes:
+                return
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# --- API pública ---
+
+def habilitado() -> bool:
+    """Indica si el modo asíncrono está activo"""
+    return settings.ASISTENCIA_MODO_ASINCRONO
+
+
+def encolar(tarjeta: TarjetaResuelta) -> dict:
+    """
+    Registra la lectura en el diario, la encola y retorna el resultado provisional.
+    La hora de la lectura se fija aquí, así el retraso de la cola no altera la decisión.
+    """
+    ahora = datetime.now(MEXICO_TZ).replace(tzinfo=None)
+    escaneo = NfcScan(nfc_uid=tarjeta.nfc_uid, timestamp=ahora, scan_id=uuid.uuid4().hex)
+
+    # Se marca pendiente antes de escribir el diario para que la compactación
+    # nunca trunque una lectura ya escrita pero aún no registrada
+    with _lock:
+        _pendientes[escaneo.scan_id] = time.monotonic()
+        _metricas["encolados"] += 1
+
+    _escribir_diario([{
+        "evento": "encolado",
+        "scan_id": escaneo.scan_id,
+        "nfc_uid": escaneo.nfc_uid,
+        "timestamp": ahora.isoformat()
+    }])
+    _cola.put(escaneo)
+
+    return {
+        "scan_id": escaneo.scan_id,
+        "estado": "pendiente",
+        "timestamp": ahora.isoformat(),
+        "estudiante": tarjeta.estudiante_dict(),
+        "mensaje": "Lectura recibida. El registro se confirmará en unos segundos."
+    }
+
+
+def _pendiente_en_otro_diario(scan_id: str) -> bool:
+    """Indica si la lectura está encolada sin procesar en el diario de otro proceso"""
+    return any(scan_id in _leer_pendientes(ruta) for ruta in _diarios_huerfanos())
+
+
+def consultar(session: Session, scan_id: str) -> Optional[dict]:
+    """
+    Estado de una lectura encolada en cualquier worker: pendiente, procesado
+    (con resultado) o None si no se conoce.
+    """
+    with _lock:
+        if scan_id in _pendientes:
+            return {"scan_id": scan_id, "estado": "pendiente"}
+
+    resultado = _resultados.get(scan_id)
+    if resultado is None:
+        servicio = AsistenciaService(session)
+        resultado = servicio.obtener_resultado_escaneo(scan_id)
+        if resultado is None:
+            if _pendiente_en_otro_diario(scan_id):
+                return {"scan_id": scan_id, "estado": "pendiente"}
+            # Pudo registrarse mientras se leían los diarios
+            resultado = servicio.obtener_resultado_escaneo(scan_id)
+            if resultado is None:
+                return None
+        _resultados.set(scan_id, resultado)
+    return {"scan_id": scan_id, "estado": "procesado", "resultado": resultado}
+
+
+def metricas() -> dict:
+    """Profundidad de la cola, retraso de la lectura más antigua y contadores del worker"""
+    with _lock:
+        profundidad = len(_pendientes)
+        mas_antigua = next(iter(_pendientes.values()), None)
+        datos = dict(_metricas)
+    datos.update({
+        "habilitado": habilitado(),
+        "worker_activo": bool(_hilo and _hilo.is_alive()),
+        "profundidad": profundidad,
+        "lag_segundos": round(time.monotonic() - mas_antigua, 3) if mas_antigua else 0.0,
+        "resultados": _resultados.stats()
+    })
+    return datos
+
+
+# --- Worker ---
+
+def _tomar_lote() -> List[NfcScan]:
+    """Espera la primera lectura y junta las que ya estén en cola (hasta el máximo)"""
+    try:
+        lote = [_cola.get(timeout=settings.ASISTENCIA_COLA_ESPERA_SEGUNDOS)]
+    except queue.Empty:
+        return []
+    while len(lote) < settings.ASISTENCIA_COLA_LOTE_MAX:
+        try:
+            lote.append(_cola.get_nowait())
+        except queue.Empty:
+            break
+    return lote
+
+
+def _procesar_lote(lote: List[NfcScan]) -> None:
+    """Escribe un lote con el motor por lotes y publica los resultados"""
+    inicio = time.perf_counter()
+    try:
+        with Session(engine) as session:
+            resultados = AsistenciaService(session).registrar_lote(lote)["resultados"]
+    except HTTPException as e:
+        # Rechazo de todo el lote (p.ej. sin ciclo activo): no tiene caso reintentar
+        resultados = [
+            {"indice": i, "scan_id": escaneo.scan_id, "nfc_uid": escaneo.nfc_uid,
+             "status": e.status_code, "detail": e.detail}
+            for i, escaneo in enumerate(lote)
+        ]
+        with Session(engine) as session:
+            AsistenciaService(session).guardar_resultados_escaneos(lote, resultados)
+
+    for escaneo, resultado in zip(lote, resultados):
+        _resultados.set(escaneo.scan_id, resultado)
+
+    _escribir_diario([{"evento": "procesado", "scan_id": e.scan_id} for e in lote])
+
+    with _lock:
+        for escaneo in lote:
+            _pendientes.pop(escaneo.scan_id, None)
+            _intentos.pop(escaneo.scan_id, None)
+        _metricas["procesados"] += len(lote)
+        _metricas["lotes"] += 1
+        _metricas["ultimo_lote_tamano"] = len(lote)
+        _metricas["ultimo_lote_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+
+    _truncar_diario_si_vacio()
+
+
+def _descartar(escaneo: NfcScan, error: Exception) -> None:
+    """Publica un error definitivo para la lectura y la marca como procesada en el diario"""
+    api_logger.error(f"Lectura {escaneo.scan_id} descartada tras {settings.ASISTENCIA_COLA_MAX_INTENTOS} intentos: {error}")
+    resultado = {
+        "indice": 0,
+        "scan_id": escaneo.scan_id,
+        "nfc_uid": escaneo.nfc_uid,
+        "status": 500,
+        "detail": "No se pudo registrar la lectura. Intenta de nuevo."
+    }
+    _resultados.set(escaneo.scan_id, resultado)
+    try:
+        with Session(engine) as session:
+            AsistenciaService(session).guardar_resultados_escaneos([escaneo], [resultado])
+    except Exception as e:
+        # El resultado queda solo en la caché de este proceso
+        api_logger.error(f"No se pudo guardar el resultado de la lectura {escaneo.scan_id}: {e}")
+    _escribir_diario([{"evento": "procesado", "scan_id": escaneo.scan_id}])
+    with _lock:
+        _pendientes.pop(escaneo.scan_id, None)
+        _intentos.pop(escaneo.scan_id, None)
+        _metricas["descartados"] += 1
+
+
+def _procesar_aislando(lote: List[NfcScan]) -> bool:
+    """
+    Procesa el lote; si falla lo divide a la mitad y procesa cada parte en
+    orden, así una lectura defectuosa no detiene a las demás. La lectura que
+    falla sola se reintenta antes de seguir con las posteriores.
+    Retorna False si la API se apaga a mitad (lo pendiente sigue en el diario).
+    """
+    try:
+        _procesar_lote(lote)
+        return True
+    except OperationalError:
+        # Error de conexión: no es culpa de ninguna lectura, se reintenta el lote completo
+        raise
+    except Exception as e:
+        with _lock:
+            _metricas["errores"] += 1
+        if len(lote) > 1:
+            mitad = len(lote) // 2
+            return _procesar_aislando(lote[:mitad]) and _procesar_aislando(lote[mitad:])
+
+        escaneo = lote[0]
+        with _lock:
+            intentos = _intentos[escaneo.scan_id] = _intentos.get(escaneo.scan_id, 0) + 1
+        if intentos >= settings.ASISTENCIA_COLA_MAX_INTENTOS:
+            _descartar(escaneo, e)
+            return True
+        api_logger.error(f"Error al registrar la lectura {escaneo.scan_id} (intento {intentos}): {e}")
+        with _lock:
+            _metricas["reintentos"] += 1
+        if _detener.wait(settings.ASISTENCIA_COLA_ESPERA_SEGUNDOS):
+            return False
+        return _procesar_aislando(lote)
+
+
+def _worker() -> None:
+    while not (_detener.is_set() and _cola.empty()):
+        lote = _tomar_lote()
+        if not lote:
+            continue
+        # El mismo lote se reintenta antes de tomar lecturas nuevas para conservar el orden
+        while True:
+            try:
+                if not _procesar_aislando(lote):
+                    # Apagando: el diario conserva las lecturas para el siguiente arranque
+                    return
+                break
+            except Exception as e:
+                # Sin conexión a la BD: las lecturas siguen en el diario y en _pendientes
+                api_logger.error(f"Error al procesar lote de asistencia ({len(lote)} lecturas): {e}")
+                with _lock:
+                    _metricas["errores"] += 1
+                    _metricas["reintentos"] += len(lote)
+            if _detener.wait(settings.ASISTENCIA_COLA_ESPERA_SEGUNDOS):
+                return
+
+
+def iniciar() -> int:
+    """Recupera el diario y arranca el worker. Retorna cuántas lecturas se reencolaron"""
+    global _hilo
+    if _hilo and _hilo.is_alive():
+        return 0
+
+    recuperadas = _recuperar_diario()
+    with _lock:
+        for escaneo in recuperadas:
+            _pendientes[escaneo.scan_id] = time.monotonic()
+    for escaneo in recuperadas:
+        _cola.put(escaneo)
+
+    _detener.clear()
+    _hilo = threading.Thread(target=_worker, name="cola-asistencia", daemon=True)
+    _hilo.start()
+    return len(recuperadas)
+
+
+def detener(timeout: float = 10.0) -> None:
+    """Vacía la cola (hasta `timeout` segundos) y detiene el worker"""
+    _detener.set()
+    if _hilo:
+        _hilo.join(timeout)
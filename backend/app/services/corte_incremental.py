@@ -0,0 +1,117 @@
+# app/services/corte_incremental.py
+"""
+Corte de faltas incremental (nocturno) con marca por ciclo.
+
+Cada ciclo guarda en corte_faltas_ciclo hasta qué día está cortado. Un corte
+incremental procesa solo los días hábiles posteriores a esa marca (hasta
+ayer por defecto) y la avanza al terminar, así el trabajo de cada noche es
+proporcional a un día de datos y no al ciclo completo. Los días hasta la
+marca son finales para el dashboard.
+
+El renglón de la marca se bloquea (FOR UPDATE SKIP LOCKED) durante el corte:
+dos ejecuciones simultáneas del mismo ciclo no procesan el mismo rango.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from app.db.database import engine
+from app.models import CicloEscolar, CorteFaltasCiclo, CorteFaltasCicloRead
+from app.models.utils import get_mexico_date, get_mexico_time
+from app.services import ciclo_activo as ciclo_activo_provider, calendario_escolar
+
+
+def _obtener_ciclo(session: Session, id_ciclo: Optional[int]) -> CicloEscolar:
+    ciclo = (
+        session.get(CicloEscolar, id_ciclo) if id_ciclo is not None
+        else ciclo_activo_provider.obtener_ciclo_activo(session)
+    )
+    if not ciclo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ciclo escolar {id_ciclo} no encontrado" if id_ciclo is not None
+            else "No hay un ciclo escolar activo"
+        )
+    return ciclo
+
+
+def obtener_marca(session: Session, id_ciclo: Optional[int] = None) -> CorteFaltasCicloRead:
+    """Hasta qué día está cortado el ciclo (por defecto el activo) y cuántos días hábiles son finales"""
+    ciclo = _obtener_ciclo(session, id_ciclo)
+    marca = session.get(CorteFaltasCiclo, ciclo.id)
+    corte_hasta = marca.corte_hasta if marca else None
+
+    return CorteFaltasCicloRead(
+        id_ciclo=ciclo.id,
+        corte_hasta=corte_hasta,
+        actualizado=marca.actualizado if marca else None,
+        dias_finales=(
+            calendario_escolar.contar_dias_habiles(session, ciclo.fecha_inicio, corte_hasta, ciclo.id)
+            if corte_hasta else 0
+        )
+    )
+
+
+def procesar(
+    session: Session,
+    id_ciclo: Optional[int] = None,
+    hasta: Optional[date] = None
+) -> dict:
+    """
+    Corta los días posteriores a la marca del ciclo (por defecto el activo)
+    hasta `hasta` (por defecto ayer, sin pasar del fin del ciclo) y avanza la marca.
+    Si el corte falla, la marca no avanza; repetirlo solo agrega lo que faltó.
+    """
+    from app.services.falta_service import FaltaService
+
+    ciclo = _obtener_ciclo(session, id_ciclo)
+    hasta = min(hasta or get_mexico_date() - timedelta(days=1), ciclo.fecha_fin)
+
+    # Sesión propia para la marca: su bloqueo se mantiene aunque el corte confirme por partes
+    with Session(engine) as sesion_marca:
+        sesion_marca.execute(
+            pg_insert(CorteFaltasCiclo)
+            .values(id_ciclo=ciclo.id, actualizado=get_mexico_time())
+            .on_conflict_do_nothing(index_elements=["id_ciclo"])
+        )
+        sesion_marca.commit()
+
+        marca = sesion_marca.exec(
+            select(CorteFaltasCiclo)
+            .where(CorteFaltasCiclo.id_ciclo == ciclo.id)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if marca is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Ya hay un corte incremental en curso para el ciclo {ciclo.id}"
+            )
+
+        desde = marca.corte_hasta + timedelta(days=1) if marca.corte_hasta else ciclo.fecha_inicio
+        if desde > hasta:
+            sesion_marca.rollback()
+            return {
+                "mensaje": "No hay días nuevos para cortar",
+                "id_ciclo": ciclo.id,
+                "corte_hasta": marca.corte_hasta.isoformat() if marca.corte_hasta else None,
+                "dias_habiles": 0,
+                "faltas_nuevas": 0
+            }
+
+        resultado = FaltaService(session).procesar_corte_faltas(
+            fecha_inicio=desde,
+            fecha_fin=hasta,
+            ciclo_id=ciclo.id
+        )
+
+        # Sin días hábiles o sin estudiantes tampoco queda nada por cortar en el rango
+        marca.corte_hasta = hasta
+        marca.actualizado = get_mexico_time()
+        sesion_marca.add(marca)
+        sesion_marca.commit()
+
+    resultado.update({"id_ciclo": ciclo.id, "corte_hasta": hasta.isoformat()})
+    return resultado
@@ -0,0 +1,115 @@
+# app/services/corte_paralelo.py
+"""
+Corte de faltas en paralelo por grupo.
+
+Los estudiantes del ciclo se reparten en particiones (un grupo, dividido en
+trozos de CORTE_LOTE_ESTUDIANTES si es grande) y cada partición se procesa
+en un hilo de un pool acotado a CORTE_PARALELISMO, con su propia sesión y
+conexión a la BD. El pool es del proceso: varios cortes simultáneos
+comparten el mismo límite de conexiones.
+
+Las faltas y las alertas dependen solo de cada estudiante, así que las
+particiones no comparten renglones y el resultado es el mismo que el de un
+corte en serie. Cada partición se confirma por separado: si una falla, las
+demás quedan registradas y repetir el corte solo agrega lo que faltó.
+"""
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date
+from typing import Any, List, Optional
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.database import engine
+from app.models import Estudiante
+
+
+_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _obtener_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.CORTE_PARALELISMO,
+                thread_name_prefix="corte-paralelo"
+            )
+        return _pool
+
+
+def habilitado() -> bool:
+    """Indica si el corte de un ciclo completo se reparte entre varios hilos"""
+    return settings.CORTE_PARALELISMO > 1
+
+
+def particiones(session: Session, id_ciclo: int) -> List[List[str]]:
+    """
+    Matrículas del ciclo agrupadas por grupo (los grupos grandes en trozos),
+    de mayor a menor para repartir mejor la carga entre los hilos.
+    """
+    por_grupo = defaultdict(list)
+    for matricula, id_grupo in session.exec(
+        select(Estudiante.matricula, Estudiante.id_grupo)
+        .where(Estudiante.id_ciclo == id_ciclo)
+        .order_by(Estudiante.matricula)
+    ).all():
+        por_grupo[id_grupo].append(matricula)
+
+    tamano = settings.CORTE_LOTE_ESTUDIANTES
+    resultado = [
+        matriculas[i:i + tamano]
+        for matriculas in por_grupo.values()
+        for i in range(0, len(matriculas), tamano)
+    ]
+    resultado.sort(key=len, reverse=True)
+    return resultado
+
+
+def _procesar_particion(
+    id_ciclo: int,
+    dias_habiles: List[date],
+    matriculas: List[str],
+    usuario: Optional[str]
+) -> List[Any]:
+    from app.services.falta_service import FaltaService
+
+    with Session(engine) as session:
+        nuevas = FaltaService(session).procesar_lote_corte(id_ciclo, dias_habiles, matriculas, usuario)
+        session.commit()
+        return nuevas
+
+
+def procesar(
+    session: Session,
+    id_ciclo: int,
+    dias_habiles: List[date],
+    usuario: Optional[str] = None
+) -> List[Any]:
+    """
+    Registra las faltas del corte de todo el ciclo repartido en el pool.
+    Retorna las filas de las faltas nuevas ordenadas por matrícula y fecha,
+    igual que el corte en serie.
+    """
+    pool = _obtener_pool()
+    futuros = [
+        pool.submit(_procesar_particion, id_ciclo, dias_habiles, matriculas, usuario)
+        for matriculas in particiones(session, id_ciclo)
+    ]
+    # Se espera a todas antes de propagar un error: ninguna queda corriendo tras responder
+    wait(futuros)
+    nuevas = [fila for futuro in futuros for fila in futuro.result()]
+    nuevas.sort(key=lambda falta: (falta.matricula, falta.fecha))
+    return nuevas
+
+
+def detener() -> None:
+    """Espera las particiones en curso y libera el pool (apagado de la API)"""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown(wait=True, cancel_futures=True)
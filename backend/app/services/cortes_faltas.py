@@ -0,0 +1,343 @@
+# app/services/cortes_faltas.py
+"""
+Corte de faltas en segundo plano, por lotes y reanudable.
+
+`enviar()` registra el trabajo en la tabla corte_faltas_job y lo encola; un
+hilo de fondo lo procesa en lotes de CORTE_LOTE_ESTUDIANTES estudiantes en
+orden de matrícula. Cada lote es una transacción: faltas, alertas y punto de
+control (`ultima_matricula` y contadores) se confirman juntos, así un fallo o
+un reinicio a mitad del corte nunca deja un lote a medias y el trabajo
+continúa después del último lote confirmado.
+
+El renglón del trabajo se bloquea con FOR UPDATE SKIP LOCKED mientras se
+procesa un lote, de modo que varios workers de la API pueden reanudar el
+mismo trabajo sin procesar dos veces un lote.
+"""
+import math
+import queue
+import threading
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.core.logging import api_logger
+from app.db.database import engine
+from app.models import CicloEscolar, CorteFaltasJob, CorteFaltasJobRead, Estudiante
+from app.models.utils import get_mexico_time
+from app.services import calendario_escolar
+
+
+ESTADOS_ACTIVOS = ("pendiente", "en_proceso")
+
+_cola: "queue.Queue[int]" = queue.Queue()
+_lock = threading.Lock()
+_hilo: Optional[threading.Thread] = None
+_detener = threading.Event()
+_metricas = {"lotes": 0, "completados": 0, "cancelados": 0, "errores": 0}
+
+
+def _contar(metrica: str) -> None:
+    with _lock:
+        _metricas[metrica] += 1
+
+
+# --- API pública ---
+
+def enviar(
+    session: Session,
+    fecha_inicio,
+    fecha_fin,
+    ciclo_id: int,
+    matricula_estudiante: Optional[str] = None,
+    usuario: Optional[str] = None
+) -> CorteFaltasJobRead:
+    """Valida y registra un corte de faltas y lo encola para el worker"""
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha de fin debe ser posterior a la fecha de inicio"
+        )
+    if not session.get(CicloEscolar, ciclo_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ciclo escolar {ciclo_id} no encontrado"
+        )
+
+    if matricula_estudiante:
+        if not session.get(Estudiante, matricula_estudiante):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Estudiante {matricula_estudiante} no encontrado"
+            )
+        total_estudiantes = 1
+    else:
+        total_estudiantes = session.exec(
+            select(func.count()).select_from(Estudiante).where(Estudiante.id_ciclo == ciclo_id)
+        ).one()
+
+    job = CorteFaltasJob(
+        id_ciclo=ciclo_id,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        matricula_estudiante=matricula_estudiante,
+        usuario=usuario,
+        dias_habiles=calendario_escolar.contar_dias_habiles(session, fecha_inicio, fecha_fin, ciclo_id),
+        total_estudiantes=total_estudiantes,
+        total_lotes=math.ceil(total_estudiantes / settings.CORTE_LOTE_ESTUDIANTES)
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+
+    _iniciar_worker()
+    _cola.put(job.id)
+    return a_lectura(job)
+
+
+def a_lectura(job: CorteFaltasJob, incluir_detalles: bool = False) -> CorteFaltasJobRead:
+    """Estado del trabajo con porcentaje de avance y tiempo restante estimado"""
+    if job.estado == "completado":
+        progreso = 100.0
+    elif job.total_lotes:
+        progreso = round(min(job.lotes_completados / job.total_lotes, 1.0) * 100, 2)
+    else:
+        progreso = 0.0
+
+    eta_segundos = None
+    if job.estado in ESTADOS_ACTIVOS and job.lotes_completados and job.iniciado and job.actualizado:
+        # Promedio por lote de lo ya procesado, aplicado a los lotes restantes
+        transcurrido = (job.actualizado - job.iniciado).total_seconds()
+        restantes = max(job.total_lotes - job.lotes_completados, 0)
+        eta_segundos = round(transcurrido / job.lotes_completados * restantes, 1)
+
+    return CorteFaltasJobRead(
+        **job.model_dump(exclude={"detalles", "ultima_matricula"}),
+        progreso=progreso,
+        eta_segundos=eta_segundos,
+        detalles=job.detalles if incluir_detalles else None
+    )
+
+
+def obtener(session: Session, job_id: int) -> CorteFaltasJob:
+    """Trabajo por ID o 404"""
+    job = session.get(CorteFaltasJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Corte {job_id} no encontrado"
+        )
+    return job
+
+
+def listar(session: Session, limite: int = 50) -> List[CorteFaltasJobRead]:
+    """Trabajos más recientes primero (sin detalles)"""
+    jobs = session.exec(
+        select(CorteFaltasJob).order_by(CorteFaltasJob.id.desc()).limit(limite)
+    ).all()
+    return [a_lectura(job) for job in jobs]
+
+
+def cancelar(session: Session, job_id: int) -> CorteFaltasJobRead:
+    """
+    Cancela un trabajo pendiente o en proceso. Espera a que termine el lote
+    en curso (bloqueo del renglón); los lotes ya confirmados se conservan.
+    """
+    job = session.exec(
+        select(CorteFaltasJob).where(CorteFaltasJob.id == job_id).with_for_update()
+    ).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Corte {job_id} no encontrado"
+        )
+    if job.estado not in ESTADOS_ACTIVOS:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El corte {job_id} ya está {job.estado}"
+        )
+
+    job.estado = "cancelado"
+    job.finalizado = get_mexico_time()
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    _contar("cancelados")
+    return a_lectura(job)
+
+
+def reanudar(session: Session, job_id: int) -> CorteFaltasJobRead:
+    """Reencola un trabajo cancelado o con error; continúa después del último lote confirmado"""
+    job = session.exec(
+        select(CorteFaltasJob).where(CorteFaltasJob.id == job_id).with_for_update()
+    ).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Corte {job_id} no encontrado"
+        )
+    if job.estado not in ("cancelado", "error"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Solo se pueden reanudar cortes cancelados o con error (estado: {job.estado})"
+        )
+
+    job.estado = "pendiente"
+    job.error = None
+    job.finalizado = None
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+
+    _iniciar_worker()
+    _cola.put(job.id)
+    return a_lectura(job)
+
+
+def metricas() -> dict:
+    """Trabajos en cola de este worker y contadores"""
+    with _lock:
+        datos = dict(_metricas)
+    datos.update({
+        "worker_activo": bool(_hilo and _hilo.is_alive()),
+        "en_cola": _cola.qsize()
+    })
+    return datos
+
+
+# --- Worker ---
+
+def _siguiente_lote(session: Session, job: CorteFaltasJob) -> List[str]:
+    """Matrículas del lote siguiente al punto de control (paginación por llave)"""
+    if job.matricula_estudiante:
+        return [job.matricula_estudiante] if job.ultima_matricula is None else []
+
+    statement = select(Estudiante.matricula).where(Estudiante.id_ciclo == job.id_ciclo)
+    if job.ultima_matricula is not None:
+        statement = statement.where(Estudiante.matricula > job.ultima_matricula)
+    return list(session.exec(
+        statement.order_by(Estudiante.matricula).limit(settings.CORTE_LOTE_ESTUDIANTES)
+    ).all())
+
+
+def _finalizar(session: Session, job: CorteFaltasJob, estado: str) -> None:
+    job.estado = estado
+    job.finalizado = job.actualizado = get_mexico_time()
+    session.add(job)
+    session.commit()
+
+
+def _procesar_lote(job_id: int) -> bool:
+    """
+    Procesa y confirma un lote del trabajo.
+    Retorna True si quedan lotes por procesar en este worker.
+    """
+    from app.services.falta_service import FaltaService
+
+    with Session(engine) as session:
+        job = session.exec(
+            select(CorteFaltasJob)
+            .where(CorteFaltasJob.id == job_id)
+            .with_for_update(skip_locked=True)
+        ).first()
+        # Sin renglón: no existe o otro worker procesa un lote en este momento
+        if job is None:
+            return False
+        if job.estado not in ESTADOS_ACTIVOS:
+            return False
+
+        if job.estado == "pendiente":
+            job.estado = "en_proceso"
+            job.iniciado = job.iniciado or get_mexico_time()
+
+        dias_habiles = calendario_escolar.dias_habiles(
+            session, job.fecha_inicio, job.fecha_fin, job.id_ciclo
+        )
+        matriculas = _siguiente_lote(session, job) if dias_habiles else []
+        if not matriculas:
+            _finalizar(session, job, "completado")
+            _contar("completados")
+            return False
+
+        falta_service = FaltaService(session)
+        nuevas = falta_service.procesar_lote_corte(job.id_ciclo, dias_habiles, matriculas, job.usuario)
+
+        # Punto de control en la misma transacción que las faltas del lote
+        job.ultima_matricula = matriculas[-1]
+        job.lotes_completados += 1
+        job.estudiantes_procesados += len(matriculas)
+        job.faltas_nuevas += len(nuevas)
+        job.detalles = (job.detalles or []) + falta_service.detalles_corte(nuevas)
+        job.actualizado = get_mexico_time()
+        session.add(job)
+        session.commit()
+
+    _contar("lotes")
+    return True
+
+
+def _marcar_error(job_id: int, error: Exception) -> None:
+    with Session(engine) as session:
+        job = session.get(CorteFaltasJob, job_id)
+        if job and job.estado in ESTADOS_ACTIVOS:
+            job.error = str(error)[:1000]
+            _finalizar(session, job, "error")
+
+
+def _procesar(job_id: int) -> None:
+    """Procesa el trabajo lote por lote hasta terminar, cancelarse o apagar la API"""
+    while not _detener.is_set():
+        try:
+            if not _procesar_lote(job_id):
+                return
+        except Exception as e:
+            # El lote fallido se revirtió completo; se puede reanudar desde el punto de control
+            api_logger.error(f"Error en el corte de faltas {job_id}: {e}")
+            _contar("errores")
+            try:
+                _marcar_error(job_id, e)
+            except Exception as e2:
+                api_logger.error(f"No se pudo registrar el error del corte {job_id}: {e2}")
+            return
+
+
+def _worker() -> None:
+    while not _detener.is_set():
+        try:
+            job_id = _cola.get(timeout=settings.CORTE_ESPERA_SEGUNDOS)
+        except queue.Empty:
+            continue
+        _procesar(job_id)
+
+
+def _iniciar_worker() -> None:
+    global _hilo
+    with _lock:
+        if _hilo and _hilo.is_alive():
+            return
+        _detener.clear()
+        _hilo = threading.Thread(target=_worker, name="cortes-faltas", daemon=True)
+        _hilo.start()
+
+
+def iniciar() -> int:
+    """Reencola los trabajos pendientes o interrumpidos y arranca el worker. Retorna cuántos"""
+    with Session(engine) as session:
+        pendientes = session.exec(
+            select(CorteFaltasJob.id)
+            .where(CorteFaltasJob.estado.in_(ESTADOS_ACTIVOS))
+            .order_by(CorteFaltasJob.id)
+        ).all()
+
+    _iniciar_worker()
+    for job_id in pendientes:
+        _cola.put(job_id)
+    return len(pendientes)
+
+
+def detener(timeout: float = 10.0) -> None:
+    """Detiene el worker al terminar el lote en curso; el trabajo se reanuda al arrancar"""
+    _detener.set()
+    if _hilo:
+        _hilo.join(timeout)
@@ -0,0 +1,101 @@
+# app/services/dashboard_cache.py
+"""
+Caché en proceso de las respuestas del dashboard.
+
+Las claves son (endpoint, turno, grupo, periodo, ciclo activo) con un TTL
+corto, así varias pestañas abiertas comparten el mismo cálculo.
+
+Invalidación:
+- Cambios de grupos, estudiantes o ciclos: `invalidar()` descarta todo.
+- Registro de asistencias: `marcar_asistencia()` solo avanza una versión;
+  una entrada anterior a esa versión se recalcula en cuanto tiene al menos
+  DASHBOARD_CACHE_EDAD_MINIMA_SEGUNDOS, así una ráfaga de lecturas en la
+  hora de entrada no vuelve a calcular el dashboard en cada tarjeta.
+"""
+import threading
+import time
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+from sqlmodel import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services import ciclo_activo as ciclo_activo_provider
+
+
+class _Entrada(NamedTuple):
+    valor: Any
+    version: int
+    creada: float
+
+
+_cache = TTLCache(
+    max_entries=settings.DASHBOARD_CACHE_MAX_ENTRADAS,
+    ttl_segundos=settings.DASHBOARD_CACHE_TTL_SEGUNDOS
+)
+_lock = threading.Lock()
+_version_asistencia = 0
+_metricas = {"hits": 0, "misses": 0, "invalidaciones": 0, "marcas_asistencia": 0}
+
+
+def _contar(metrica: str) -> None:
+    with _lock:
+        _metricas[metrica] += 1
+
+
+def obtener(
+    session: Session,
+    endpoint: str,
+    cargar: Callable[[], Any],
+    *,
+    turno: Optional[str] = None,
+    grupo: Optional[int] = None,
+    periodo: Optional[str] = None
+) -> Any:
+    """
+    Obtiene la respuesta de `endpoint` desde la caché o la calcula con `cargar`.
+    Las excepciones de `cargar` (p.ej. sin ciclo activo) no se guardan.
+    """
+    ciclo = ciclo_activo_provider.obtener_ciclo_activo(session)
+    clave: Hashable = (endpoint, turno, grupo, periodo, ciclo.id if ciclo else None)
+
+    entrada: Optional[_Entrada] = _cache.get(clave)
+    if entrada is not None and (
+        entrada.version == _version_asistencia
+        or time.monotonic() - entrada.creada < settings.DASHBOARD_CACHE_EDAD_MINIMA_SEGUNDOS
+    ):
+        _contar("hits")
+        return entrada.valor
+
+    _contar("misses")
+    version = _version_asistencia
+    valor = cargar()
+    _cache.set(clave, _Entrada(valor, version, time.monotonic()))
+    return valor
+
+
+def marcar_asistencia() -> None:
+    """Señala que se registraron asistencias (los porcentajes del día cambiaron)"""
+    global _version_asistencia
+    with _lock:
+        _version_asistencia += 1
+        _metricas["marcas_asistencia"] += 1
+
+
+def invalidar() -> None:
+    """Descarta todas las respuestas (grupos, estudiantes, ciclos o calendario cambiaron)"""
+    _cache.clear()
+    _contar("invalidaciones")
+
+
+def stats() -> dict:
+    """Métricas de la caché del dashboard"""
+    with _lock:
+        metricas = dict(_metricas)
+    total = metricas["hits"] + metricas["misses"]
+    return {
+        "entradas": len(_cache),
+        "max_entradas": _cache.max_entries,
+        "ttl_segundos": _cache.ttl_segundos,
+        **metricas,
+        "hit_rate": round(metricas["hits"] / total, 4) if total else 0.0
+    }
@@ -2,17 +2,22 @@
 """
 Servicio de lógica de negocio para Dashboard y estadísticas.
 """
+import base64
 import calendar
 from datetime import datetime, timedelta, date
 from typing import Dict, List, Optional
-from sqlmodel import Session, select, func, distinct
+import numpy as np
+from sqlmodel import Session, select, func, distinct, and_
+from sqlalchemy import extract
 from fastapi import HTTPException, status
 import pytz
 
 from app.models import (
-    Estudiante, Asistencia, NFC, Grupo, CicloEscolar,
-    StatsData, TurnoDataResponse, GrupoAsistenciaResponse
+    Estudiante, Asistencia, AsistenciaDiaria, NFC, Grupo, CicloEscolar,
+    StatsData, TurnoDataResponse, GrupoAsistenciaResponse, CicloEscolarRead
 )
+from app.services import ciclo_activo as ciclo_activo_provider
+from app.services import calendario_escolar
 
 
 class DashboardService:
@@ -26,15 +31,21 @@ class DashboardService:
     # --- MÉTODOS AUXILIARES ---
     
     def get_dias_habiles(self, start_date: date, end_date: date) -> int:
-        """Calcula el número de días hábiles (L-V) en un rango de fechas."""
-        dias_habiles = 0
-        current_date = start_date
-        while current_date <= end_date:
-            # weekday() devuelve 0 para lunes y 6 para domingo
-            if current_date.weekday() < 5: 
-                dias_habiles += 1
-            current_date += timedelta(days=1)
-        return dias_habiles
+        """
+        Días hábiles del rango según el calendario del ciclo activo
+        (lunes a viernes dentro del ciclo, sin días no laborables), en O(1).
+        """
+        return calendario_escolar.contar_dias_habiles(self.session, start_date, end_date)
+
+    def _filtro_dias_habiles(self) -> list:
+        """Condiciones para contar en asistencia_diaria solo los días hábiles del calendario activo"""
+        condiciones = [extract("isodow", AsistenciaDiaria.fecha) < 6]
+        calendario = calendario_escolar.obtener_calendario_activo(self.session)
+        if calendario:
+            condiciones.append(AsistenciaDiaria.fecha.between(calendario.fecha_inicio, calendario.fecha_fin))
+            if calendario.no_laborables:
+                condiciones.append(AsistenciaDiaria.fecha.notin_(sorted(calendario.no_laborables)))
+        return condiciones
     
     def get_asistencia_porcentaje(
         self, 
@@ -61,38 +72,27 @@ class DashboardService:
         if asistencias_posibles == 0:
             return 0.0
 
-        # Contar las asistencias reales
-        subquery = (
-            select(
-                NFC.matricula_estudiante, 
-                func.count(distinct(func.date(Asistencia.timestamp))).label("dias_asistidos")
-            )
-            .join(Asistencia, NFC.nfc_uid == Asistencia.nfc_uid)
+        # Días hábiles asistidos: conteo sobre el resumen asistencia_diaria
+        # (una fila por estudiante y día, cubierto por la llave primaria)
+        total_asistencias_reales = self.session.exec(
+            select(func.count())
+            .select_from(AsistenciaDiaria)
             .where(
-                NFC.matricula_estudiante.in_(estudiantes_ids),
-                Asistencia.tipo == "entrada",
-                func.date(Asistencia.timestamp) >= start_date,
-                func.date(Asistencia.timestamp) <= end_date
+                AsistenciaDiaria.matricula_estudiante.in_(estudiantes_ids),
+                AsistenciaDiaria.asistio == True,  # noqa: E712
+                AsistenciaDiaria.fecha >= start_date,
+                AsistenciaDiaria.fecha <= end_date,
+                *self._filtro_dias_habiles()
             )
-            .group_by(NFC.matricula_estudiante)
-        ).subquery()
-
-        # Sumamos el total de días asistidos por todos los estudiantes
-        total_asistencias_reales_result = self.session.exec(
-            select(func.sum(subquery.c.dias_asistidos))
-        ).first()
-
-        total_asistencias_reales = total_asistencias_reales_result or 0.0
+        ).first() or 0
 
         # Calcular el porcentaje
         porcentaje = (total_asistencias_reales / asistencias_posibles) * 100
         return round(porcentaje, 1)
     
-    def get_ciclo_activo(self) -> CicloEscolar:
-        """Obtiene el ciclo escolar activo"""
-        ciclo_activo = self.session.exec(
-            select(CicloEscolar).where(CicloEscolar.activo == True)
-        ).first()
+    def get_ciclo_activo(self) -> CicloEscolarRead:
+        """Obtiene el ciclo escolar activo (en caché)"""
+        ciclo_activo = ciclo_activo_provider.obtener_ciclo_activo(self.session)
         
         if not ciclo_activo:
             raise HTTPException(
@@ -247,7 +247,7 @@ class DashboardService:
         accesos_hoy = self.session.exec(
             select(func.count(Asistencia.id))
             .where(
-                func.date(Asistencia.timestamp) == hoy,
+                Asistencia.fecha == hoy,
                 Asistencia.tipo == "entrada"
             )
         ).first()
@@ -280,63 +280,227 @@ class DashboardService:
     ) -> dict:
         """
         Obtiene estadísticas de asistencia por períodos (semana, mes, ciclo).
+
+        Una sola consulta: los estudiantes del ciclo (filtrados por grupo o turno
+        en el servidor) unidos a asistencia_diaria, con un conteo FILTER por período.
         """
         ciclo_activo = self.get_ciclo_activo()
-        
-        # Base query para estudiantes
-        estudiantes_query = select(Estudiante).where(Estudiante.id_ciclo == ciclo_activo.id)
-        
-        # Aplicar filtros
-        if grupo_id:
-            estudiantes_query = estudiantes_query.where(Estudiante.id_grupo == grupo_id)
-        elif turno:
-            estudiantes_query = (
-                estudiantes_query
-                .join(Grupo, Estudiante.id_grupo == Grupo.id, isouter=True)
-                .where(Grupo.turno == turno)
-            )
-        
-        estudiantes = self.session.exec(estudiantes_query).all()
-        estudiantes_ids = [e.matricula for e in estudiantes]
-        
-        # Calcular fechas
         hoy = datetime.now(self.MEXICO_TZ).date()
-        
+
         # Semana actual (Lunes a Domingo)
         inicio_semana = hoy - timedelta(days=hoy.weekday())
         fin_semana = inicio_semana + timedelta(days=6)
-        
+
         # Mes actual
         inicio_mes = hoy.replace(day=1)
         ultimo_dia_mes = calendar.monthrange(hoy.year, hoy.month)[1]
         fin_mes = hoy.replace(day=ultimo_dia_mes)
-        
+
         # Ciclo completo
         inicio_ciclo = ciclo_activo.fecha_inicio
         fin_ciclo = ciclo_activo.fecha_fin
-        
-        # Calcular porcentajes de asistencia
-        asistencia_semana = self.get_asistencia_porcentaje(estudiantes_ids, inicio_semana, fin_semana)
-        asistencia_mes = self.get_asistencia_porcentaje(estudiantes_ids, inicio_mes, fin_mes)
-        asistencia_ciclo = self.get_asistencia_porcentaje(estudiantes_ids, inicio_ciclo, fin_ciclo)
-        
-        return {
-            "week": {
-                "porcentaje": asistencia_semana,
-                "inicio": str(inicio_semana),
-                "fin": str(fin_semana),
-                "dias_habiles": self.get_dias_habiles(inicio_semana, fin_semana)
-            },
-            "month": {
-                "porcentaje": asistencia_mes,
-                "inicio": str(inicio_mes),
-                "fin": str(fin_mes),
-                "dias_habiles": self.get_dias_habiles(inicio_mes, fin_mes)
-            },
-            "semester": {
-                "porcentaje": asistencia_ciclo,
-                "inicio": str(inicio_ciclo),
-                "fin": str(fin_ciclo),
-                "dias_habiles": self.get_dias_habiles(inicio_ciclo, fin_ciclo)
+
+        periodos = {
+            "week": (inicio_semana, fin_semana),
+            "month": (inicio_mes, fin_mes),
+            "semester": (inicio_ciclo, fin_ciclo),
+        }
+
+        def dias_en(inicio: date, fin: date):
+            return func.count(AsistenciaDiaria.fecha).filter(
+                AsistenciaDiaria.fecha >= inicio,
+                AsistenciaDiaria.fecha <= fin
+            )
+
+        statement = (
+            select(
+                func.count(distinct(Estudiante.matricula)).label("estudiantes"),
+                *[dias_en(inicio, fin).label(nombre) for nombre, (inicio, fin) in periodos.items()]
+            )
+            .select_from(Estudiante)
+            .outerjoin(
+                AsistenciaDiaria,
+                and_(
+                    AsistenciaDiaria.matricula_estudiante == Estudiante.matricula,
+                    AsistenciaDiaria.id_ciclo == ciclo_activo.id,
+                    AsistenciaDiaria.asistio == True,  # noqa: E712
+                    AsistenciaDiaria.fecha >= min(inicio for inicio, _ in periodos.values()),
+                    AsistenciaDiaria.fecha <= max(fin for _, fin in periodos.values()),
+                    *self._filtro_dias_habiles()
+                )
+            )
+            .where(Estudiante.id_ciclo == ciclo_activo.id)
+        )
+
+        # Aplicar filtros
+        if grupo_id:
+            statement = statement.where(Estudiante.id_grupo == grupo_id)
+        elif turno:
+            statement = (
+                statement
+                .join(Grupo, Estudiante.id_grupo == Grupo.id)
+                .where(Grupo.turno == turno)
+            )
+
+        fila = self.session.exec(statement).one()
+
+        resultado = {}
+        for nombre, (inicio, fin) in periodos.items():
+            dias_habiles = self.get_dias_habiles(inicio, fin)
+            posibles = fila.estudiantes * dias_habiles
+            resultado[nombre] = {
+                "porcentaje": round(getattr(fila, nombre) / posibles * 100, 1) if posibles else 0.0,
+                "inicio": str(inicio),
+                "fin": str(fin),
+                "dias_habiles": dias_habiles
             }
+        return resultado
+
+    # --- HEATMAP ---
+
+    FORMATOS_HEATMAP = ("bits", "rle")
+
+    @staticmethod
+    def matriz_asistencia(
+        filas_estudiante: np.ndarray,
+        fechas: np.ndarray,
+        dias: np.ndarray,
+        total_estudiantes: int
+    ) -> np.ndarray:
+        """
+        Matriz booleana estudiante × día hábil a partir de pares (fila, fecha).
+        `fechas` y `dias` son ordinales; `dias` debe estar ordenado.
+        Las fechas que no son día hábil se descartan.
+        """
+        matriz = np.zeros((total_estudiantes, len(dias)), dtype=bool)
+        if len(fechas) and len(dias):
+            columnas = np.searchsorted(dias, fechas)
+            columnas_validas = np.minimum(columnas, len(dias) - 1)
+            en_calendario = dias[columnas_validas] == fechas
+            matriz[filas_estudiante[en_calendario], columnas[en_calendario]] = True
+        return matriz
+
+    @staticmethod
+    def codificar_bits(matriz: np.ndarray) -> List[str]:
+        """Cada fila empaquetada a bits (MSB primero, 1 = asistió) en base64"""
+        empaquetada = np.packbits(matriz, axis=1)
+        return [base64.b64encode(fila.tobytes()).decode("ascii") for fila in empaquetada]
+
+    @staticmethod
+    def codificar_rle(matriz: np.ndarray) -> List[List[int]]:
+        """
+        Cada fila como longitudes de rachas alternadas, empezando por una
+        racha de faltas (0 si el primer día asistió).
+        """
+        if matriz.shape[1] == 0:
+            return [[] for _ in range(matriz.shape[0])]
+        filas = []
+        for fila in matriz.astype(np.int8):
+            cambios = np.flatnonzero(np.diff(fila)) + 1
+            limites = np.concatenate(([0], cambios, [len(fila)]))
+            rachas = np.diff(limites).tolist()
+            filas.append(([0] + rachas) if fila[0] else rachas)
+        return filas
+
+    def get_grupo_heatmap(
+        self,
+        grupo_id: int,
+        fecha_inicio: Optional[date] = None,
+        fecha_fin: Optional[date] = None,
+        formato: str = "bits"
+    ) -> dict:
+        """
+        Asistencia por estudiante y día hábil de un grupo en el ciclo activo.
+
+        Una consulta trae los estudiantes del grupo con sus días asistidos
+        (asistencia_diaria); la matriz se arma con NumPy sobre los días hábiles
+        del calendario escolar y se devuelve compacta: una fila por estudiante
+        empaquetada a bits (base64) o en rachas (rle), con totales por
+        estudiante y por día.
+        """
+        grupo = self.session.get(Grupo, grupo_id)
+        if not grupo:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Grupo con ID {grupo_id} no encontrado."
+            )
+
+        ciclo_activo = self.get_ciclo_activo()
+        calendario = calendario_escolar.obtener_calendario(self.session, ciclo_activo.id)
+        hoy = datetime.now(self.MEXICO_TZ).date()
+        inicio = fecha_inicio or ciclo_activo.fecha_inicio
+        fin = fecha_fin or min(hoy, ciclo_activo.fecha_fin)
+        if fin < inicio:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La fecha de inicio debe ser anterior a la fecha de fin."
+            )
+
+        dias_habiles = calendario.dias_habiles(inicio, fin)
+
+        filas = self.session.exec(
+            select(
+                Estudiante.matricula,
+                Estudiante.nombre,
+                Estudiante.apellido,
+                AsistenciaDiaria.fecha
+            )
+            .outerjoin(
+                AsistenciaDiaria,
+                and_(
+                    AsistenciaDiaria.matricula_estudiante == Estudiante.matricula,
+                    AsistenciaDiaria.id_ciclo == ciclo_activo.id,
+                    AsistenciaDiaria.asistio == True,  # noqa: E712
+                    AsistenciaDiaria.fecha >= inicio,
+                    AsistenciaDiaria.fecha <= fin
+                )
+            )
+            .where(
+                Estudiante.id_grupo == grupo_id,
+                Estudiante.id_ciclo == ciclo_activo.id
+            )
+            .order_by(Estudiante.apellido, Estudiante.nombre, Estudiante.matricula)
+        ).all()
+
+        estudiantes = []
+        indice: Dict[str, int] = {}
+        pares_fila, pares_fecha = [], []
+        for fila in filas:
+            if fila.matricula not in indice:
+                indice[fila.matricula] = len(estudiantes)
+                estudiantes.append(fila)
+            if fila.fecha is not None:
+                pares_fila.append(indice[fila.matricula])
+                pares_fecha.append(fila.fecha.toordinal())
+
+        matriz = self.matriz_asistencia(
+            np.array(pares_fila, dtype=np.int64),
+            np.array(pares_fecha, dtype=np.int64),
+            np.array([d.toordinal() for d in dias_habiles], dtype=np.int64),
+            len(estudiantes)
+        )
+        por_estudiante = matriz.sum(axis=1)
+        por_dia = matriz.sum(axis=0)
+        codificadas = self.codificar_bits(matriz) if formato == "bits" else self.codificar_rle(matriz)
+        total_dias = len(dias_habiles)
+
+        return {
+            "grupo": {"id": grupo.id, "nombre": grupo.nombre, "turno": grupo.turno},
+            "id_ciclo": ciclo_activo.id,
+            "fecha_inicio": inicio.isoformat(),
+            "fecha_fin": fin.isoformat(),
+            "formato": formato,
+            "dias": [d.isoformat() for d in dias_habiles],
+            "estudiantes": [
+                {
+                    "matricula": e.matricula,
+                    "nombre": f"{e.nombre} {e.apellido}",
+                    "fila": codificadas[i],
+                    "asistencias": int(por_estudiante[i]),
+                    "porcentaje": round(float(por_estudiante[i]) / total_dias * 100, 1) if total_dias else 0.0
+                }
+                for i, e in enumerate(estudiantes)
+            ],
+            "asistencias_por_dia": por_dia.tolist(),
+            "total_asistencias": int(por_estudiante.sum())
         }
@@ -0,0 +1,308 @@
+# app/services/eventos_dashboard.py
+"""
+Eventos en vivo del dashboard (Server-Sent Events) con Postgres LISTEN/NOTIFY.
+
+Cada registro de asistencia publica, dentro de su misma transacción, un
+NOTIFY con los incrementos de contadores (entradas, salidas, presentes y
+presentes por grupo); Postgres lo entrega solo si la transacción se confirma.
+El registro individual lo emite en su misma sentencia SQL
+(SQL_REGISTRAR_MARCA) y el registro por lotes con `publicar_marcas`.
+Cada worker de la API que tenga clientes conectados mantiene un hilo con
+LISTEN y reparte los eventos a sus suscriptores, así todos los workers ven
+las marcas registradas en cualquiera de ellos.
+
+El cliente recibe primero un evento `snapshot` con los contadores completos
+y después eventos `marcas` con incrementos que suma a ese estado (las
+entradas expiradas restan presentes sin contar como salida).
+
+Para que snapshot e incrementos no se encimen ni dejen huecos:
+- el snapshot se toma hasta que LISTEN está activo, así toda marca
+  confirmada después llega como evento;
+- cada evento lleva el id de su transacción (`xid`) y el snapshot guarda la
+  instantánea MVCC con la que se leyó; los eventos de transacciones que el
+  snapshot ya vio se descartan.
+Tras reconectar LISTEN (pudo perder eventos) los clientes se resincronizan.
+"""
+import asyncio
+import json
+import select
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, FrozenSet, Iterable, Optional, Set, Tuple
+
+import pytz
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, func, select as sql_select, text
+
+from app.core.config import settings
+from app.core.logging import api_logger
+from app.db.database import engine
+from app.models import Asistencia
+from app.services import ciclo_activo as ciclo_activo_provider, dashboard_cache
+
+
+CANAL = settings.DASHBOARD_STREAM_CANAL
+SIN_GRUPO = "Sin grupo"
+MEXICO_TZ = pytz.timezone('America/Mexico_City')
+
+
+class _Suscriptor:
+    """Cliente SSE conectado a este worker; su cola vive en el event loop del servidor"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.cola: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=settings.DASHBOARD_STREAM_COLA_MAX)
+        self.desbordado = False
+
+    def entregar(self, evento: dict) -> None:
+        # Se ejecuta en el event loop; un cliente lento se resincroniza con un snapshot
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordado = True
+
+    def resincronizar(self) -> None:
+        # Se ejecuta en el event loop; el siguiente ciclo del stream envía un snapshot
+        self.desbordado = True
+
+    def vaciar(self) -> None:
+        """Descarta los eventos en cola: los confirmados hasta aquí los incluye el snapshot que sigue"""
+        while not self.cola.empty():
+            self.cola.get_nowait()
+        self.desbordado = False
+
+
+_suscriptores: Set[_Suscriptor] = set()
+_lock = threading.Lock()
+_hilo: Optional[threading.Thread] = None
+_detener = threading.Event()
+_escuchando = threading.Event()  # LISTEN activo en la conexión del hilo
+_metricas = {"eventos_recibidos": 0, "reconexiones": 0}
+
+
+# --- Publicación ---
+
+def publicar_marcas(session: Session, marcas: Iterable[Tuple[str, Optional[str]]]) -> None:
+    """
+    Publica un evento con los incrementos de las marcas (tipo, grupo) de un lote.
+    Una entrada expirada cierra la sesión abierta: resta un presente sin contar salida.
+    Debe llamarse antes del commit: el NOTIFY se entrega al confirmar la transacción.
+    El evento lleva el id de la transacción (`xid`) para compararlo con el snapshot.
+    """
+    entradas = salidas = expiradas = 0
+    grupos = defaultdict(int)
+    for tipo, grupo in marcas:
+        if tipo == "entrada":
+            entradas += 1
+            grupos[grupo or SIN_GRUPO] += 1
+        elif tipo == "salida":
+            salidas += 1
+            grupos[grupo or SIN_GRUPO] -= 1
+        elif tipo == "expirada":
+            expiradas += 1
+            grupos[grupo or SIN_GRUPO] -= 1
+
+    if not entradas and not salidas and not expiradas:
+        return
+
+    evento = {
+        "entradas": entradas,
+        "salidas": salidas,
+        "expiradas": expiradas,
+        "presentes": entradas - salidas - expiradas,
+        "grupos": dict(grupos)
+    }
+    session.execute(
+        text(
+            "SELECT pg_notify(:canal, (CAST(:payload AS jsonb) "
+            "|| jsonb_build_object('xid', pg_current_xact_id()::text::bigint))::text)"
+        ),
+        {"canal": CANAL, "payload": json.dumps(evento, ensure_ascii=False)}
+    )
+
+
+# --- Escucha (un hilo por worker) ---
+
+def _distribuir(evento: dict) -> None:
+    # Las marcas de otros workers también cambian los porcentajes en caché
+    dashboard_cache.marcar_asistencia()
+    with _lock:
+        _metricas["eventos_recibidos"] += 1
+        suscriptores = list(_suscriptores)
+    for suscriptor in suscriptores:
+        suscriptor.loop.call_soon_threadsafe(suscriptor.entregar, evento)
+
+
+def _escuchar() -> None:
+    while not _detener.is_set():
+        conexion = None
+        try:
+            # Conexión propia fuera del pool: queda ocupada con LISTEN
+            conexion = engine.raw_connection()
+            conexion.detach()
+            pg = conexion.driver_connection
+            pg.autocommit = True
+            with pg.cursor() as cursor:
+                cursor.execute(f"LISTEN {CANAL};")
+
+            # Sin LISTEN pudieron perderse eventos: los clientes conectados toman otro snapshot
+            with _lock:
+                suscriptores = list(_suscriptores)
+            for suscriptor in suscriptores:
+                suscriptor.loop.call_soon_threadsafe(suscriptor.resincronizar)
+            _escuchando.set()
+
+            while not _detener.is_set():
+                if select.select([pg], [], [], 1.0) == ([], [], []):
+                    continue
+                pg.poll()
+                while pg.notifies:
+                    notificacion = pg.notifies.pop(0)
+                    try:
+                        _distribuir(json.loads(notificacion.payload))
+                    except json.JSONDecodeError:
+                        api_logger.error(f"Evento de dashboard inválido: {notificacion.payload!r}")
+        except Exception as e:
+            _escuchando.clear()
+            api_logger.error(f"Error en LISTEN {CANAL}, reconectando: {e}")
+            with _lock:
+                _metricas["reconexiones"] += 1
+            _detener.wait(settings.DASHBOARD_STREAM_RECONEXION_SEGUNDOS)
+        finally:
+            _escuchando.clear()
+            if conexion is not None:
+                try:
+                    conexion.close()
+                except Exception:
+                    pass
+
+
+def _iniciar_escucha() -> None:
+    global _hilo
+    with _lock:
+        if _hilo and _hilo.is_alive():
+            return
+        _detener.clear()
+        _hilo = threading.Thread(target=_escuchar, name="eventos-dashboard", daemon=True)
+        _hilo.start()
+
+
+def detener() -> None:
+    """Detiene el hilo de escucha (apagado de la API)"""
+    _detener.set()
+    if _hilo:
+        _hilo.join(timeout=5)
+
+
+def metricas() -> dict:
+    """Clientes conectados a este worker y estado de la escucha"""
+    with _lock:
+        datos = dict(_metricas)
+        datos["clientes"] = len(_suscriptores)
+    datos["escuchando"] = bool(_hilo and _hilo.is_alive())
+    return datos
+
+
+# --- Stream SSE ---
+
+Instantanea = Tuple[int, int, FrozenSet[int]]  # (xmin, xmax, transacciones en curso)
+
+
+def _leer_instantanea(texto: str) -> Instantanea:
+    """Interpreta pg_current_snapshot() ('xmin:xmax:xid1,xid2,...')"""
+    xmin, xmax, en_curso = texto.split(":")
+    return int(xmin), int(xmax), frozenset(int(xid) for xid in en_curso.split(",") if xid)
+
+
+def _visto_en(xid: Optional[int], instantanea: Optional[Instantanea]) -> bool:
+    """Indica si la transacción `xid` ya estaba confirmada para la instantánea del snapshot"""
+    if xid is None or instantanea is None:
+        return False
+    xmin, xmax, en_curso = instantanea
+    if xid < xmin:
+        return True
+    if xid >= xmax:
+        return False
+    return xid not in en_curso
+
+
+def snapshot() -> Tuple[dict, Optional[Instantanea]]:
+    """
+    Contadores completos de hoy: entradas, salidas y presentes (total y por grupo),
+    con la instantánea MVCC con la que se leyeron (None si no hay datos).
+    """
+    from app.services.asistencia_service import AsistenciaService
+
+    with Session(engine) as session:
+        # Todas las consultas ven la misma instantánea que se devuelve
+        session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        instantanea = _leer_instantanea(
+            session.execute(text("SELECT pg_current_snapshot()::text")).scalar_one()
+        )
+        try:
+            presentes = AsistenciaService(session).obtener_presentes()
+        except HTTPException as e:
+            return {"detail": e.detail}, None
+
+        ciclo = ciclo_activo_provider.obtener_ciclo_activo(session)
+        hoy = datetime.now(MEXICO_TZ).date()
+        fila = session.exec(
+            sql_select(
+                func.count().filter(Asistencia.tipo == "entrada").label("entradas"),
+                func.count().filter(Asistencia.tipo == "salida").label("salidas")
+            )
+            .where(Asistencia.id_ciclo == ciclo.id, Asistencia.fecha == hoy)
+        ).one()
+
+    return {
+        "timestamp": presentes["timestamp"],
+        "entradas": fila.entradas,
+        "salidas": fila.salidas,
+        "presentes": presentes["total"],
+        "grupos": {g["grupo"] or SIN_GRUPO: g["presentes"] for g in presentes["por_grupo"]}
+    }, instantanea
+
+
+def _sse(evento: str, datos: dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _tomar_snapshot(suscriptor: _Suscriptor) -> Tuple[dict, Optional[Instantanea]]:
+    """Espera a que LISTEN esté activo, descarta la cola del cliente y toma el snapshot"""
+    await run_in_threadpool(_escuchando.wait, settings.DASHBOARD_STREAM_RECONEXION_SEGUNDOS)
+    suscriptor.vaciar()
+    return await run_in_threadpool(snapshot)
+
+
+async def stream(request: Request) -> AsyncIterator[str]:
+    """Genera el stream SSE de un cliente: snapshot inicial, marcas y latidos"""
+    suscriptor = _Suscriptor(asyncio.get_running_loop())
+    with _lock:
+        _suscriptores.add(suscriptor)
+    _iniciar_escucha()
+
+    try:
+        datos, instantanea = await _tomar_snapshot(suscriptor)
+        yield _sse("snapshot", datos)
+        while not await request.is_disconnected():
+            if suscriptor.desbordado:
+                datos, instantanea = await _tomar_snapshot(suscriptor)
+                yield _sse("snapshot", datos)
+                continue
+            try:
+                evento = await asyncio.wait_for(
+                    suscriptor.cola.get(), timeout=settings.DASHBOARD_STREAM_LATIDO_SEGUNDOS
+                )
+            except asyncio.TimeoutError:
+                # Comentario SSE: mantiene viva la conexión a través de proxies
+                yield ": latido\n\n"
+                continue
+            if _visto_en(evento.get("xid"), instantanea):
+                # Ya incluido en el snapshot
+                continue
+            yield _sse("marcas", evento)
+    finally:
+        with _lock:
+            _suscriptores.discard(suscriptor)
@@ -0,0 +1,145 @@
+# app/services/exportacion.py
+"""
+Exportación en streaming del historial de asistencias y faltas (CSV o NDJSON).
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se envían
+en bloques conforme llegan, así que la memoria no depende del número de filas.
+Cada exportación abre su propia sesión: la respuesta se sigue enviando
+después de que termina la petición y su sesión de dependencia.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Iterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.database import engine
+from app.models import Asistencia, Estudiante, Falta, Grupo
+
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def query_asistencias(
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    id_grupo: Optional[int] = None,
+    id_ciclo: Optional[int] = None
+):
+    """Entradas y salidas con datos del estudiante, en orden cronológico"""
+    statement = (
+        select(
+            Asistencia.id,
+            Asistencia.id_ciclo,
+            Asistencia.fecha,
+            Asistencia.timestamp,
+            Asistencia.tipo,
+            Asistencia.es_valida,
+            Asistencia.entrada_relacionada_id,
+            Estudiante.matricula,
+            Estudiante.nombre,
+            Estudiante.apellido,
+            Grupo.nombre.label("grupo")
+        )
+        .join(Estudiante, Estudiante.matricula == Asistencia.matricula_estudiante)
+        .outerjoin(Grupo, Grupo.id == Estudiante.id_grupo)
+    )
+    if fecha_inicio:
+        statement = statement.where(Asistencia.fecha >= fecha_inicio)
+    if fecha_fin:
+        statement = statement.where(Asistencia.fecha <= fecha_fin)
+    if id_grupo:
+        statement = statement.where(Estudiante.id_grupo == id_grupo)
+    if id_ciclo:
+        statement = statement.where(Asistencia.id_ciclo == id_ciclo)
+    return statement.order_by(Asistencia.timestamp, Asistencia.id)
+
+
+def query_faltas(
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    id_grupo: Optional[int] = None,
+    id_ciclo: Optional[int] = None
+):
+    """Faltas con datos del estudiante, en orden cronológico"""
+    statement = (
+        select(
+            Falta.id,
+            Falta.id_ciclo,
+            Falta.fecha,
+            Falta.estado,
+            Falta.id_justificacion,
+            Estudiante.matricula,
+            Estudiante.nombre,
+            Estudiante.apellido,
+            Grupo.nombre.label("grupo")
+        )
+        .join(Estudiante, Estudiante.matricula == Falta.matricula_estudiante)
+        .outerjoin(Grupo, Grupo.id == Estudiante.id_grupo)
+    )
+    if fecha_inicio:
+        statement = statement.where(Falta.fecha >= fecha_inicio)
+    if fecha_fin:
+        statement = statement.where(Falta.fecha <= fecha_fin)
+    if id_grupo:
+        statement = statement.where(Estudiante.id_grupo == id_grupo)
+    if id_ciclo:
+        statement = statement.where(Falta.id_ciclo == id_ciclo)
+    return statement.order_by(Falta.fecha, Falta.id)
+
+
+def _valor(valor: Any) -> Any:
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _bloque_csv(filas: List[Any]) -> str:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for fila in filas:
+        escritor.writerow(["" if v is None else _valor(v) for v in fila])
+    return buffer.getvalue()
+
+
+def _bloque_ndjson(filas: List[Any]) -> str:
+    return "".join(
+        json.dumps({k: _valor(v) for k, v in fila._mapping.items()}, ensure_ascii=False) + "\n"
+        for fila in filas
+    )
+
+
+def exportar(statement, formato: str) -> Iterator[str]:
+    """
+    Genera la exportación por bloques de EXPORTACION_FILAS_POR_BLOQUE filas.
+    En CSV el encabezado se envía antes de ejecutar la consulta, así el
+    cliente recibe los primeros bytes de inmediato.
+    """
+    escribir = _bloque_csv if formato == "csv" else _bloque_ndjson
+    por_bloque = settings.EXPORTACION_FILAS_POR_BLOQUE
+
+    if formato == "csv":
+        encabezado = io.StringIO()
+        csv.writer(encabezado).writerow([c.key for c in statement.selected_columns])
+        yield encabezado.getvalue()
+
+    with Session(engine) as session:
+        resultado = session.exec(statement.execution_options(yield_per=por_bloque))
+        for bloque in resultado.partitions(por_bloque):
+            yield escribir(bloque)
+
+
+def respuesta(statement, formato: str, nombre: str) -> StreamingResponse:
+    """Respuesta en streaming con el archivo `<nombre>.<formato>` como adjunto"""
+    return StreamingResponse(
+        exportar(statement, formato),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'}
+    )
@@ -3,12 +3,14 @@
 Servicio de lógica de negocio para Faltas con sistema de corte automático.
 """
 from typing import List, Optional, Dict
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from sqlmodel import Session, select, func, and_
 from fastapi import HTTPException, status
 
-from app.models import Falta, FaltaCreate, FaltaUpdate, Estudiante, CicloEscolar, Asistencia
+from app.models import Falta, FaltaCreate, FaltaUpdate, Estudiante, CicloEscolar, Asistencia, Grupo
 from app.repositories.falta_repo import FaltaRepository
+from app.services import ciclo_activo as ciclo_activo_provider, calendario_escolar, corte_paralelo
+from app.services.asistencia_service import AsistenciaService
 
 
 class FaltaService:
@@ -25,38 +27,20 @@ class FaltaService:
         self.falta_repo = FaltaRepository(session)
     
     @staticmethod
-    def es_dia_habil(fecha: date) -> bool:
+    def calcular_porcentaje_permanencia(entrada: datetime, salida: datetime) -> float:
         """
-        Verifica si una fecha es día hábil (Lunes a Viernes).
-        Retorna False para sábados (5) y domingos (6).
+        Calcula el porcentaje de permanencia basado en las horas esperadas.
         """
-        return fecha.weekday() < 5  # 0=Lunes, 4=Viernes, 5=Sábado, 6=Domingo
+        duracion = AsistenciaService.calcular_duracion_minutos(entrada, salida)
+        return FaltaService.porcentaje_de_duracion(duracion)
     
     @staticmethod
-    def obtener_dias_habiles_rango(fecha_inicio: date, fecha_fin: date) -> List[date]:
+    def porcentaje_de_duracion(duracion_minutos: int) -> float:
         """
-        Obtiene lista de días hábiles en un rango de fechas.
-        Excluye sábados y domingos.
-        """
-        dias_habiles = []
-        fecha_actual = fecha_inicio
-        
-        while fecha_actual <= fecha_fin:
-            if FaltaService.es_dia_habil(fecha_actual):
-                dias_habiles.append(fecha_actual)
-            fecha_actual += timedelta(days=1)
-        
-        return dias_habiles
-    
-    @staticmethod
-    def calcular_porcentaje_permanencia(entrada: datetime, salida: datetime) -> float:
+        Porcentaje de permanencia a partir de duracion_minutos de la salida
+        (la misma duración guardada al registrarla).
         """
-        Calcula el porcentaje de permanencia basado en las horas esperadas.
-        """
-        tiempo_permanencia = salida - entrada
-        horas_permanencia = tiempo_permanencia.total_seconds() / 3600
-        
-        porcentaje = (horas_permanencia / FaltaService.HORAS_ESPERADAS) * 100
+        porcentaje = (duracion_minutos / 60 / FaltaService.HORAS_ESPERADAS) * 100
         return round(porcentaje, 2)
     
     def obtener_dias_con_asistencia(
@@ -71,20 +55,16 @@ class FaltaService:
         Solo verifica si hay una entrada válida, sin calcular porcentaje de permanencia.
         """
         try:
-            # Convertir fechas a datetime para comparación consistente
-            # Las fechas en la BD son timezone-naive (México), así que usamos datetime naive
-            fecha_inicio_dt = datetime.combine(fecha_inicio, datetime.min.time())
-            fecha_fin_dt = datetime.combine(fecha_fin, datetime.max.time())
-            
             # Obtener entradas válidas del periodo para el ciclo específico
+            # (filtra por la fecha local persistida, cubierta por índice)
             statement = select(Asistencia).where(
                 and_(
                     Asistencia.matricula_estudiante == matricula,
                     Asistencia.id_ciclo == ciclo_id,
                     Asistencia.tipo == "entrada",
                     Asistencia.es_valida == True,
-                    Asistencia.timestamp >= fecha_inicio_dt,
-                    Asistencia.timestamp <= fecha_fin_dt
+                    Asistencia.fecha >= fecha_inicio,
+                    Asistencia.fecha <= fecha_fin
                 )
             ).order_by(Asistencia.timestamp)
             
@@ -93,8 +73,8 @@ class FaltaService:
             dias_asistencia = {}
             
             for entrada in entradas:
-                # Extraer solo la fecha del timestamp
-                fecha_entrada = entrada.timestamp.date()
+                # Fecha local persistida de la entrada
+                fecha_entrada = entrada.fecha
                 
                 # Buscar la salida correspondiente
                 salida = self.session.exec(
@@ -133,10 +113,16 @@ class FaltaService:
         """
         Procesa el corte de faltas para un periodo.
         
-        Lógica:
-        1. Obtiene días hábiles del periodo (Lunes a Viernes)
-        2. Para cada estudiante, verifica si tiene entrada registrada
-        3. Si no tiene entrada: Marca falta y genera/actualiza alerta
+        Lógica (en bloque):
+        1. Obtiene días hábiles del periodo del calendario del ciclo
+           (Lunes a Viernes, sin días no laborables)
+        2. Inserta en una sola sentencia las faltas de (estudiantes × días hábiles)
+           sin entrada válida; las faltas ya registradas se omiten
+        3. Actualiza o crea las alertas de los estudiantes afectados en bloque
+        
+        Un solo estudiante se procesa en una transacción; el ciclo completo se
+        reparte por grupo entre CORTE_PARALELISMO hilos (ver corte_paralelo),
+        con una transacción por partición.
         
         Args:
             fecha_inicio: Fecha de inicio del corte
@@ -147,10 +133,8 @@ class FaltaService:
         Returns:
             Diccionario con estadísticas del corte
         """
-        from app.services.alerta_service import AlertaService
-        
-        # Obtener días hábiles del periodo
-        dias_habiles = self.obtener_dias_habiles_rango(fecha_inicio, fecha_fin)
+        # Obtener días hábiles del periodo (calendario precalculado del ciclo)
+        dias_habiles = calendario_escolar.dias_habiles(self.session, fecha_inicio, fecha_fin, ciclo_id)
         
         if not dias_habiles:
             return {
@@ -158,18 +142,20 @@ class FaltaService:
                 "dias_habiles": 0
             }
         
-        # Obtener estudiantes a procesar
+        # Estudiantes a procesar
         if matricula_estudiante:
-            estudiantes = [self.session.get(Estudiante, matricula_estudiante)]
-            if not estudiantes[0]:
+            if not self.session.get(Estudiante, matricula_estudiante):
                 return {"error": f"Estudiante {matricula_estudiante} no encontrado"}
+            matriculas = [matricula_estudiante]
+            total_estudiantes = 1
         else:
-            # Obtener todos los estudiantes del ciclo especificado
-            statement = select(Estudiante).where(Estudiante.id_ciclo == ciclo_id)
-            estudiantes = list(self.session.exec(statement).all())
+            matriculas = None
+            total_estudiantes = self.session.exec(
+                select(func.count()).select_from(Estudiante).where(Estudiante.id_ciclo == ciclo_id)
+            ).one()
         
         # Verificar si hay estudiantes en el ciclo
-        if not estudiantes:
+        if not total_estudiantes:
             return {
                 "error": f"No hay estudiantes registrados en el ciclo {ciclo_id}",
                 "fecha_inicio": fecha_inicio.isoformat(),
@@ -179,146 +165,170 @@ class FaltaService:
                 "faltas_nuevas": 0
             }
         
-        # Estadísticas del corte
-        stats = {
+        if matriculas is None and corte_paralelo.habilitado():
+            # Ciclo completo: particiones por grupo en paralelo, cada una con su conexión
+            nuevas = corte_paralelo.procesar(self.session, ciclo_id, dias_habiles)
+        else:
+            nuevas = self.procesar_lote_corte(ciclo_id, dias_habiles, matriculas)
+            self.session.commit()
+        
+        return {
             "fecha_inicio": fecha_inicio.isoformat(),
             "fecha_fin": fecha_fin.isoformat(),
             "dias_habiles": len(dias_habiles),
-            "estudiantes_procesados": 0,
-            "faltas_nuevas": 0,
+            "estudiantes_procesados": total_estudiantes,
+            "faltas_nuevas": len(nuevas),
             "asistencias_menores_10_porciento": 0,  # Mantener para compatibilidad, siempre será 0
-            "detalles": []
+            "detalles": self.detalles_corte(nuevas)
         }
+    
+    def procesar_lote_corte(
+        self,
+        ciclo_id: int,
+        dias_habiles: List[date],
+        matriculas: Optional[List[str]] = None,
+        usuario: Optional[str] = None
+    ) -> List:
+        """
+        Registra las faltas de un lote del corte (todo el ciclo si matriculas es None)
+        y actualiza las alertas de los afectados. No hace commit: el llamador
+        confirma el lote junto con su punto de control.
         
-        for estudiante in estudiantes:
-            # Obtener asistencias del estudiante para este ciclo
-            dias_con_asistencia = self.obtener_dias_con_asistencia(
-                estudiante.matricula, fecha_inicio, fecha_fin, ciclo_id
-            )
-            
-            # Obtener TODAS las faltas existentes del estudiante en el periodo Y ciclo de una sola vez
-            faltas_existentes_query = select(Falta.fecha).where(
-                and_(
-                    Falta.matricula_estudiante == estudiante.matricula,
-                    Falta.id_ciclo == ciclo_id,
-                    Falta.fecha >= fecha_inicio,
-                    Falta.fecha <= fecha_fin
-                )
-            )
-            fechas_con_falta = set(self.session.exec(faltas_existentes_query).all())
-            
-            faltas_estudiante = 0
-            faltas_a_crear = []
-            
-            # Procesar cada día hábil
-            for dia in dias_habiles:
-                # Si ya existe falta o hay asistencia, omitir
-                if dia in fechas_con_falta or dia in dias_con_asistencia:
-                    continue
-                
-                # Crear falta (sin guardar aún)
-                falta = Falta(
-                    matricula_estudiante=estudiante.matricula,
-                    id_ciclo=ciclo_id,
-                    fecha=dia,
-                    estado="Sin justificar"
-                )
-                faltas_a_crear.append(falta)
-                faltas_estudiante += 1
-            
-            # Guardar todas las faltas del estudiante de una vez
-            if faltas_a_crear:
-                from sqlalchemy.exc import IntegrityError
-                faltas_guardadas = 0
-                
-                for falta in faltas_a_crear:
-                    try:
-                        self.session.add(falta)
-                        self.session.flush()  # Intentar guardar esta falta
-                        
-                        # Si se guardó exitosamente, procesar alerta
-                        AlertaService.procesar_nueva_falta(self.session, falta)
-                        faltas_guardadas += 1
-                        
-                    except IntegrityError:
-                        # Si ya existe, hacer rollback de esta falta específica y continuar
-                        self.session.rollback()
-                        continue
-                
-                if faltas_guardadas > 0:
-                    stats["faltas_nuevas"] += faltas_guardadas
-                    stats["detalles"].append({
-                        "matricula": estudiante.matricula,
-                        "nombre": f"{estudiante.nombre} {estudiante.apellido}",
-                        "faltas_nuevas": faltas_guardadas,
-                        "asistencias_menores_10_porciento": 0
-                    })
-            
-            stats["estudiantes_procesados"] += 1
-        
-        self.session.commit()
+        Returns:
+            Filas de las faltas nuevas (matricula, fecha, nombre, apellido)
+        """
+        from app.services.alerta_service import AlertaService
         
-        return stats
+        nuevas = self.falta_repo.crear_faltas_de_corte(ciclo_id, dias_habiles, matriculas)
+        AlertaService.procesar_faltas_de_corte(self.session, ciclo_id, nuevas, usuario)
+        return nuevas
+    
+    @staticmethod
+    def detalles_corte(nuevas: List) -> List[Dict]:
+        """Faltas nuevas por estudiante (las filas vienen ordenadas por matrícula y fecha)"""
+        detalles: Dict[str, Dict] = {}
+        for falta in nuevas:
+            detalle = detalles.setdefault(falta.matricula, {
+                "matricula": falta.matricula,
+                "nombre": f"{falta.nombre} {falta.apellido}",
+                "faltas_nuevas": 0,
+                "asistencias_menores_10_porciento": 0
+            })
+            detalle["faltas_nuevas"] += 1
+        return list(detalles.values())
     
     def obtener_reporte_asistencias_periodo(
         self,
         fecha_inicio: date,
         fecha_fin: date,
-        matricula_estudiante: str = None
+        matricula_estudiante: str = None,
+        ciclo_id: Optional[int] = None
     ) -> List[Dict]:
         """
-        Genera reporte de asistencias para un periodo.
-        Útil para revisar antes de hacer el corte.
+        Vista previa del corte (sin escrituras) para el ciclo (por defecto el activo).
+        
+        Con tres consultas en bloque (estudiantes del ciclo, pares (matrícula, fecha)
+        con entrada válida y faltas ya registradas del rango) arma por estudiante un
+        mapa de bits sobre los días hábiles del calendario. Las faltas nuevas son
+        los días sin entrada válida ni falta registrada: exactamente las que el
+        corte crearía.
         """
-        dias_habiles = self.obtener_dias_habiles_rango(fecha_inicio, fecha_fin)
+        ciclo = (
+            self.session.get(CicloEscolar, ciclo_id) if ciclo_id is not None
+            else ciclo_activo_provider.obtener_ciclo_activo(self.session)
+        )
+        if not ciclo:
+            return []
         
-        # Obtener estudiantes
-        if matricula_estudiante:
-            estudiantes = [self.session.get(Estudiante, matricula_estudiante)]
-        else:
-            statement = select(Estudiante)
-            estudiantes = list(self.session.exec(statement).all())
+        dias_habiles = calendario_escolar.dias_habiles(self.session, fecha_inicio, fecha_fin, ciclo.id)
+        total_dias_habiles = len(dias_habiles)
+        # Bit i de cada mapa = i-ésimo día hábil del rango
+        indice_dia = {dia: i for i, dia in enumerate(dias_habiles)}
+        todos = (1 << total_dias_habiles) - 1
         
-        reporte = []
+        # 1. Estudiantes del ciclo con su grupo
+        statement = (
+            select(Estudiante.matricula, Estudiante.nombre, Estudiante.apellido, Grupo.nombre)
+            .outerjoin(Grupo, Grupo.id == Estudiante.id_grupo)
+            .where(Estudiante.id_ciclo == ciclo.id)
+            .order_by(Estudiante.matricula)
+        )
+        if matricula_estudiante:
+            statement = statement.where(Estudiante.matricula == matricula_estudiante)
+        estudiantes = self.session.exec(statement).all()
         
-        for estudiante in estudiantes:
-            # Obtener ciclo activo para el reporte
-            ciclo_activo = self.session.exec(
-                select(CicloEscolar).where(CicloEscolar.activo == True)
-            ).first()
-            
-            if not ciclo_activo:
-                continue
+        asistencias: Dict[str, int] = {}
+        registradas: Dict[str, int] = {}
+        if estudiantes and total_dias_habiles:
+            matriculas_ciclo = select(Estudiante.matricula).where(Estudiante.id_ciclo == ciclo.id)
+            if matricula_estudiante:
+                matriculas_ciclo = matriculas_ciclo.where(Estudiante.matricula == matricula_estudiante)
             
-            dias_con_asistencia = self.obtener_dias_con_asistencia(
-                estudiante.matricula, fecha_inicio, fecha_fin, ciclo_activo.id
+            # 2. Días con entrada válida (mismo criterio que el corte)
+            asistencias = self._mapas_de_bits(
+                select(Asistencia.matricula_estudiante, Asistencia.fecha)
+                .where(
+                    Asistencia.id_ciclo == ciclo.id,
+                    Asistencia.tipo == "entrada",
+                    Asistencia.es_valida == True,
+                    Asistencia.fecha >= dias_habiles[0],
+                    Asistencia.fecha <= dias_habiles[-1],
+                    Asistencia.matricula_estudiante.in_(matriculas_ciclo)
+                )
+                .distinct(),
+                indice_dia
             )
             
-            # Contar asistencias (cualquier día con entrada)
-            asistencias_validas = len(dias_con_asistencia)
-            
-            # Calcular faltas pendientes
-            faltas_sin_registrar = len(dias_habiles) - asistencias_validas
+            # 3. Faltas ya registradas (el corte las omite)
+            registradas = self._mapas_de_bits(
+                select(Falta.matricula_estudiante, Falta.fecha)
+                .where(
+                    Falta.fecha >= dias_habiles[0],
+                    Falta.fecha <= dias_habiles[-1],
+                    Falta.matricula_estudiante.in_(matriculas_ciclo)
+                ),
+                indice_dia
+            )
+        
+        reporte = []
+        for matricula, nombre, apellido, grupo in estudiantes:
+            asistio = asistencias.get(matricula, 0)
+            sin_asistencia = todos & ~asistio
+            nuevas = sin_asistencia & ~registradas.get(matricula, 0)
+            asistencias_validas = asistio.bit_count()
             
-            # Calcular porcentaje
             porcentaje_asistencia = (
-                (asistencias_validas / len(dias_habiles) * 100) 
-                if dias_habiles else 0
+                (asistencias_validas / total_dias_habiles * 100)
+                if total_dias_habiles else 0
             )
             
             reporte.append({
-                "matricula": estudiante.matricula,
-                "nombre": f"{estudiante.nombre} {estudiante.apellido}",
-                "grupo": estudiante.grupo.nombre if estudiante.grupo else "Sin grupo",
-                "dias_habiles": len(dias_habiles),
+                "matricula": matricula,
+                "nombre": f"{nombre} {apellido}",
+                "grupo": grupo or "Sin grupo",
+                "dias_habiles": total_dias_habiles,
                 "asistencias_validas": asistencias_validas,
                 "asistencias_menores_10_porciento": 0,  # Ya no se usa
-                "faltas_pendientes": faltas_sin_registrar,
+                "faltas_pendientes": sin_asistencia.bit_count(),
+                "faltas_registradas": (sin_asistencia & ~nuevas).bit_count(),
+                "faltas_nuevas": nuevas.bit_count(),
+                "fechas_faltas_nuevas": [
+                    dia.isoformat() for i, dia in enumerate(dias_habiles) if nuevas >> i & 1
+                ],
                 "porcentaje_asistencia": round(porcentaje_asistencia, 2)
             })
         
         return reporte
     
+    def _mapas_de_bits(self, statement, indice_dia: Dict[date, int]) -> Dict[str, int]:
+        """Mapa de bits por matrícula de los pares (matrícula, fecha) de la consulta"""
+        mapas: Dict[str, int] = {}
+        for matricula, fecha in self.session.exec(statement).all():
+            i = indice_dia.get(fecha)
+            if i is not None:
+                mapas[matricula] = mapas.get(matricula, 0) | (1 << i)
+        return mapas
+    
     # --- Métodos originales del servicio ---
     
     def registrar_falta(self, falta_data: FaltaCreate) -> Falta:
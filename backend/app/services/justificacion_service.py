@@ -2,7 +2,9 @@
 """
 Servicio de lógica de negocio para Justificaciones.
 """
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from app.core.pagination import Paginacion
 from app.models.justificacion import Justificacion, JustificacionCreate
 from app.interfaces.justificacion_repo_if import IJustificacionRepository
 
@@ -20,9 +22,15 @@ class JustificacionService:
         """
         return self.justificacion_repo.create(justificacion_data)
     
-    def obtener_todas_justificaciones(self) -> List[Justificacion]:
-        """Obtiene todas las justificaciones"""
-        return self.justificacion_repo.get_all()
+    def obtener_todas_justificaciones(self, pagina: Optional[Paginacion] = None) -> List[Justificacion]:
+        """Obtiene todas las justificaciones (o una página de ellas)"""
+        if pagina is None:
+            return self.justificacion_repo.get_all()
+        justificaciones = self.justificacion_repo.get_all(
+            limite=pagina.limite_consulta,
+            despues_de=pagina.cursor(datetime, int)
+        )
+        return pagina.recortar(justificaciones, lambda j: (j.fecha_creacion, j.id))
     
     def obtener_justificacion(self, id_justificacion: int) -> Justificacion:
         """Obtiene una justificación por ID"""
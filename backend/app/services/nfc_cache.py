@@ -0,0 +1,108 @@
+# app/services/nfc_cache.py
+"""
+Caché de resolución de tarjetas NFC: UID → (matrícula, nombre, apellido, grupo).
+Evita consultar nfc/estudiante/grupo en cada lectura del torniquete.
+"""
+from typing import Dict, Iterable, NamedTuple, Optional
+from sqlmodel import Session, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import NFC, Estudiante, Grupo
+
+
+class TarjetaResuelta(NamedTuple):
+    """Datos del estudiante vinculado a una tarjeta NFC"""
+    nfc_uid: str
+    matricula: str
+    nombre: str
+    apellido: str
+    grupo: Optional[str]
+
+    def estudiante_dict(self) -> dict:
+        """Formato usado en las respuestas de asistencia"""
+        return {
+            "matricula": self.matricula,
+            "nombre": self.nombre,
+            "apellido": self.apellido,
+            "grupo": self.grupo
+        }
+
+
+_cache = TTLCache(
+    max_entries=settings.NFC_CACHE_MAX_ENTRADAS,
+    ttl_segundos=settings.NFC_CACHE_TTL_SEGUNDOS
+)
+
+
+def _query_tarjetas():
+    return (
+        select(NFC.nfc_uid, Estudiante.matricula, Estudiante.nombre, Estudiante.apellido, Grupo.nombre)
+        .join(Estudiante, NFC.matricula_estudiante == Estudiante.matricula)
+        .outerjoin(Grupo, Estudiante.id_grupo == Grupo.id)
+    )
+
+
+def resolver_tarjeta(session: Session, nfc_uid: str) -> Optional[TarjetaResuelta]:
+    """
+    Resuelve una tarjeta desde la caché; si no está, la carga con una sola consulta.
+    Retorna None si la tarjeta no existe o no está vinculada.
+    """
+    def cargar() -> Optional[TarjetaResuelta]:
+        fila = session.exec(_query_tarjetas().where(NFC.nfc_uid == nfc_uid)).first()
+        return TarjetaResuelta(*fila) if fila else None
+
+    return _cache.get_or_load(nfc_uid, cargar)
+
+
+def resolver_tarjetas(session: Session, nfc_uids: Iterable[str]) -> Dict[str, TarjetaResuelta]:
+    """
+    Resuelve varias tarjetas a la vez: las que no estén en caché se cargan
+    con una sola consulta. Las tarjetas desconocidas no aparecen en el resultado.
+    """
+    resueltas: Dict[str, TarjetaResuelta] = {}
+    faltantes = []
+    for nfc_uid in set(nfc_uids):
+        tarjeta = _cache.get(nfc_uid)
+        if tarjeta is None:
+            faltantes.append(nfc_uid)
+        else:
+            resueltas[nfc_uid] = tarjeta
+
+    if faltantes:
+        filas = session.exec(_query_tarjetas().where(NFC.nfc_uid.in_(faltantes))).all()
+        for fila in filas:
+            tarjeta = TarjetaResuelta(*fila)
+            _cache.set(tarjeta.nfc_uid, tarjeta)
+            resueltas[tarjeta.nfc_uid] = tarjeta
+
+    return resueltas
+
+
+def precargar(session: Session) -> int:
+    """Calienta la caché con todas las tarjetas vinculadas. Retorna cuántas se cargaron"""
+    filas = session.exec(_query_tarjetas().limit(settings.NFC_CACHE_MAX_ENTRADAS)).all()
+    for fila in filas:
+        tarjeta = TarjetaResuelta(*fila)
+        _cache.set(tarjeta.nfc_uid, tarjeta)
+    return len(filas)
+
+
+def invalidar_uid(nfc_uid: str) -> None:
+    """Descarta una tarjeta de la caché (alta o baja de tarjeta)"""
+    _cache.delete(nfc_uid)
+
+
+def invalidar_matricula(matricula: str) -> None:
+    """Descarta las tarjetas de un estudiante (actualización o eliminación)"""
+    _cache.delete_where(lambda _uid, tarjeta: tarjeta.matricula == matricula)
+
+
+def invalidar_todo() -> None:
+    """Vacía la caché (cambios masivos, p.ej. renombrar un grupo)"""
+    _cache.clear()
+
+
+def stats() -> dict:
+    """Estadísticas de la caché de tarjetas"""
+    return _cache.stats()
@@ -8,6 +8,7 @@ from fastapi import HTTPException, status
 
 from app.models import NFC, NFCCreate, NFCRead, Estudiante
 from app.repositories.nfc_repo import NFCRepository
+from app.services import nfc_cache
 
 
 class NFCService:
@@ -48,7 +49,9 @@ class NFCService:
             )
         
         # Crear la tarjeta
-        return self.nfc_repo.create(nfc_data)
+        db_nfc = self.nfc_repo.create(nfc_data)
+        nfc_cache.invalidar_uid(db_nfc.nfc_uid)
+        return db_nfc
     
     def obtener_todas_las_tarjetas(self) -> List[NFC]:
         """Obtiene todas las tarjetas NFC registradas"""
@@ -89,6 +92,7 @@ class NFCService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Tarjeta NFC con UID '{nfc_uid}' no encontrada."
             )
+        nfc_cache.invalidar_uid(nfc_uid)
     
     def eliminar_por_estudiante(self, matricula: str) -> None:
         """Elimina la tarjeta de un estudiante"""
@@ -105,3 +109,4 @@ class NFCService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"El estudiante '{matricula}' no tiene una tarjeta NFC vinculada."
             )
+        nfc_cache.invalidar_matricula(matricula)
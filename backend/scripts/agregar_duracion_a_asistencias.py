@@ -0,0 +1,101 @@
+"""
+Script de migración: Agregar duracion_minutos a las salidas de asistencias.
+
+Este script:
+1. Agrega la columna duracion_minutos INTEGER a asistencias
+2. La rellena por lotes en las salidas existentes con su entrada relacionada
+   (minutos completos entre la entrada y la salida)
+
+Las salidas nuevas ya guardan su duración al registrarse; los reportes de
+permanencia son agregados SQL sobre esta columna.
+
+IMPORTANTE: Ejecutar dentro del contenedor Docker
+docker exec -it siae-backend python scripts/agregar_duracion_a_asistencias.py
+"""
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel import Session, text
+from app.db.database import engine
+
+
+TAMANO_LOTE = 10000
+
+
+def rellenar_por_lotes(session: Session) -> int:
+    """Rellena duracion_minutos en lotes para no bloquear la tabla completa. Retorna filas actualizadas"""
+    total = 0
+    while True:
+        result = session.exec(text(f"""
+            UPDATE asistencias s
+            SET duracion_minutos = FLOOR(EXTRACT(EPOCH FROM (s."timestamp" - e."timestamp")) / 60)::int
+            FROM asistencias e
+            WHERE e.id = s.entrada_relacionada_id
+              AND s.id IN (
+                  SELECT x.id FROM asistencias x
+                  WHERE x.tipo = 'salida'
+                    AND x.duracion_minutos IS NULL
+                    AND EXISTS (SELECT 1 FROM asistencias y WHERE y.id = x.entrada_relacionada_id)
+                  LIMIT {TAMANO_LOTE}
+              );
+        """))
+        session.commit()
+
+        if not result.rowcount:
+            return total
+        total += result.rowcount
+        print(f"   ... {total} salidas actualizadas")
+
+
+def main():
+    print("=" * 60)
+    print("MIGRACIÓN: Agregar duracion_minutos a asistencias")
+    print("=" * 60)
+
+    with Session(engine) as session:
+        try:
+            # 1. Agregar columna
+            print("\n► Paso 1: Agregando columna duracion_minutos...")
+            session.exec(text("""
+                ALTER TABLE asistencias
+                ADD COLUMN IF NOT EXISTS duracion_minutos INTEGER;
+            """))
+            session.commit()
+            print("   ✓ Columna agregada")
+
+            # 2. Rellenar salidas existentes
+            print("\n► Paso 2: Rellenando salidas existentes...")
+            actualizadas = rellenar_por_lotes(session)
+            print(f"   ✓ {actualizadas} salidas rellenadas")
+
+            # 3. Verificar
+            print("\n► Paso 3: Verificando...")
+            stats = session.exec(text("""
+                SELECT COUNT(*), COUNT(duracion_minutos)
+                FROM asistencias
+                WHERE tipo = 'salida';
+            """)).first()
+            print(f"   ✓ {stats[1]}/{stats[0]} salidas con duración")
+            if stats[1] < stats[0]:
+                print("   ⚠️  Las salidas restantes no tienen entrada relacionada.")
+
+            print("\n" + "=" * 60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("=" * 60)
+            print("\nPróximos pasos:")
+            print("1. Reinicia el contenedor backend: docker-compose restart backend")
+
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            print("\nDetalles del error:")
+            import traceback
+            traceback.print_exc()
+            session.rollback()
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
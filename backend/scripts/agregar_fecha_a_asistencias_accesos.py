@@ -0,0 +1,127 @@
+"""
+Script de migración: Agregar columna fecha (fecha local) a asistencias y accesos.
+
+Este script:
+1. Agrega la columna fecha DATE a asistencias y accesos
+2. La rellena por lotes desde timestamp / hora_registro (ya en hora de México)
+3. Establece la restricción NOT NULL
+4. Crea los índices compuestos usados por las consultas por día
+
+Los filtros por día ya no usan date(timestamp), que impedía aprovechar índices.
+
+IMPORTANTE: Ejecutar dentro del contenedor Docker
+docker exec -it siae-backend python scripts/agregar_fecha_a_asistencias_accesos.py
+"""
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel import Session, text
+from app.db.database import engine
+
+
+TAMANO_LOTE = 10000
+
+# (tabla, columna de origen)
+TABLAS = [
+    ("asistencias", '"timestamp"'),
+    ("accesos", "hora_registro"),
+]
+
+INDICES = [
+    """CREATE INDEX IF NOT EXISTS ix_asistencias_estudiante_ciclo_tipo_fecha
+       ON asistencias (matricula_estudiante, id_ciclo, tipo, fecha);""",
+    """CREATE INDEX IF NOT EXISTS ix_asistencias_fecha_tipo
+       ON asistencias (fecha, tipo);""",
+    """CREATE INDEX IF NOT EXISTS ix_accesos_nfc_ciclo_fecha
+       ON accesos (nfc_uid, id_ciclo, fecha);""",
+    """CREATE INDEX IF NOT EXISTS ix_accesos_ciclo_fecha
+       ON accesos (id_ciclo, fecha);""",
+]
+
+
+def rellenar_por_lotes(session: Session, tabla: str, origen: str) -> int:
+    """Rellena fecha en lotes para no bloquear la tabla completa. Retorna filas actualizadas"""
+    total = 0
+    while True:
+        result = session.exec(text(f"""
+            UPDATE {tabla}
+            SET fecha = {origen}::date
+            WHERE id IN (
+                SELECT id FROM {tabla}
+                WHERE fecha IS NULL
+                LIMIT {TAMANO_LOTE}
+            );
+        """))
+        session.commit()
+
+        if not result.rowcount:
+            return total
+        total += result.rowcount
+        print(f"   ... {total} filas actualizadas en {tabla}")
+
+
+def main():
+    print("=" * 60)
+    print("MIGRACIÓN: Agregar fecha a asistencias y accesos")
+    print("=" * 60)
+
+    with Session(engine) as session:
+        try:
+            for tabla, origen in TABLAS:
+                print(f"\n► Tabla {tabla}")
+
+                # 1. Agregar columna (NULL temporalmente)
+                session.exec(text(f"""
+                    ALTER TABLE {tabla}
+                    ADD COLUMN IF NOT EXISTS fecha DATE;
+                """))
+                session.commit()
+                print("   ✓ Columna fecha agregada")
+
+                # 2. Rellenar desde la marca de tiempo existente
+                actualizadas = rellenar_por_lotes(session, tabla, origen)
+                print(f"   ✓ {actualizadas} filas rellenadas")
+
+                # 3. Restricción NOT NULL
+                session.exec(text(f"""
+                    ALTER TABLE {tabla}
+                    ALTER COLUMN fecha SET NOT NULL;
+                """))
+                session.commit()
+                print("   ✓ Restricción NOT NULL aplicada")
+
+            # 4. Índices compuestos
+            print("\n► Creando índices...")
+            for indice in INDICES:
+                session.exec(text(indice))
+            session.commit()
+            print("   ✓ Índices creados")
+
+            # 5. Verificar
+            print("\n► Verificando migración...")
+            for tabla, _ in TABLAS:
+                stats = session.exec(text(f"""
+                    SELECT COUNT(*), COUNT(fecha) FROM {tabla};
+                """)).first()
+                print(f"   ✓ {tabla}: {stats[1]}/{stats[0]} filas con fecha")
+
+            print("\n" + "=" * 60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("=" * 60)
+            print("\nPróximos pasos:")
+            print("1. Reinicia el contenedor backend: docker-compose restart backend")
+
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            print("\nDetalles del error:")
+            import traceback
+            traceback.print_exc()
+            session.rollback()
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
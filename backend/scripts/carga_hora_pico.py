@@ -0,0 +1,438 @@
+"""
+Prueba de carga: hora pico de entrada (lecturas NFC + dashboards).
+
+Este script:
+1. Siembra N estudiantes y tarjetas de prueba (prefijo CARGA-) en el ciclo activo
+2. Reproduce una curva de llegadas de hora pico contra /asistencia/registrar-nfc
+   (y con --acceso también /acceso/registrar, si está montado), con lecturas duplicadas
+3. Mantiene dashboards consultando /asistencia/hoy y /dashboard/turno en paralelo
+4. Reporta p50/p95/p99, throughput, mezcla de errores y consultas SQL por petición
+5. Opcionalmente reproduce un día real tomado de logs/api.log
+6. Guarda los resultados en JSON y los compara contra una línea base
+
+Modos:
+- En proceso (por defecto): levanta la API en un hilo con uvicorn en un puerto
+  local y cuenta las consultas SQL de cada petición.
+- HTTP (--url): apunta a una API ya levantada; no hay conteo de consultas.
+
+Requiere PostgreSQL (las consultas usan CTEs, ON CONFLICT y array_agg).
+Usar una base local o de pruebas, NUNCA la de producción.
+
+Ejemplos (dentro del contenedor Docker):
+docker exec -it siae-backend python scripts/carga_hora_pico.py --estudiantes 800 --duracion 60
+docker exec -it siae-backend python scripts/carga_hora_pico.py --salida base.json
+docker exec -it siae-backend python scripts/carga_hora_pico.py --baseline base.json
+docker exec -it siae-backend python scripts/carga_hora_pico.py --replay logs/api.log --fecha 2025-11-03 --velocidad 20
+docker exec -it siae-backend python scripts/carga_hora_pico.py --limpiar
+"""
+import argparse
+import contextvars
+import json
+import random
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event
+from sqlmodel import Session, select, text
+
+from app.db.database import engine
+from app.models import Estudiante, Grupo, NFC
+from app.services import ciclo_activo as ciclo_activo_provider
+
+
+PREFIJO = "CARGA-"
+GRUPO_CARGA = "CARGA"
+
+ENDPOINT_NFC = "/asistencia/registrar-nfc"
+ENDPOINT_ACCESO = "/acceso/registrar"
+ENDPOINTS_POLLING = ["/asistencia/hoy", "/dashboard/turno"]
+
+
+# --- Siembra de datos ---
+
+def matricula_carga(i: int) -> str:
+    return f"{PREFIJO}{i:05d}"
+
+
+def uid_carga(i: int) -> str:
+    return f"{PREFIJO}UID-{i:05d}"
+
+
+def sembrar(n: int) -> None:
+    """Crea (si no existen) el grupo, los estudiantes y las tarjetas de carga"""
+    with Session(engine) as session:
+        ciclo = ciclo_activo_provider.obtener_ciclo_activo(session)
+        if not ciclo:
+            print("\n❌ ERROR: No hay un ciclo escolar activo.")
+            sys.exit(1)
+
+        grupo = session.exec(select(Grupo).where(Grupo.nombre == GRUPO_CARGA)).first()
+        if not grupo:
+            grupo = Grupo(nombre=GRUPO_CARGA, semestre=1, turno="matutino")
+            session.add(grupo)
+            session.commit()
+            session.refresh(grupo)
+
+        existentes = set(session.exec(
+            select(Estudiante.matricula).where(Estudiante.matricula.like(f"{PREFIJO}%"))
+        ).all())
+
+        nuevos = [i for i in range(n) if matricula_carga(i) not in existentes]
+        session.add_all([
+            Estudiante(
+                matricula=matricula_carga(i),
+                nombre="Carga",
+                apellido=f"Prueba {i}",
+                id_grupo=grupo.id,
+                id_ciclo=ciclo.id
+            )
+            for i in nuevos
+        ])
+        session.commit()
+        session.add_all([NFC(nfc_uid=uid_carga(i), matricula_estudiante=matricula_carga(i)) for i in nuevos])
+        session.commit()
+        print(f"   ✓ {len(nuevos)} estudiantes/tarjetas creados ({len(existentes)} ya existían)")
+
+
+def limpiar() -> None:
+    """Elimina todos los datos de carga (asistencias, accesos, tarjetas, estudiantes y grupo)"""
+    patron = {"patron": f"{PREFIJO}%"}
+    with Session(engine) as session:
+        for sql in [
+            "DELETE FROM asistencia_abierta WHERE matricula_estudiante LIKE :patron",
+            "DELETE FROM asistencias WHERE matricula_estudiante LIKE :patron",
+            "DELETE FROM accesos WHERE nfc_uid LIKE :patron",
+            "DELETE FROM nfc WHERE nfc_uid LIKE :patron",
+            "DELETE FROM faltas WHERE matricula_estudiante LIKE :patron",
+            "DELETE FROM alertas_historial WHERE id_alerta IN "
+            "(SELECT id FROM alertas WHERE matricula_estudiante LIKE :patron)",
+            "DELETE FROM alertas WHERE matricula_estudiante LIKE :patron",
+            "DELETE FROM estudiante WHERE matricula LIKE :patron",
+        ]:
+            resultado = session.exec(text(sql), params=patron)
+            print(f"   ✓ {sql.split(' WHERE')[0]}: {resultado.rowcount}")
+        session.exec(text("DELETE FROM grupo WHERE nombre = :grupo"), params={"grupo": GRUPO_CARGA})
+        session.commit()
+
+
+# --- Conteo de consultas SQL por petición (modo en proceso) ---
+
+_consultas: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("consultas", default=None)
+
+
+def _contar_consulta(*_args, **_kwargs) -> None:
+    contador = _consultas.get()
+    if contador is not None:
+        contador[0] += 1
+
+
+class ContadorConsultasMiddleware:
+    """Agrega el encabezado X-DB-Queries con las consultas SQL ejecutadas por la petición"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        contador = [0]
+        token = _consultas.set(contador)
+
+        async def enviar(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(contador[0]).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _consultas.reset(token)
+
+
+def levantar_api_en_proceso() -> str:
+    """Levanta la API con uvicorn en un hilo y retorna su URL base"""
+    import uvicorn
+    from app.main import app
+
+    # El eco de SQL distorsiona las latencias
+    engine.echo = False
+    event.listen(engine, "before_cursor_execute", _contar_consulta)
+    app.add_middleware(ContadorConsultasMiddleware)
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning"))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+
+    rutas = {getattr(r, "path", None) for r in app.routes}
+    if ENDPOINT_ACCESO not in rutas:
+        print(f"   ⚠️  {ENDPOINT_ACCESO} no está montado en app.main; sus lecturas responderán 404")
+    return f"http://127.0.0.1:{puerto}"
+
+
+# --- Cliente HTTP y medición ---
+
+class Medicion:
+    """Acumula resultados de todas las peticiones (seguro entre hilos)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.registros = defaultdict(list)  # etiqueta -> [(status, ms, consultas)]
+
+    def agregar(self, etiqueta: str, status: int, ms: float, consultas: Optional[int]) -> None:
+        with self._lock:
+            self.registros[etiqueta].append((status, ms, consultas))
+
+
+def peticion(base: str, metodo: str, ruta: str, medicion: Medicion, cuerpo: Optional[dict] = None,
+             token: Optional[str] = None, timeout: float = 30.0) -> None:
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+    req = urllib.request.Request(base + ruta, data=datos, method=metodo)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+
+    etiqueta = f"{metodo} {ruta.split('?')[0]}"
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status, encabezados = resp.status, resp.headers
+    except urllib.error.HTTPError as e:
+        e.read()
+        status, encabezados = e.code, e.headers
+    except Exception:
+        status, encabezados = 0, {}
+    ms = (time.perf_counter() - inicio) * 1000
+
+    consultas = encabezados.get("x-db-queries") if encabezados else None
+    medicion.agregar(etiqueta, status, ms, int(consultas) if consultas is not None else None)
+
+
+# --- Escenarios ---
+
+def curva_hora_pico(args) -> List[tuple]:
+    """
+    Genera (segundo, metodo, ruta, cuerpo) para cada lectura: una llegada por
+    estudiante con distribución normal alrededor del pico, más repeticiones.
+    """
+    rnd = random.Random(args.semilla)
+    eventos = []
+    for i in range(args.estudiantes):
+        t = rnd.gauss(args.duracion * args.pico, args.duracion * args.dispersion)
+        t = min(max(t, 0.0), args.duracion)
+        ruta = ENDPOINT_ACCESO if rnd.random() < args.acceso else ENDPOINT_NFC
+        cuerpo = {"nfc_uid": uid_carga(i)}
+        eventos.append((t, "POST", ruta, cuerpo))
+
+        # Lecturas repetidas (el estudiante pasa la tarjeta otra vez)
+        if rnd.random() < args.duplicados:
+            for _ in range(rnd.randint(1, 2)):
+                eventos.append((t + rnd.uniform(0.3, 3.0), "POST", ruta, cuerpo))
+
+    return sorted(eventos, key=lambda e: e[0])
+
+
+def dia_desde_log(args) -> List[tuple]:
+    """
+    Reconstruye las peticiones de un día desde logs/api.log.
+    Los cuerpos no se registran en el log: las lecturas se asignan a tarjetas
+    de carga en orden circular. Solo se reproducen GET y lecturas de asistencia.
+    """
+    eventos = []
+    inicio = None
+    siguiente_tarjeta = 0
+    with open(args.replay, encoding="utf-8") as f:
+        for linea in f:
+            _, _, resto = linea.partition(" - siae.api - ")
+            _, _, contenido = resto.partition(" - ")
+            try:
+                registro = json.loads(contenido)
+            except json.JSONDecodeError:
+                continue
+            if "endpoint" not in registro or "method" not in registro:
+                continue
+            if args.fecha and not registro["timestamp"].startswith(args.fecha):
+                continue
+
+            metodo, ruta = registro["method"], registro["endpoint"]
+            if metodo == "POST" and ruta in (ENDPOINT_NFC, ENDPOINT_ACCESO):
+                cuerpo = {"nfc_uid": uid_carga(siguiente_tarjeta % args.estudiantes)}
+                siguiente_tarjeta += 1
+            elif metodo == "GET":
+                cuerpo = None
+            else:
+                continue
+
+            marca = datetime.fromisoformat(registro["timestamp"])
+            inicio = inicio or marca
+            eventos.append(((marca - inicio).total_seconds() / args.velocidad, metodo, ruta, cuerpo))
+
+    return sorted(eventos, key=lambda e: e[0])
+
+
+def ejecutar(base: str, eventos: List[tuple], args) -> tuple:
+    """Envía los eventos en su instante y mantiene los pollers de dashboard"""
+    medicion = Medicion()
+    fin_lecturas = threading.Event()
+
+    def poller():
+        rnd = random.Random()
+        while not fin_lecturas.is_set():
+            peticion(base, "GET", rnd.choice(ENDPOINTS_POLLING), medicion, token=args.token)
+            fin_lecturas.wait(args.intervalo_polling)
+
+    pollers = [threading.Thread(target=poller, daemon=True) for _ in range(args.pollers)]
+    inicio = time.perf_counter()
+    for hilo in pollers:
+        hilo.start()
+
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        for t, metodo, ruta, cuerpo in eventos:
+            espera = t - (time.perf_counter() - inicio)
+            if espera > 0:
+                time.sleep(espera)
+            pool.submit(peticion, base, metodo, ruta, medicion, cuerpo, args.token)
+
+    fin_lecturas.set()
+    for hilo in pollers:
+        hilo.join()
+    return medicion, time.perf_counter() - inicio
+
+
+# --- Reporte ---
+
+def percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados))) - 1))
+    return round(ordenados[indice], 2)
+
+
+def resumir(medicion: Medicion, segundos: float) -> dict:
+    resumen = {}
+    for etiqueta, registros in sorted(medicion.registros.items()):
+        latencias = [ms for _, ms, _ in registros]
+        consultas = [c for _, _, c in registros if c is not None]
+        resumen[etiqueta] = {
+            "peticiones": len(registros),
+            "p50_ms": percentil(latencias, 50),
+            "p95_ms": percentil(latencias, 95),
+            "p99_ms": percentil(latencias, 99),
+            "throughput_rps": round(len(registros) / segundos, 2) if segundos else 0.0,
+            "status": dict(Counter(str(s) for s, _, _ in registros)),
+            "consultas_promedio": round(sum(consultas) / len(consultas), 2) if consultas else None
+        }
+    return {"duracion_s": round(segundos, 2), "endpoints": resumen}
+
+
+def imprimir(resumen: dict, base: Optional[dict] = None) -> None:
+    print(f"\nDuración: {resumen['duracion_s']} s")
+    print(f"{'Endpoint':<36}{'n':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>8}{'SQL/req':>9}  status")
+    print("-" * 110)
+    for etiqueta, d in resumen["endpoints"].items():
+        consultas = d["consultas_promedio"] if d["consultas_promedio"] is not None else "n/d"
+        print(f"{etiqueta:<36}{d['peticiones']:>7}{d['p50_ms']:>9}{d['p95_ms']:>9}{d['p99_ms']:>9}"
+              f"{d['throughput_rps']:>8}{consultas:>9}  {d['status']}")
+
+        anterior = (base or {}).get("endpoints", {}).get(etiqueta)
+        if anterior:
+            deltas = []
+            for clave in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                if anterior[clave]:
+                    cambio = (d[clave] - anterior[clave]) / anterior[clave] * 100
+                    deltas.append(f"{clave} {cambio:+.1f}%")
+            print(f"{'  vs línea base':<36}{', '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de hora pico para SIAE")
+    parser.add_argument("--url", help="URL de una API ya levantada (modo HTTP); por defecto se levanta en proceso")
+    parser.add_argument("--token", help="Token Bearer opcional para las peticiones")
+    parser.add_argument("--estudiantes", type=int, default=500)
+    parser.add_argument("--duracion", type=float, default=60.0, help="Duración de la hora pico simulada (s)")
+    parser.add_argument("--pico", type=float, default=0.4, help="Posición del pico dentro de la duración (0-1)")
+    parser.add_argument("--dispersion", type=float, default=0.15, help="Desviación de llegadas (fracción de la duración)")
+    parser.add_argument("--duplicados", type=float, default=0.3, help="Probabilidad de pasar la tarjeta de nuevo")
+    parser.add_argument(
+        "--acceso", type=float, default=0.0,
+        help=f"Fracción de lecturas a {ENDPOINT_ACCESO} (la API solo lo monta si se agrega su router)"
+    )
+    parser.add_argument("--pollers", type=int, default=3, help="Dashboards consultando en paralelo")
+    parser.add_argument("--intervalo-polling", type=float, default=2.0)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--replay", help="Ruta a api.log para reproducir un día real")
+    parser.add_argument("--fecha", help="Día a reproducir (YYYY-MM-DD)")
+    parser.add_argument("--velocidad", type=float, default=1.0, help="Factor de aceleración del replay")
+    parser.add_argument("--salida", help="Guardar resultados en este JSON")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--sin-siembra", action="store_true", help="No crear estudiantes/tarjetas de carga")
+    parser.add_argument("--limpiar", action="store_true", help="Eliminar los datos de carga y salir")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PRUEBA DE CARGA: hora pico de asistencia")
+    print("=" * 60)
+
+    if args.limpiar:
+        print("\n► Eliminando datos de carga...")
+        limpiar()
+        print("\n✅ Datos de carga eliminados")
+        return
+
+    if not args.sin_siembra:
+        print(f"\n► Paso 1: Sembrando {args.estudiantes} estudiantes y tarjetas...")
+        sembrar(args.estudiantes)
+
+    print("\n► Paso 2: Preparando API...")
+    base = args.url.rstrip("/") if args.url else levantar_api_en_proceso()
+    print(f"   ✓ {base} ({'HTTP' if args.url else 'en proceso'})")
+
+    print("\n► Paso 3: Generando escenario...")
+    eventos = dia_desde_log(args) if args.replay else curva_hora_pico(args)
+    print(f"   ✓ {len(eventos)} peticiones en {eventos[-1][0] if eventos else 0:.1f} s "
+          f"+ {args.pollers} dashboards cada {args.intervalo_polling} s")
+
+    print("\n► Paso 4: Ejecutando...")
+    medicion, segundos = ejecutar(base, eventos, args)
+    resumen = resumir(medicion, segundos)
+    resumen["parametros"] = {k: v for k, v in vars(args).items() if k not in ("token",)}
+
+    linea_base = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            linea_base = json.load(f)
+    imprimir(resumen, linea_base)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Resultados guardados en {args.salida}")
+
+    print("\nNOTA: las asistencias generadas quedan en la base; usa --limpiar para borrarlas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Script nocturno: Corte de faltas incremental del ciclo activo.
+
+Este script:
+1. Lee la marca del ciclo (hasta qué día está cortado)
+2. Registra las faltas de los días hábiles desde la marca hasta ayer
+3. Avanza la marca; los días cortados quedan como finales en el dashboard
+
+Solo procesa los días nuevos, así que puede ejecutarse cada noche (o repetirse)
+sin volver a recorrer el ciclo completo. Si falla, la marca no avanza.
+
+IMPORTANTE: Ejecutar dentro del contenedor Docker
+docker exec siae-backend python scripts/corte_faltas_incremental.py [--ciclo ID] [--hasta AAAA-MM-DD]
+
+Ejemplo de crontab en el host (todos los días a las 23:30):
+30 23 * * * docker exec siae-backend python scripts/corte_faltas_incremental.py >> /var/log/siae_corte.log 2>&1
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from app.db import base  # noqa: F401  (registra los modelos)
+from app.db.database import engine
+from app.services import corte_incremental
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corte de faltas incremental")
+    parser.add_argument("--ciclo", type=int, default=None, help="ID del ciclo (por defecto el activo)")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None, help="Último día a cortar (por defecto ayer)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CORTE DE FALTAS INCREMENTAL")
+    print("=" * 60)
+
+    with Session(engine) as session:
+        try:
+            # 1. Marca actual
+            print("\n► Paso 1: Leyendo marca del ciclo...")
+            marca = corte_incremental.obtener_marca(session, args.ciclo)
+            print(f"   ✓ Ciclo {marca.id_ciclo} cortado hasta {marca.corte_hasta or 'sin cortes'}")
+
+            # 2. Corte de los días nuevos
+            print("\n► Paso 2: Procesando días nuevos...")
+            resultado = corte_incremental.procesar(session, args.ciclo, args.hasta)
+            if resultado.get("mensaje"):
+                print(f"   ✓ {resultado['mensaje']}")
+            else:
+                print(f"   ✓ {resultado.get('dias_habiles', 0)} días hábiles, "
+                      f"{resultado.get('faltas_nuevas', 0)} faltas nuevas")
+
+            # 3. Verificar
+            print("\n► Paso 3: Verificando...")
+            marca = corte_incremental.obtener_marca(session, args.ciclo)
+            print(f"   ✓ Ciclo {marca.id_ciclo} cortado hasta {marca.corte_hasta} "
+                  f"({marca.dias_finales} días hábiles finales)")
+
+            print("\n" + "=" * 60)
+            print("✅ CORTE COMPLETADO")
+            print("=" * 60)
+
+        except HTTPException as e:
+            print(f"\n❌ ERROR: {e.detail}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"\n❌ ERROR durante el corte: {e}")
+            print("\nDetalles del error:")
+            import traceback
+            traceback.print_exc()
+            session.rollback()
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Script de migración: Crear y poblar la tabla asistencia_abierta.
+
+Este script:
+1. Crea la tabla asistencia_abierta (una fila por estudiante y ciclo)
+2. La reconstruye desde asistencias con la última entrada pendiente
+   (tipo='entrada' y es_valida IS NULL) de cada estudiante en cada ciclo
+
+Puede ejecutarse de nuevo en cualquier momento para reconstruir el estado.
+Ejecutarlo ANTES de reiniciar el backend con la versión que usa la tabla;
+sin él, las entradas pendientes existentes no se considerarían al decidir.
+
+IMPORTANTE: Ejecutar dentro del contenedor Docker
+docker exec -it siae-backend python scripts/crear_asistencia_abierta.py
+"""
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel import Session, text
+from app.db.database import engine
+
+
+def main():
+    print("=" * 60)
+    print("MIGRACIÓN: Crear tabla asistencia_abierta")
+    print("=" * 60)
+
+    with Session(engine) as session:
+        try:
+            # 1. Crear tabla
+            print("\n► Paso 1: Creando tabla asistencia_abierta...")
+            session.exec(text("""
+                CREATE TABLE IF NOT EXISTS asistencia_abierta (
+                    matricula_estudiante VARCHAR(30) NOT NULL
+                        REFERENCES estudiante(matricula) ON DELETE CASCADE,
+                    id_ciclo INTEGER NOT NULL
+                        REFERENCES ciclo_escolar(id) ON DELETE CASCADE,
+                    id_entrada INTEGER NOT NULL
+                        REFERENCES asistencias(id) ON DELETE CASCADE,
+                    "timestamp" TIMESTAMP NOT NULL,
+                    fecha DATE NOT NULL,
+                    PRIMARY KEY (matricula_estudiante, id_ciclo)
+                );
+            """))
+            session.exec(text("""
+                CREATE INDEX IF NOT EXISTS ix_asistencia_abierta_fecha
+                ON asistencia_abierta (fecha);
+            """))
+            session.commit()
+            print("   ✓ Tabla lista")
+
+            # 2. Reconstruir desde el historial (en la misma transacción)
+            print("\n► Paso 2: Reconstruyendo sesiones abiertas...")
+            session.exec(text("DELETE FROM asistencia_abierta;"))
+            result = session.exec(text("""
+                INSERT INTO asistencia_abierta
+                    (matricula_estudiante, id_ciclo, id_entrada, "timestamp", fecha)
+                SELECT DISTINCT ON (matricula_estudiante, id_ciclo)
+                       matricula_estudiante, id_ciclo, id, "timestamp", fecha
+                FROM asistencias
+                WHERE tipo = 'entrada' AND es_valida IS NULL
+                ORDER BY matricula_estudiante, id_ciclo, "timestamp" DESC;
+            """))
+            session.commit()
+            print(f"   ✓ {result.rowcount} sesiones abiertas registradas")
+
+            # 3. Verificar
+            print("\n► Paso 3: Verificando...")
+            pendientes = session.exec(text("""
+                SELECT COUNT(*) FROM asistencias
+                WHERE tipo = 'entrada' AND es_valida IS NULL;
+            """)).first()[0]
+            print(f"   ✓ Entradas pendientes en el historial: {pendientes}")
+            if pendientes > result.rowcount:
+                print("   ⚠️  Hay estudiantes con más de una entrada pendiente;")
+                print("      solo la más reciente queda como sesión abierta.")
+
+            print("\n" + "=" * 60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("=" * 60)
+            print("\nPróximos pasos:")
+            print("1. Reinicia el contenedor backend: docker-compose restart backend")
+
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            print("\nDetalles del error:")
+            import traceback
+            traceback.print_exc()
+            session.rollback()
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
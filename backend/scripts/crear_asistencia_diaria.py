@@ -0,0 +1,101 @@
+"""
+Script de migración: Crear y poblar la tabla asistencia_diaria.
+
+Este script:
+1. Crea la tabla asistencia_diaria (una fila por estudiante, ciclo y día con entrada)
+2. La reconstruye desde asistencias: asistio es falso solo si la entrada expiró
+   (es_valida = FALSE) y minutos es la duración de la salida relacionada
+
+Puede ejecutarse de nuevo en cualquier momento para reconstruir el resumen.
+Ejecutarlo ANTES de reiniciar el backend con la versión que usa la tabla;
+sin él, los porcentajes del dashboard solo considerarían las marcas nuevas.
+
+IMPORTANTE: Ejecutar dentro del contenedor Docker
+docker exec -it siae-backend python scripts/crear_asistencia_diaria.py
+"""
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel import Session, text
+from app.db.database import engine
+
+
+def main():
+    print("=" * 60)
+    print("MIGRACIÓN: Crear tabla asistencia_diaria")
+    print("=" * 60)
+
+    with Session(engine) as session:
+        try:
+            # 1. Crear tabla
+            print("\n► Paso 1: Creando tabla asistencia_diaria...")
+            session.exec(text("""
+                CREATE TABLE IF NOT EXISTS asistencia_diaria (
+                    matricula_estudiante VARCHAR NOT NULL
+                        REFERENCES estudiante(matricula) ON DELETE CASCADE,
+                    id_ciclo INTEGER NOT NULL
+                        REFERENCES ciclo_escolar(id) ON DELETE CASCADE,
+                    fecha DATE NOT NULL,
+                    asistio BOOLEAN NOT NULL DEFAULT TRUE,
+                    minutos INTEGER,
+                    PRIMARY KEY (matricula_estudiante, id_ciclo, fecha)
+                );
+            """))
+            session.exec(text("""
+                CREATE INDEX IF NOT EXISTS ix_asistencia_diaria_ciclo_fecha
+                ON asistencia_diaria (id_ciclo, fecha);
+            """))
+            session.commit()
+            print("   ✓ Tabla lista")
+
+            # 2. Reconstruir desde el historial (en la misma transacción)
+            print("\n► Paso 2: Reconstruyendo resumen diario...")
+            session.exec(text("DELETE FROM asistencia_diaria;"))
+            result = session.exec(text("""
+                INSERT INTO asistencia_diaria
+                    (matricula_estudiante, id_ciclo, fecha, asistio, minutos)
+                SELECT DISTINCT ON (e.matricula_estudiante, e.id_ciclo, e.fecha)
+                       e.matricula_estudiante, e.id_ciclo, e.fecha,
+                       e.es_valida IS DISTINCT FROM FALSE,
+                       COALESCE(
+                           s.duracion_minutos,
+                           FLOOR(EXTRACT(EPOCH FROM (s."timestamp" - e."timestamp")) / 60)::int
+                       )
+                FROM asistencias e
+                LEFT JOIN asistencias s
+                       ON s.entrada_relacionada_id = e.id AND s.tipo = 'salida'
+                WHERE e.tipo = 'entrada'
+                ORDER BY e.matricula_estudiante, e.id_ciclo, e.fecha,
+                         e.es_valida IS DISTINCT FROM FALSE DESC, e."timestamp" DESC;
+            """))
+            session.commit()
+            print(f"   ✓ {result.rowcount} días registrados")
+
+            # 3. Verificar
+            print("\n► Paso 3: Verificando...")
+            stats = session.exec(text("""
+                SELECT COUNT(*), COUNT(*) FILTER (WHERE asistio), COUNT(minutos)
+                FROM asistencia_diaria;
+            """)).first()
+            print(f"   ✓ {stats[1]}/{stats[0]} días asistidos, {stats[2]} con permanencia")
+
+            print("\n" + "=" * 60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("=" * 60)
+            print("\nPróximos pasos:")
+            print("1. Reinicia el contenedor backend: docker-compose restart backend")
+
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            print("\nDetalles del error:")
+            import traceback
+            traceback.print_exc()
+            session.rollback()
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
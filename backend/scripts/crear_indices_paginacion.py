@@ -0,0 +1,63 @@
+"""
+Script de migración: Crear los índices usados por la paginación por cursor.
+
+Este script crea un índice compuesto por cada listado paginado, sobre la
+misma clave por la que se ordena la página (p.ej. timestamp + id), para que
+"siguiente página" sea una búsqueda en el índice y no un recorrido completo.
+
+Los índices se crean con CONCURRENTLY para no bloquear escrituras mientras
+se construyen; puede ejecutarse de nuevo sin problema.
+
+IMPORTANTE: Ejecutar dentro del contenedor Docker
+docker exec -it siae-backend python scripts/crear_indices_paginacion.py
+"""
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel import text
+from app.db.database import engine
+
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ("ix_asistencias_timestamp_id", "asistencias", '"timestamp", id'),
+    ("ix_asistencias_estudiante_timestamp_id", "asistencias", 'matricula_estudiante, "timestamp", id'),
+    ("ix_accesos_ciclo_hora_id", "accesos", "id_ciclo, hora_registro, id"),
+    ("ix_faltas_fecha_id", "faltas", "fecha, id"),
+    ("ix_justificaciones_fecha_creacion_id", "justificaciones", "fecha_creacion, id"),
+]
+
+
+def main():
+    print("=" * 60)
+    print("MIGRACIÓN: Índices para paginación por cursor")
+    print("=" * 60)
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            for nombre, tabla, columnas in INDICES:
+                print(f"\n► Creando {nombre} en {tabla} ({columnas})...")
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON {tabla} ({columnas});"
+                ))
+                print("   ✓ Listo")
+
+            print("\n" + "=" * 60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("=" * 60)
+
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            print("   Si un índice quedó INVALID, elimínalo con DROP INDEX y vuelve a ejecutar.")
+            print("\nDetalles del error:")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Agregar backend/ al path para importar app
+sys.path.insert(0, str(Path(__file__).parent.parent))
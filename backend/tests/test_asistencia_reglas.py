@@ -0,0 +1,118 @@
+"""
+Pruebas de las reglas de entrada/salida del registro por lotes.
+No requieren base de datos: decidir_marca y simular_marcas son lógica pura.
+"""
+from datetime import datetime, timedelta
+
+from app.services.asistencia_service import AsistenciaService
+
+
+LUNES = datetime(2025, 3, 3, 7, 0)
+MARTES = LUNES + timedelta(days=1)
+
+
+def pendiente(marca, id_entrada=1):
+    return {"id": id_entrada, "timestamp": marca, "fecha": marca.date(), "nueva": None}
+
+
+def acciones(decisiones):
+    return [accion for _, _, accion, _ in decisiones]
+
+
+# --- decidir_marca ---
+
+def test_entrada_sin_pendiente():
+    assert AsistenciaService.decidir_marca(LUNES, False, None) == "entrada"
+
+
+def test_duplicada_si_ya_hay_entrada_hoy():
+    assert AsistenciaService.decidir_marca(LUNES, True, None) == "duplicada"
+    assert AsistenciaService.decidir_marca(MARTES, True, LUNES) == "duplicada"
+
+
+def test_muy_pronto_antes_del_minimo():
+    marca = LUNES + timedelta(minutes=AsistenciaService.MINUTOS_MINIMOS - 1)
+    assert AsistenciaService.decidir_marca(marca, False, LUNES) == "muy_pronto"
+
+
+def test_salida_en_el_minimo_y_en_el_maximo():
+    minimo = LUNES + timedelta(minutes=AsistenciaService.MINUTOS_MINIMOS)
+    maximo = LUNES + timedelta(hours=AsistenciaService.HORAS_MAXIMAS)
+    assert AsistenciaService.decidir_marca(minimo, False, LUNES) == "salida"
+    assert AsistenciaService.decidir_marca(maximo, False, LUNES) == "salida"
+
+
+def test_expirada_despues_del_maximo():
+    marca = LUNES + timedelta(hours=AsistenciaService.HORAS_MAXIMAS, seconds=1)
+    assert AsistenciaService.decidir_marca(marca, False, LUNES) == "expirada"
+
+
+# --- simular_marcas ---
+
+def test_entrada_y_salida_en_dias_distintos():
+    pendientes, fechas = [], set()
+    entrada = LUNES.replace(hour=20)
+    salida = MARTES.replace(hour=5)
+    decisiones = AsistenciaService.simular_marcas([(salida, 1), (entrada, 0)], pendientes, fechas, None)
+
+    assert [indice for indice, _, _, _ in decisiones] == [0, 1]
+    assert acciones(decisiones) == ["entrada", "salida"]
+    # La salida cierra la entrada agregada por la misma simulación
+    assert decisiones[1][3] is decisiones[0][3]
+    assert pendientes == []
+    assert fechas == {LUNES.date()}
+
+
+def test_segunda_entrada_del_dia_es_duplicada():
+    decisiones = AsistenciaService.simular_marcas(
+        [(LUNES, 0), (LUNES + timedelta(hours=1), 1)], [], set(), None
+    )
+    assert acciones(decisiones) == ["entrada", "duplicada"]
+
+
+def test_salida_de_una_sesion_abierta_en_la_bd():
+    abierta = pendiente(LUNES.replace(hour=20))
+    pendientes = [abierta]
+    decisiones = AsistenciaService.simular_marcas(
+        [(MARTES.replace(hour=5), 0)], pendientes, {LUNES.date()}, LUNES.replace(hour=20)
+    )
+    assert acciones(decisiones) == ["salida"]
+    assert decisiones[0][3] is abierta
+    assert pendientes == []
+
+
+def test_expirada_cierra_la_sesion_y_permite_nueva_entrada():
+    pendientes = [pendiente(LUNES)]
+    marca = MARTES.replace(hour=8)
+    decisiones = AsistenciaService.simular_marcas(
+        [(marca, 0), (marca + timedelta(minutes=1), 1)], pendientes, {LUNES.date()}, LUNES
+    )
+    assert acciones(decisiones) == ["expirada", "entrada"]
+    assert [p["fecha"] for p in pendientes] == [MARTES.date()]
+
+
+def test_lectura_anterior_a_la_sesion_abierta_se_rechaza():
+    # Sesión abierta del martes y un lector sin red que envía una lectura del lunes
+    abierta = pendiente(MARTES)
+    pendientes = [abierta]
+    decisiones = AsistenciaService.simular_marcas(
+        [(LUNES, 0)], pendientes, {MARTES.date()}, MARTES
+    )
+    assert acciones(decisiones) == ["anterior"]
+    assert pendientes == [abierta]
+
+
+def test_lectura_igual_a_la_ultima_marca_se_rechaza():
+    decisiones = AsistenciaService.simular_marcas([(LUNES, 0)], [], set(), LUNES)
+    assert acciones(decisiones) == ["anterior"]
+
+
+def test_rechazos_no_avanzan_la_ultima_marca():
+    # La lectura muy pronto no cuenta como marca: la siguiente se decide contra la entrada
+    pendientes = [pendiente(LUNES.replace(hour=23, minute=58))]
+    muy_pronto = MARTES.replace(hour=0, minute=0)
+    salida = MARTES.replace(hour=0, minute=10)
+    decisiones = AsistenciaService.simular_marcas(
+        [(muy_pronto, 0), (salida, 1)], pendientes, {LUNES.date()}, LUNES.replace(hour=23, minute=58)
+    )
+    assert acciones(decisiones) == ["muy_pronto", "salida"]